@@ -0,0 +1,120 @@
+"""
+Benchmark index: a benchmark portfolio grouped once, for comparing every fund
+against it.
+
+A fund is compared against the index, never copied into it. The holdings are
+grouped by key once (issuer_id, norm_key, or stock_id, the last built on first
+use). Each grouping keeps:
+  - the summed weight per key and a key → position index (for active share)
+  - the benchmark's rows sorted by key (for the row-level correlation join)
+
+Sector and country weights are precomputed as well (ranked(), shared with fund breakdowns). Several indexes
+(ACWI, SSAC_EM, World, ...) can be used side by side. Treat the frame and
+arrays as read-only; the arrays are flagged non-writeable.
+"""
+import numpy as np
+import pandas as pd
+
+EXCLUDED_SECTORS = ('', '-', 'Cash and/or Derivatives')
+GROUP_KEYS = ('issuer_id', 'norm_key')   # groupings built up front when the column exists
+RANK_DIGITS = 9   # breakdown weights equal to this many decimals rank as tied
+
+
+def ranked(weights):
+    """Label weights sorted descending, ties broken by label.
+
+    Weights are compared at RANK_DIGITS, so sums taken in a different order
+    (groupby over stocks vs. ETF exposure vectors) rank the same way.
+    """
+    return weights.sort_index().sort_values(ascending=False, kind='stable',
+                                            key=lambda w: w.round(RANK_DIGITS))
+
+
+def sector_country_weights(frame):
+    """(sectors, countries) weights of a stock-level frame, ranked; excluded sectors left out."""
+    valid = frame[~frame['sector'].isin(EXCLUDED_SECTORS)]
+    return (ranked(valid.groupby('sector')['weight'].sum()),
+            ranked(valid.groupby('location')['weight'].sum()))
+
+
+def _ranges(starts, lengths):
+    """Concatenated np.arange(start, start + length) for each pair, as one flat index array."""
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+
+def _frozen(arr):
+    arr.flags.writeable = False
+    return arr
+
+
+class _KeyGroups:
+    """Benchmark rows grouped by one key column."""
+
+    def __init__(self, keys, weights):
+        codes, uniques = pd.factorize(keys, sort=True, use_na_sentinel=False)
+        self.index = pd.Index(uniques)
+        self.weights = _frozen(np.bincount(codes, weights=weights, minlength=len(uniques)))
+        self.order = _frozen(np.argsort(codes, kind='stable'))
+        self.counts = _frozen(np.bincount(codes, minlength=len(uniques)))
+        self.starts = _frozen(np.cumsum(self.counts) - self.counts)
+        self.row_weights = _frozen(weights[self.order])
+
+
+class BenchmarkIndex:
+    """Immutable benchmark holdings with precomputed groupings for fund comparisons."""
+
+    def __init__(self, name, frame):
+        self.name = name
+        self.frame = frame
+        self.stock_ids = frozenset(frame['stock_id'])
+        self.sectors, self.countries = sector_country_weights(frame)
+        self._weights = _frozen(frame['weight'].to_numpy(dtype=float, copy=True))
+        self._groups = {col: _KeyGroups(frame[col].to_numpy(), self._weights)
+                        for col in GROUP_KEYS if col in frame.columns}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def group(self, col):
+        """Grouping by key column col (built and kept on first use)."""
+        if col not in self._groups:
+            self._groups[col] = _KeyGroups(self.frame[col].to_numpy(), self._weights)
+        return self._groups[col]
+
+    def holds(self, stock_ids):
+        """Boolean mask: which of stock_ids are benchmark constituents."""
+        return stock_ids.isin(self.stock_ids)
+
+    def key_column(self, df):
+        """Join column for a fund frame: issuer_id when both sides have it, else norm_key or stock_id."""
+        if 'issuer_id' in df.columns and 'issuer_id' in self.frame.columns:
+            return 'issuer_id'
+        return 'norm_key' if 'norm_key' in df.columns else 'stock_id'
+
+    def overlap(self, df, col=None):
+        """Σ min(w_fund[k], w_benchmark[k]) over keys, i.e. 1 − active share (in %)."""
+        col = col or self.key_column(df)
+        groups = self.group(col)
+        fund = df.groupby(col)['weight'].sum()
+        pos = groups.index.get_indexer(fund.index)
+        bench = np.where(pos >= 0, groups.weights[pos], 0.0)
+        return round(np.minimum(fund.to_numpy(dtype=float), bench).sum(), 2)
+
+    def correlation(self, df, col=None):
+        """Pearson correlation of fund and benchmark row weights joined on the key (0 if ≤ 5 pairs)."""
+        col = col or self.key_column(df)
+        groups = self.group(col)
+        pos = groups.index.get_indexer(df[col])
+        hit = pos >= 0
+        counts = groups.counts[pos[hit]]
+        if counts.sum() <= 5:
+            return 0
+        fund = np.repeat(df['weight'].to_numpy(dtype=float)[hit], counts)
+        bench = groups.row_weights[_ranges(groups.starts[pos[hit]], counts)]
+        return round(pd.Series(fund).corr(pd.Series(bench)), 4)
+
+    def compare(self, df):
+        """(overlap %, correlation) of a fund's stock-level frame against this benchmark."""
+        col = self.key_column(df)
+        return self.overlap(df, col), self.correlation(df, col)
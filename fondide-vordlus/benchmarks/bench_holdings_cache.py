@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: columnar holdings cache
+==================================
+Loads every iShares CSV and EODHD JSON in data/raw/holdings/ twice: with
+the loaders' raw readers (csv/JSON → row dicts → DataFrame, as every run did
+before holdings_cache.py) and from the .npz holdings cache, and checks that
+both give the same values and attrs. Reports load time (best of N) and frame
+memory. The cache is built in a temp dir; data/cache/ is left alone.
+
+Usage (from fondide-vordlus/):
+  python benchmarks/bench_holdings_cache.py [--repeat N]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE))
+
+from holdings_cache import HoldingsCache
+from pipeline_shared import CACHE_DIR, _read_eodhd_json, _read_ishares_csv
+
+
+def sources():
+    """(holdings file, reader) of every loadable holdings file."""
+    root = BASE / CACHE_DIR
+    return ([(p, _read_ishares_csv) for p in sorted(root.glob('*_holdings.csv'))]
+            + [(p, _read_eodhd_json) for p in sorted(root.glob('*_eodhd_holdings.json'))])
+
+
+def timed(fn, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t)
+    return result, best
+
+
+def megabytes(frames):
+    return sum(df.memory_usage(deep=True).sum() for df in frames) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the columnar holdings cache')
+    parser.add_argument('--repeat', type=int, default=7, help='Timing repeats (best of N)')
+    args = parser.parse_args()
+
+    files = sources()
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        raw, raw_time = timed(lambda: [read(p) for p, read in files], args.repeat)
+        cache = HoldingsCache(Path(tmp))
+        _, build_time = timed(lambda: [cache.load(p, read) for p, read in files], 1)
+
+        def load_cached():   # a new process's cache: converter fingerprints included
+            fresh = HoldingsCache(Path(tmp))
+            return [fresh.load(p, read) for p, read in files]
+
+        cached, cached_time = timed(load_cached, args.repeat)
+
+    mismatches = []
+    for (path, _), a, b in zip(files, raw, cached):
+        same = (not a.empty and a[b.columns].astype(object).equals(b.astype(object)) and a.attrs == b.attrs)
+        if not same and not (a.empty and b.empty):
+            mismatches.append(path.name)
+    rows = sum(len(df) for df in raw)
+    print(f'{len(files)} holdings files, {rows} rows from {BASE / CACHE_DIR}\n')
+    print(f'{"variant":28s} {"ms":>9s} {"speedup":>8s} {"frames MB":>10s}')
+    print(f'{"raw files":28s} {raw_time * 1000:9.1f} {1:7.1f}x {megabytes(raw):10.2f}')
+    print(f'{"holdings cache (build)":28s} {build_time * 1000:9.1f} {raw_time / build_time:7.1f}x')
+    print(f'{"holdings cache":28s} {cached_time * 1000:9.1f} {raw_time / cached_time:7.1f}x {megabytes(cached):10.2f}')
+    if mismatches:
+        print(f'\nFAIL: {len(mismatches)} files load differently: {", ".join(mismatches)}')
+        return 1
+    print('\nOK: identical values and attrs for all files')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
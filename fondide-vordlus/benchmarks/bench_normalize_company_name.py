@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: company-name normalization
+=====================================
+Times name_normalizer.normalize_company_name against the original
+uncompiled re.sub chain over every holding name in data/raw/holdings/
+(iShares/SPDR/Xtrackers CSVs + EODHD JSON caches), and checks that both
+produce identical keys.
+
+Usage (from fondide-vordlus/):
+  python benchmarks/bench_normalize_company_name.py [--repeat N]
+"""
+
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE))
+
+from name_normalizer import _COMPANY_ALIASES, normalize_company_name, normalize_names
+
+HOLDINGS_DIR = BASE / 'data' / 'raw' / 'holdings'
+
+
+def reference_normalize(name):
+    """Original implementation (one uncompiled re.sub per step), kept as the oracle."""
+    if not name:
+        return ''
+    s = name.upper()
+    s = re.sub(r'\([^)]*\)', ' ', s)
+    s = s.replace("'", ' ').replace('’', ' ').replace('&', ' AND ').replace('/', ' ')
+    s = re.sub(r'\bTHE\b', ' ', s)
+    s = re.sub(r'\bCLASS\s+[A-Z]\b', ' ', s)
+    s = re.sub(r'\b[A-Z]\s+SHS\b', ' ', s)
+    s = re.sub(r'\b(INCORPORATED|INC|CORPORATION|CORP|COMPANY|CO|HOLDINGS|HOLDING|'
+               r'GROUP|PLC|LTD|LIMITED|NV|SA|AG|SPA|OYJ|AB|A/S|SE|PL|ADR)\b', ' ', s)
+    s = re.sub(r'\s+[A-Z]\s*$', ' ', s.strip())
+    s = re.sub(r'[^A-Z0-9]+', '', s)
+    return _COMPANY_ALIASES.get(s, s)
+
+
+def load_holding_names():
+    """All holding names (with repeats, as the pipeline sees them) from the holdings caches."""
+    names = []
+    for path in sorted(HOLDINGS_DIR.rglob('*.csv')):
+        rows = list(csv.reader(io.StringIO(path.read_text(encoding='utf-8-sig', errors='replace'))))
+        header_idx = next((i for i, r in enumerate(rows) if r and r[0].strip() in ('Ticker', 'Name')), None)
+        if header_idx is None:
+            continue
+        header = [c.strip() for c in rows[header_idx]]
+        if 'Name' not in header:
+            continue
+        col = header.index('Name')
+        names.extend(r[col].strip() for r in rows[header_idx + 1:] if len(r) > col and r[col].strip())
+    for path in sorted(HOLDINGS_DIR.glob('*_eodhd_holdings.json')):
+        holdings = json.loads(path.read_text()).get('ETF_Data', {}).get('Holdings', {})
+        names.extend(h.get('Name', '') for h in holdings.values() if h.get('Name'))
+    return names
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark company-name normalization')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repeats (best of N)')
+    args = parser.parse_args()
+
+    names = load_holding_names()
+    series = pd.Series(names, dtype=object)
+    print(f'{len(names)} names ({len(set(names))} distinct) from {HOLDINGS_DIR}\n')
+
+    mismatches = [n for n in set(names) if reference_normalize(n) != normalize_company_name(n)]
+    if mismatches:
+        print(f'FAIL: {len(mismatches)} names normalize differently, e.g.:')
+        for n in mismatches[:10]:
+            print(f'  {n!r}: {reference_normalize(n)!r} != {normalize_company_name(n)!r}')
+        sys.exit(1)
+    print('OK: identical keys for all names\n')
+
+    def cold():
+        normalize_company_name.cache_clear()
+        for n in names:
+            normalize_company_name(n)
+
+    def cold_series():
+        normalize_company_name.cache_clear()
+        normalize_names(series)
+
+    results = [
+        ('reference, per name', timed(lambda: [reference_normalize(n) for n in names], args.repeat)),
+        ('reference, Series.apply', timed(lambda: series.apply(reference_normalize), args.repeat)),
+        ('compiled, cold cache', timed(cold, args.repeat)),
+        ('compiled, warm cache', timed(lambda: [normalize_company_name(n) for n in names], args.repeat)),
+        ('normalize_names, cold cache', timed(cold_series, args.repeat)),
+        ('normalize_names, warm cache', timed(lambda: normalize_names(series), args.repeat)),
+    ]
+    base = results[0][1]
+    print(f'{"variant":32s} {"ms":>9s} {"speedup":>8s}')
+    for label, secs in results:
+        print(f'{label:32s} {secs * 1000:9.1f} {base / secs:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
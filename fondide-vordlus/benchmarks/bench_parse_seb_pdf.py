@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SEB investment-report layout extraction
+==================================================
+Times pipeline_shared.parse_seb_pdf against the original implementation
+(quadratic row merging, 31 strategy regexes tried per row, every page
+extracted a second time for its date) on every SEB report PDF in
+'Investeeringute aruanne/' (or the PDFs given), and checks that both return
+identical results.
+
+Usage (from fondide-vordlus/):
+  python benchmarks/bench_parse_seb_pdf.py [PDF ...] [--repeat N]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import pdfplumber
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE))
+
+from pdf_document import clear_documents
+from pipeline_shared import ISIN_RE, REPORT_DIR, parse_seb_pdf
+
+SEB_GLOB = '*/est_S[EI]K*_raport_*.pdf'
+
+
+def reference_parse_seb_pdf(pdf_path):
+    """Original parse_seb_pdf (nested-loop row merge, regex list, extract_text per page), kept as the oracle.
+
+    Uses pdfplumber word extraction with coordinates to match names, ISINs,
+    percentages, and EUR values that appear on the same row (same y-coordinate).
+    Works for both inline and multi-column SEB PDF layouts.
+
+    Returns dict with keys: equity_funds, bonds, stocks, re_funds, pe_funds,
+    bond_funds, deposits_pct, derivatives_pct.
+    Each list contains dicts: {name, isin, weight_pct, value_eur}.
+    """
+    from collections import defaultdict
+
+    # Strategy patterns that mark where the fund name ends
+    _STRATEGY_PATTERNS = [
+        r'\s+Vastutustundlik\b.*',
+        r'\s+Euroopa\s+(pangandussektori|aktsiate|ehituse|ettevõtete|võlakirjade).*',
+        r'\s+USA\s+(tehnoloogia|aktsiate|väikeettevõtete).*',
+        r'\s+Globaalne\b.*',
+        r'\s+Ida-Euroopa\b.*',
+        r'\s+Poola\s+aktsiate.*',
+        r'\s+Jaapani\s+aktsiate.*',
+        r'\s+Eesti,\s+Läti.*',
+        r'\s+Eesti\s+metsafond.*',
+        r'\s+Varajases\b.*',
+        r'\s+arenevate\b.*',
+        r'\s+Šiauliai\b.*',
+        r'\s+Inbank\s+võlakiri.*',
+        r'\s+LHV\s+panga\b.*',
+        r'\s+Luminor\s+panga\b.*',
+        r'\s+IT\s+firma\b.*',
+        r'\s+Bigpank\b.*',
+        r'\s+Coop\s+panga\b.*',
+        r'\s+Eesti\s+Energia\b.*',
+        r'\s+Ignitise\b.*',
+        r'\s+Hepsori\b.*',
+        r'\s+Tallinna\s+Sadama\b.*',
+        r'\s+Leedu\s+energia.*',
+        r'\s+Läti\s+energia.*',
+        r'\s+Läti\s+võrgu.*',
+        r'\s+Saksamaa\b.*',
+        r'\s+Prantsusmaa\b.*',
+        r'\s+Eesti\s+valitsusvõla.*',
+        r'\s+Artea\s+panga\b.*',
+        r'\s+Citadele\s+panga\b.*',
+        r'\s+SEB\s+börsiväliste\b.*',
+    ]
+
+    def _trim_strategy(name):
+        for pat in _STRATEGY_PATTERNS:
+            m = re.search(pat, name)
+            if m and m.start() > 5:
+                return name[:m.start()].strip()
+        return name
+
+    def _clean_name(name):
+        name = re.sub(r'[¹²³]+', '', name).strip()
+        name = re.sub(r'\s+(Eesti|Leedu|Läti|Iirimaa|Rootsi|Saksamaa|Luksemburg|'
+                      r'Hispaania|Prantsusmaa|Suurbritannia|Artea|Citadele|'
+                      r'LHV|Luminor|IT|Šiauliai)\s*$', '', name)
+        name = re.sub(r'\s+', ' ', name).strip()
+        return name
+
+    def _extract_page(page, y_merge=3):
+        words = page.extract_words(x_tolerance=5, y_tolerance=3,
+                                   keep_blank_chars=False)
+        pw = page.width
+
+        # Group words by y, merging nearby rows
+        raw = defaultdict(list)
+        for w in words:
+            raw[round(w['top'], 1)].append(w)
+        sorted_ys = sorted(raw.keys())
+        merged = {}
+        used = set()
+        for y in sorted_ys:
+            if y in used:
+                continue
+            group = list(raw[y])
+            used.add(y)
+            for y2 in sorted_ys:
+                if y2 not in used and abs(y2 - y) <= y_merge:
+                    group.extend(raw[y2])
+                    used.add(y2)
+            merged[y] = group
+
+        items = []
+        section = None
+
+        for y in sorted(merged.keys()):
+            rw = sorted(merged[y], key=lambda w: w['x0'])
+            full = ' '.join(w['text'] for w in rw)
+
+            # Name from leftmost column
+            nlim = pw * 0.25
+            nwords = [w['text'] for w in rw if w['x0'] < nlim]
+            nraw = ' '.join(nwords).strip()
+
+            # Section detection
+            if 'Fondi liik' in full:
+                if 'Aktsiafond' in full:
+                    section = 'equity_funds'
+                elif 'Kinnisvarafond' in full:
+                    section = 're_funds'
+                elif 'Private Equity' in full:
+                    section = 'pe_funds'
+                elif 'Võlakirjafond' in full:
+                    section = 'bond_funds'
+                continue
+            if 'Väärtpaberi liik' in full:
+                if 'Võlakiri' in full:
+                    section = 'bonds'
+                elif 'Aktsia' in full:
+                    section = 'stocks'
+                continue
+            if nraw.startswith(('Hoiused', 'Tuletisinstrumendid')):
+                section = 'other'
+                continue
+            if 'puhasväärtus' in nraw or 'Muu vara' in nraw:
+                section = 'other'
+                continue
+            if nraw.startswith('Fondiosakud') or 'Fondi osaku' in nraw:
+                continue
+            if not section or section == 'other':
+                continue
+
+            # Percentage
+            pct = None
+            for w in reversed(rw):
+                m = re.match(r'^(-?\d+[\.,]\d+)%$', w['text'])
+                if m:
+                    pct = float(m.group(1).replace(',', '.'))
+                    break
+            if pct is None or pct <= 0 or pct >= 100:
+                continue
+
+            # ISIN
+            isin = None
+            for w in rw:
+                if w['x0'] > pw * 0.4:
+                    cl = w['text'].replace(' ', '')
+                    m = ISIN_RE.search(cl)
+                    if m:
+                        isin = m.group(0)
+                        break
+
+            # EUR market value (column at ~89-95% of page width)
+            # SEB PDFs format values as space-separated 3-digit groups
+            # (e.g. "9 580 480"). Occasionally pdfplumber merges a trailing
+            # digit from an adjacent column, producing 4-digit groups like
+            # "7080" instead of "708". Cap each word at 3 digits to fix.
+            mlo, mhi = pw * 0.89, pw * 0.95
+            vw = [w for w in rw if mlo < w['x0'] < mhi
+                  and re.match(r'^[\d\s]+$', w['text'])]
+            eur = None
+            if vw:
+                parts = []
+                for w in vw:
+                    d = re.sub(r'\s', '', w['text'])
+                    if len(d) > 3 and len(parts) > 0:
+                        d = d[:3]  # trim spurious trailing digit
+                    parts.append(d)
+                vd = ''.join(parts)
+                if vd.isdigit() and len(vd) >= 3:
+                    eur = int(vd)
+
+            # Clean name
+            name = _trim_strategy(_clean_name(nraw))
+            name = _clean_name(name)
+            if not name or len(name) < 3:
+                continue
+            if any(name.startswith(s) for s in
+                   ['Reguleeritud', 'Taristui', 'Investeering Fondi', 'Emitendi']):
+                continue
+            if re.match(r'^[\d\s,\.]+$', name):
+                continue
+
+            items.append({
+                'name': name, 'isin': isin,
+                'weight_pct': pct, 'value_eur': eur,
+                'section': section,
+            })
+        return items
+
+    # Parse current-month pages only
+    with pdfplumber.open(pdf_path) as pdf:
+        if len(pdf.pages) < 2:
+            return {}
+        p2 = pdf.pages[1].extract_text() or ''
+        dates = re.findall(r'seisuga (\d{2}\.\d{2}\.\d{4})', p2)
+        cur_date = dates[0] if dates else ''
+
+        all_items = []
+        for pi in range(1, len(pdf.pages)):
+            pt = pdf.pages[pi].extract_text() or ''
+            d = re.findall(r'seisuga (\d{2}\.\d{2}\.\d{4})', pt)
+            if d and d[0] != cur_date and pi > 1:
+                break
+            all_items.extend(_extract_page(pdf.pages[pi]))
+
+    # Group by section
+    result = {
+        'equity_funds': [], 'stocks': [], 'bonds': [],
+        'bond_funds': [], 'pe_funds': [], 're_funds': [],
+        'deposits_pct': 0.0, 'derivatives_pct': 0.0,
+    }
+    for item in all_items:
+        sect = item['section']
+        entry = {'name': item['name'], 'weight_pct': item['weight_pct']}
+        if item.get('isin'):
+            entry['isin'] = item['isin']
+        if item.get('value_eur'):
+            entry['value_eur'] = item['value_eur']
+        result[sect].append(entry)
+
+    return result
+
+
+def fresh_parse_seb_pdf(pdf_path):
+    """parse_seb_pdf without memoised page extractions from an earlier run."""
+    clear_documents()
+    return parse_seb_pdf(pdf_path)
+
+
+def best_of(func, path, repeat):
+    """(result, best wall time in seconds) of func(path) over repeat runs."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = func(path)
+        best = min(best, time.perf_counter() - t)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('pdfs', nargs='*', type=Path,
+                        help=f'SEB report PDFs (default: {REPORT_DIR}/{SEB_GLOB})')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or sorted((BASE / REPORT_DIR).glob(SEB_GLOB))
+    if not pdfs:
+        print(f'No SEB PDFs found under {BASE / REPORT_DIR}; pass PDF paths as arguments.')
+        return 1
+
+    total_old = total_new = 0.0
+    mismatches = 0
+    print(f'{"PDF":40s} {"pages":>5s} {"rows":>5s} {"original":>10s} {"new":>10s} {"speedup":>8s}')
+    for path in pdfs:
+        with pdfplumber.open(path) as pdf:
+            n_pages = len(pdf.pages)
+        old, t_old = best_of(reference_parse_seb_pdf, path, args.repeat)
+        new, t_new = best_of(fresh_parse_seb_pdf, path, args.repeat)
+        n_rows = sum(len(v) for v in new.values() if isinstance(v, list))
+        same = old == new
+        mismatches += not same
+        total_old += t_old
+        total_new += t_new
+        flag = '' if same else '  MISMATCH'
+        print(f'{path.name[:40]:40s} {n_pages:5d} {n_rows:5d} {t_old * 1000:8.1f}ms {t_new * 1000:8.1f}ms '
+              f'{t_old / t_new:7.2f}x{flag}')
+
+    print(f'\n{len(pdfs)} PDFs: original {total_old:.2f}s, new {total_new:.2f}s '
+          f'({total_old / total_new:.2f}x), {"identical output" if not mismatches else f"{mismatches} MISMATCHES"}')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF page backends (pdfminer vs pdfplumber)
+=====================================================
+Parses every fund's report PDF for a month with each pdf_document backend,
+through the same parse_fund() call the pipeline makes, and checks that both
+backends give identical parses. Reports time and pages per second per fund
+and overall. Monthly-JSON allocations are ignored: every fund with a PDF is
+parsed from it. The PDF text cache is off and documents are forgotten before
+every run, so each timing starts from the raw PDF.
+
+Usage (from fondide-vordlus/):
+  python benchmarks/bench_pdf_backends.py [--month YYYY-MM] [--repeat N] [FUND=PDF ...]
+
+FUND=PDF pairs (e.g. "Swedbank K1960=report.pdf") parse the given
+PDFs as those funds instead of the month's reports.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE))
+
+from export_fund_data import FUND_REGISTRY, _resolve_pdf_path, parse_fund
+from pdf_document import (
+    BACKENDS,
+    clear_documents,
+    open_document,
+    set_document_backend,
+    set_document_cache,
+)
+from pipeline_shared import load_monthly_config
+
+
+def fresh_parse(backend, fund_key, provider, fund_type, month, pdf_path):
+    """parse_fund from the raw PDF with backend (no memoised pages), its printed output discarded."""
+    clear_documents()
+    set_document_backend(backend)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parse_fund(fund_key, provider, fund_type, month, pdf_path)
+
+
+def best_of(fn, args, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t)
+    return result, best
+
+
+def month_jobs(month):
+    """(fund_key, provider, fund_type, pdf_path) of every fund whose report PDF for month is on disk."""
+    reports_cfg, _ = load_monthly_config(month)
+    jobs = []
+    for fund_key, _, provider, fund_type, _, pdf_code in FUND_REGISTRY:
+        pdf_path = _resolve_pdf_path(fund_key, provider, pdf_code, month, reports_cfg)
+        if pdf_path is not None and pdf_path.exists():
+            jobs.append((fund_key, provider, fund_type, pdf_path))
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('pairs', nargs='*', metavar='FUND=PDF',
+                        help='Parse these PDFs as these funds (default: the month\'s reports)')
+    parser.add_argument('--month', default=None, help='Report month (default: latest in data/monthly/)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    os.chdir(BASE)   # REPORT_DIR and data/monthly/ are relative to fondide-vordlus/
+    months = sorted(p.stem for p in Path('data/monthly').glob('*.json'))
+    month = args.month or (months[-1] if months else None)
+    registry = {fund_key: (provider, fund_type) for fund_key, _, provider, fund_type, _, _ in FUND_REGISTRY}
+    if args.pairs:
+        jobs = []
+        for pair in args.pairs:
+            fund_key, _, pdf = pair.partition('=')
+            if fund_key not in registry or not pdf:
+                parser.error(f'{pair!r}: expected FUND=PDF with FUND one of: {", ".join(registry)}')
+            jobs.append((fund_key, *registry[fund_key], Path(pdf).resolve()))
+    else:
+        jobs = month_jobs(month) if month else []
+    if not jobs:
+        print(f'No report PDFs found for {month} under {BASE}; pass FUND=PDF pairs as arguments.')
+        return 1
+
+    set_document_cache(None)
+    names = sorted(BACKENDS)   # pdfminer, pdfplumber
+    totals = dict.fromkeys(names, 0.0)
+    total_pages = mismatches = 0
+    print(f'{"Fund":28s} {"pages":>5s} ' + ' '.join(f'{n:>12s} {"pages/s":>8s}' for n in names) + f' {"speedup":>8s}')
+    for fund_key, provider, fund_type, pdf_path in jobs:
+        with open_document(pdf_path) as doc:
+            n_pages = len(doc)
+        parsed, times = {}, {}
+        for name in names:
+            parsed[name], times[name] = best_of(fresh_parse, (name, fund_key, provider, fund_type, month, pdf_path),
+                                                args.repeat)
+            totals[name] += times[name]
+        same = parsed['pdfminer'] == parsed['pdfplumber']
+        mismatches += not same
+        total_pages += n_pages
+        flag = '' if same else '  MISMATCH'
+        print(f'{fund_key[:28]:28s} {n_pages:5d} '
+              + ' '.join(f'{times[n] * 1000:10.1f}ms {n_pages / times[n]:8.1f}' for n in names)
+              + f' {times["pdfplumber"] / times["pdfminer"]:7.2f}x{flag}')
+
+    print(f'\n{len(jobs)} PDFs, {total_pages} pages: '
+          + ', '.join(f'{n} {totals[n]:.2f}s ({total_pages / totals[n]:.1f} pages/s)' for n in names)
+          + f'; {"identical parses" if not mismatches else f"{mismatches} MISMATCHES"}')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
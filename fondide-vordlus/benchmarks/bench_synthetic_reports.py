@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: report parsers on synthetic PDFs, checked against ground truth
+=========================================================================
+Generates Tuleva, Swedbank, LHV and SEB style reports with
+benchmarks/synthetic_reports.py at each scale (1x = a typical month, 10x and
+100x that many holdings and pages), parses them with the pipeline_shared
+parsers and compares every parse with the generator's ground truth. Reports
+time, pages per second and holdings per second per report; exits 1 if any
+parse differs, printing the first difference. The PDF text cache is off and
+documents are forgotten before every run, so each timing starts from the raw
+PDF. Needs no report PDFs, so it also runs in CI.
+
+Usage (from fondide-vordlus/):
+  python benchmarks/bench_synthetic_reports.py [--scales 1 10 100] [--provider P ...]
+      [--repeat N] [--seed S] [--backend pdfminer|pdfplumber] [--keep DIR]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE))
+
+from synthetic_reports import PROVIDERS, generate, holding_count
+
+import pipeline_shared
+from pdf_document import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    clear_documents,
+    open_document,
+    set_document_backend,
+    set_document_cache,
+)
+
+
+def first_difference(parsed, expected, path='result'):
+    """Where parsed first differs from expected, or None."""
+    if type(parsed) is not type(expected):
+        return f'{path}: {parsed!r} != {expected!r}'
+    if isinstance(parsed, dict):
+        for key in list(expected) + [k for k in parsed if k not in expected]:
+            if key not in parsed or key not in expected:
+                return f'{path}[{key!r}]: {"missing" if key not in parsed else "unexpected"}'
+            diff = first_difference(parsed[key], expected[key], f'{path}[{key!r}]')
+            if diff:
+                return diff
+    elif isinstance(parsed, list):
+        for i, (p, e) in enumerate(zip(parsed, expected)):
+            diff = first_difference(p, e, f'{path}[{i}]')
+            if diff:
+                return diff
+        if len(parsed) != len(expected):
+            return f'{path}: {len(parsed)} entries, expected {len(expected)}'
+    elif parsed != expected:
+        return f'{path}: {parsed!r} != {expected!r}'
+    return None
+
+
+def fresh_parse(parse, pdf_path):
+    """parse(pdf_path) from the raw PDF (no memoised pages), its printed output discarded."""
+    clear_documents()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parse(pdf_path)
+
+
+def best_of(fn, args, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--provider', action='append', choices=sorted(PROVIDERS),
+                        help='Provider to run (repeatable; default: all)')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument('--keep', type=Path, default=None, help='Write the PDFs here instead of a temp dir')
+    args = parser.parse_args()
+
+    set_document_cache(None)
+    set_document_backend(args.backend)
+    providers = args.provider or list(PROVIDERS)
+    mismatches = total_pages = total_holdings = 0
+    total_time = 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = args.keep or Path(tmp)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        print(f'{"Report":16s} {"pages":>5s} {"holdings":>8s} {"time":>10s} {"pages/s":>8s} {"holdings/s":>10s}')
+        for scale in args.scales:
+            for provider in providers:
+                pdf_path = out_dir / f'{provider}_{scale}x.pdf'
+                expected = generate(provider, pdf_path, scale, args.seed)
+                with open_document(pdf_path) as doc:
+                    n_pages = len(doc)
+                parse = getattr(pipeline_shared, PROVIDERS[provider][1])
+                parsed, t = best_of(fresh_parse, (parse, pdf_path), args.repeat)
+                diff = first_difference(parsed, expected)
+                mismatches += diff is not None
+                n_holdings = holding_count(expected)
+                total_pages += n_pages
+                total_holdings += n_holdings
+                total_time += t
+                print(f'{f"{provider} {scale}x":16s} {n_pages:5d} {n_holdings:8d} {t * 1000:8.1f}ms '
+                      f'{n_pages / t:8.1f} {n_holdings / t:10.0f}' + (f'  MISMATCH {diff}' if diff else ''))
+
+    print(f'\n{total_pages} pages, {total_holdings} holdings in {total_time:.2f}s '
+          f'({total_pages / total_time:.1f} pages/s, {total_holdings / total_time:.0f} holdings/s, {args.backend}); '
+          f'{"all parses match the ground truth" if not mismatches else f"{mismatches} MISMATCHES"}')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Synthetic investment-report PDFs for parser benchmarks and checks
+=================================================================
+The real reports in 'Investeeringute aruanne/' are not in the repo, so
+parser speed and correctness could only be checked by hand. This writes
+Tuleva, Swedbank, LHV and SEB style reports with the section headers,
+continuation pages, column layouts and number formats the parsers in
+pipeline_shared read, filled with made-up holdings, and returns what the
+parser should make of each: the ground truth, in the parser's own output
+format.
+
+Sizes scale from a typical month (scale=1: a few pages, 10-100 holdings)
+by multiplying every section's holding count; pages follow. Tuleva reads
+only page 1, so its single page grows taller instead.
+
+PDFs are written directly (Helvetica, WinAnsi text, one string per text
+line or table cell), without a PDF library.
+
+Usage (from fondide-vordlus/):
+  python benchmarks/synthetic_reports.py OUT_DIR [--scale N] [--seed S] [--provider P ...]
+writes OUT_DIR/<provider>_<N>x.pdf with its ground truth in <provider>_<N>x.json.
+"""
+
+import argparse
+import json
+import random
+import sys
+import zlib
+from pathlib import Path
+
+PAGE_SIZE = (842, 595)   # A4 landscape, points
+MARGIN = 36
+LEADING = 10             # points between text lines / table rows
+FONT_SIZE = 7
+
+# Holdings per section at scale 1
+TULEVA_FUNDS = 8
+TULEVA_BOND_FUNDS = 4
+SWEDBANK_SECTIONS = {'stocks': 40, 'bonds': 30, 'equity_funds': 20, 're_funds': 4, 'pe_funds': 5, 'bond_funds': 6}
+LHV_SECTIONS = {'bonds': 25, 'stocks': 30, 'etfs': 12, 'pe': 6, 're': 4}
+SEB_SECTIONS = {'equity_funds': 30, 'bond_funds': 4, 're_funds': 3, 'pe_funds': 3, 'bonds': 10, 'stocks': 10}
+
+# LHV prints Estonian country names; the parser reports them in English
+LHV_COUNTRIES = {'Eesti': 'Estonia', 'Leedu': 'Lithuania', 'Läti': 'Latvia', 'Soome': 'Finland',
+                 'Rootsi': 'Sweden', 'Saksamaa': 'Germany', 'Prantsusmaa': 'France', 'USA': 'United States'}
+
+_SYLLABLES = ['ka', 'lo', 'ri', 'ven', 'tor', 'mi', 'sel', 'da', 'vik', 'ran', 'te', 'bu', 'fi', 'gar',
+              'hel', 'jo', 'lin', 'mar', 'pe', 'sto', 'ul', 'ze', 'nu', 'bo']
+# Made-up names must not contain words the parsers react to (country names,
+# section and column header words, strategy and manager names)
+_RESERVED = ['kokku', 'fond', 'usa', 'eesti', 'leedu', 'läti', 'soome', 'rootsi', 'saksa', 'prantsus',
+             'holland', 'norra', 'taani', 'kanada', 'jersey', 'bermuda', 'hispaania', 'iirimaa', 'venemaa',
+             'suurbritannia', 'luksemburg', 'kaimanisaared', 'šveits', 'nimetus', 'maksumus', 'tootlus',
+             'intress', 'reiting', 'valuuta', 'alusvara', 'keskmine', 'lhv', 'luminor', 'artea', 'citadele',
+             'hoius', 'aktsia', 'globaalne', 'euroopa', 'varajases', 'arenevate', 'bigpank', 'hepsori',
+             'ignitise', 'inbank', 'coop', 'blackrock', 'baltcap', 'usaldus', 'emitent', 'ühikule']
+_FUND_WORDS = ['Index', 'Select', 'Growth', 'Value', 'Core']
+_STOCK_SUFFIXES = ['AS', 'AB', 'PLC', 'Inc', 'Corp', 'SE']
+
+
+# ── PDF writer ──
+
+def _pdf_string(text):
+    return b'(' + text.encode('cp1252').replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def write_pdf(path, pages):
+    """Write pages [(width, height, [(x, top, size, text)])] as a PDF (top measured from the page top)."""
+    objects = [b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>']
+    contents = []
+    for width, height, items in pages:
+        stream = zlib.compress(b'\n'.join(b'BT /F1 %d Tf %.2f %.2f Td %s Tj ET' % (size, x, height - top - size,
+                                                                                  _pdf_string(text))
+                                          for x, top, size, text in items))
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream))
+        contents.append(len(objects))
+    pages_id = len(objects) + len(pages) + 1
+    kids = []
+    for (width, height, _), content in zip(pages, contents):
+        objects.append(b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R '
+                       b'/Resources << /Font << /F1 1 0 R >> >> >>' % (pages_id, width, height, content))
+        kids.append(len(objects))
+    objects.append(b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % k for k in kids), len(kids)))
+    objects.append(b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id)
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (i, obj)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % o for o in offsets)
+    out += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, len(objects), xref)
+    Path(path).write_bytes(bytes(out))
+
+
+# ── Made-up holdings ──
+
+class Holdings:
+    """Random names, ISINs, weights and values (weights in basis points, values in EUR)."""
+
+    def __init__(self, rnd):
+        self.rnd = rnd
+        self.isins = set()
+
+    def name(self, words=2):
+        while True:
+            name = ' '.join(''.join(self.rnd.choice(_SYLLABLES) for _ in range(self.rnd.randint(2, 3))).capitalize()
+                            for _ in range(words))
+            if not any(r in name.lower() for r in _RESERVED):
+                return name
+
+    def fund_name(self):
+        return f'{self.name(2)} {self.rnd.choice(_FUND_WORDS)}'
+
+    def isin(self, country):
+        while True:
+            isin = country + ''.join(self.rnd.choice('0123456789') for _ in range(10))
+            if isin not in self.isins:
+                self.isins.add(isin)
+                return isin
+
+    def bp(self, high=900):
+        return self.rnd.randint(1, high)
+
+    def value(self):
+        return self.rnd.randrange(1_000, 50_000_000)
+
+    def quantity_price(self, decimal=','):
+        """Quantity and unit price columns (prices under 100, as 3-digit groups would merge with the quantity)."""
+        return f'{group(self.rnd.randrange(1, 999_999))} {self.rnd.randrange(1, 99)}{decimal}{self.rnd.randrange(100):02d}'
+
+
+def group(n):
+    """1234567 → '1 234 567'."""
+    return f'{n:,}'.replace(',', ' ')
+
+
+def pct(bp, decimal=','):
+    """Basis points → '1,23%'."""
+    sign = '-' if bp < 0 else ''
+    return f'{sign}{abs(bp) // 100}{decimal}{abs(bp) % 100:02d}%'
+
+
+def pct_value(bp):
+    """Basis points → the float a parser reads from pct(bp)."""
+    return float(pct(bp, '.')[:-1])
+
+
+# ── Text-line reports (Tuleva, Swedbank, LHV) ──
+
+class TextPages:
+    """Report lines, one string per line, flowed over pages that each open with header.
+
+    repeat: lines printed after the header when a page breaks, e.g. a
+    section's '(järg)' continuation header.
+    """
+
+    def __init__(self, header, single_page=False):
+        self.header = header
+        self.single_page = single_page
+        self.repeat = []
+        self.pages = []
+        self.capacity = (PAGE_SIZE[1] - 2 * MARGIN) // LEADING
+
+    def add(self, text):
+        if not self.pages or (not self.single_page and len(self.pages[-1]) >= self.capacity):
+            self.pages.append(self.header + self.repeat)
+        self.pages[-1].append(text)
+
+    def layout(self):
+        pages = []
+        for lines in self.pages:
+            height = PAGE_SIZE[1] if not self.single_page else max(PAGE_SIZE[1], 2 * MARGIN + LEADING * len(lines))
+            pages.append((PAGE_SIZE[0], height, [(MARGIN, MARGIN + LEADING * i, FONT_SIZE, text)
+                                                 for i, text in enumerate(lines)]))
+        return pages
+
+
+def _deposits_line(label, h, decimal=','):
+    """'HOIUSED KOKKU <cost> <value> <weight> <change>' (cost = value) → (line, value, bp)."""
+    value, bp = h.value(), h.bp(500)
+    return f'{label} {group(value)} {group(value)} {pct(bp, decimal)} {pct(h.bp(50), decimal)}', value, bp
+
+
+def tuleva(scale, h, bond=False):
+    """Tuleva (equity or bond fund) report: one page, BlackRock funds with the manager after the name."""
+    section, key, n = ('Võlakirjafondid', 'bond_funds', TULEVA_BOND_FUNDS) if bond else \
+        ('Aktsiafondid', 'equity_funds', TULEVA_FUNDS)
+    doc = TextPages(['Tuleva Pensionifond investeeringute aruanne seisuga 28.02.2026',
+                     'Nimetus Fondivalitseja ISIN Valuuta Kogus Hind Turuväärtus Osakaal'], single_page=True)
+    doc.add(section)
+    entries, total_bp, total_value = [], 0, 0
+    for _ in range(n * scale):
+        name, isin, bp, value = h.fund_name(), h.isin('IE'), h.bp(), h.value()
+        manager = 'Blackrock Luxembourg SA' if bond and h.rnd.random() < 0.3 else 'BlackRock Asset Management Ireland Ltd'
+        doc.add(f'{name} {manager} {isin} EUR {h.quantity_price()} {group(value)} {pct(bp)}')
+        entries.append({'name': name, 'isin': isin, 'weight_pct': pct_value(bp), 'value_eur': value})
+        total_bp += bp
+        total_value += value
+    doc.add(f'{section} kokku {group(total_value)} {pct(total_bp)}')
+    line, deposit, deposit_bp = _deposits_line('HOIUSED KOKKU', h)
+    doc.add(line)
+    expected = {
+        key if bond else 'allocations': entries,
+        'deposits_pct': pct_value(deposit_bp) if bond else 0.07,
+        '_pdf_subtotals': {key: pct_value(total_bp)},
+        '_pdf_holding_counts': {key: len(entries)},
+        '_total_value_eur': total_value + deposit,
+    }
+    return doc.layout(), expected
+
+
+def tuleva_bond(scale, h):
+    return tuleva(scale, h, bond=True)
+
+
+def swedbank(scale, h):
+    """Swedbank K-series report: AKTSIAD / VÕLAKIRJAD / FONDIOSAKUD with fund subsections, 'KOKKU' subtotals."""
+    doc = TextPages(['Swedbank Pensionifond K1990 investeeringute aruanne seisuga 28.02.2026',
+                     'Nimetus Emitent ISIN Riik Valuuta Kogus Hind Turuväärtus Osakaal puhasväärtusest'])
+    expected = {key: [] for key in ('stocks', 'bonds', 'equity_funds', 'bond_funds', 'pe_funds', 're_funds')}
+    subtotals, total_value = {}, 0
+
+    def rows(key, n, make):
+        nonlocal total_value
+        total_bp = section_value = 0
+        for _ in range(n * scale):
+            line, entry, bp, value = make()
+            doc.add(line)
+            expected[key].append(entry)
+            total_bp += bp
+            section_value += value
+        subtotals[key] = pct_value(total_bp)
+        total_value += section_value
+        return f'{group(section_value)} {pct(total_bp)}'
+
+    def stock():
+        name, isin, bp, value = h.name(h.rnd.randint(1, 3)), h.isin('US'), h.bp(), h.value()
+        line = (f'{name} {name} {h.rnd.choice(_STOCK_SUFFIXES)} {isin} US USD {h.quantity_price()} '
+                f'{group(value)} {pct(bp)}')
+        return line, {'name': name, 'isin': isin, 'country': 'US', 'weight_pct': pct_value(bp), 'value_eur': value}, \
+            bp, value
+
+    def bond():
+        name, isin, bp, value = f'{h.name(2)} {h.rnd.randint(1, 9)}% 2030', h.isin('XS'), h.bp(), h.value()
+        line = f'{name} {isin} EUR {h.quantity_price()} {group(value)} {pct(bp)}'
+        return line, {'name': name, 'isin': isin, 'weight_pct': pct_value(bp), 'value_eur': value}, bp, value
+
+    def fund(with_isin=True):
+        name, bp, value = h.fund_name(), h.bp(), h.value()
+        entry = {'name': name, 'weight_pct': pct_value(bp)}
+        if with_isin:
+            entry['isin'] = h.isin('LU')
+            line = f'{name} {entry["isin"]} LU EUR {h.quantity_price()} {group(value)} {pct(bp)}'
+        else:   # private equity: no ISIN, the name runs into the country and currency columns
+            line = f'{name} EE EUR {h.quantity_price()} {group(value)} {pct(bp)}'
+        entry['value_eur'] = value
+        return line, entry, bp, value
+
+    doc.add('AKTSIAD')
+    doc.repeat = ['AKTSIAD (järg)']
+    totals = rows('stocks', SWEDBANK_SECTIONS['stocks'], stock)
+    doc.repeat = []
+    doc.add(f'AKTSIAD KOKKU {totals}')
+    doc.add('VÕLAKIRJAD')
+    doc.repeat = ['VÕLAKIRJAD (järg)']
+    totals = rows('bonds', SWEDBANK_SECTIONS['bonds'], bond)
+    doc.repeat = []
+    doc.add(f'VÕLAKIRJAD KOKKU {totals}')
+    doc.add('FONDIOSAKUD')
+    for header, key in [('Aktsiafondid', 'equity_funds'), ('Kinnisvarafondid', 're_funds'),
+                        ('Private Equity fondid', 'pe_funds'), ('Võlakirjafondid', 'bond_funds')]:
+        doc.add(header)
+        doc.repeat = ['FONDIOSAKUD (järg)', header]
+        totals = rows(key, SWEDBANK_SECTIONS[key], lambda key=key: fund(with_isin=key != 'pe_funds'))
+        doc.repeat = ['FONDIOSAKUD (järg)']
+        doc.add(f'{header} kokku {totals}')
+    doc.repeat = []
+    doc.add('FONDIOSAKUD KOKKU')
+    line, deposit, deposit_bp = _deposits_line('HOIUSED KOKKU', h)
+    doc.add(line)
+    derivatives_bp = -h.bp(50)
+    doc.add(f'TULETISINSTRUMENDID KOKKU {pct(derivatives_bp)}')
+
+    expected.update({
+        'deposits_pct': pct_value(deposit_bp), 'derivatives_pct': pct_value(derivatives_bp),
+        '_pdf_subtotals': subtotals,
+        '_pdf_holding_counts': {key: len(expected[key]) for key in subtotals},
+        '_total_value_eur': total_value + deposit,
+    })
+    return doc.layout(), expected
+
+
+def lhv(scale, h):
+    """LHV report: section headers with holding count and subtotal, rows ending in their weight."""
+    doc = TextPages(['LHV Pensionifond XL investeeringute aruanne seisuga 28.02.2026',
+                     ('Emitent/väärtpaberi nimi Emitendi riik ISIN-kood Valuuta Kogus Turuväärtus '
+                      'Osakaal fondi varade puhas-')])
+    lists = {key: [] for key in LHV_SECTIONS}
+    subtotals, counts, total_value = {}, {}, 0
+    for header, key, subtotal_key in [('Võlainstrumendid', 'bonds', 'bonds'), ('Aktsiad', 'stocks', 'stocks'),
+                                      ('Aktsiafondid', 'etfs', 'equity_funds'),
+                                      ('Erakapitalifondid', 'pe', 'pe_funds'), ('Kinnisvarafondid', 're', 're_funds')]:
+        rows = []
+        for _ in range(LHV_SECTIONS[key] * scale):
+            name, bp, value = (h.name(2) if key in ('bonds', 'stocks') else h.fund_name()), h.bp(), h.value()
+            country = h.rnd.choice(list(LHV_COUNTRIES))
+            if key in ('pe', 're'):   # unlisted funds: no ISIN
+                line = f'{name} {country} EUR {h.quantity_price(".")} {group(value)} {pct(bp, ".")}'
+                entry = {'name': name, 'weight': pct_value(bp), 'type': key, 'value_eur': value}
+            else:
+                isin = h.isin('EE' if country == 'Eesti' else 'XS')
+                line = f'{name} {country} {isin} EUR {h.quantity_price(".")} {group(value)} {pct(bp, ".")}'
+                entry = {'name': name, 'isin': isin, 'weight': pct_value(bp), 'country': LHV_COUNTRIES[country],
+                         'value_eur': value, 'type': key}
+            rows.append((line, entry, bp, value))
+        total_bp = sum(bp for _, _, bp, _ in rows)
+        section_value = sum(value for _, _, _, value in rows)
+        doc.add(f'{header} {len(rows)} {group(section_value)} {pct(total_bp, ".")}')
+        for line, entry, _, _ in rows:
+            doc.add(line)
+            lists[key].append(entry)
+        subtotals[subtotal_key] = pct_value(total_bp)
+        counts[subtotal_key] = len(rows)
+        total_value += section_value
+    derivatives_bp = -h.bp(50)
+    doc.add(f'Tuletisinstrumendid {pct(derivatives_bp, ".")}')
+    deposit, deposit_bp = h.value(), h.bp(500)
+    doc.add(f'2. Hoiused {group(deposit)} {pct(deposit_bp, ".")} {pct(h.bp(500), ".")}')
+    doc.add(f'AS LHV Pank Nõudmiseni hoius EUR {group(deposit)} {pct(deposit_bp, ".")}')   # inside deposits: skipped
+
+    def weight(key):
+        return round(sum(e['weight'] for e in lists[key]), 2)
+
+    asset_classes = {'stocks': weight('stocks'), 'bonds': weight('bonds'), 'etfs': weight('etfs'),
+                     'pe': weight('pe'), 're': weight('re'),
+                     'deposits': round(pct_value(deposit_bp), 2), 'derivatives': round(pct_value(derivatives_bp), 2)}
+    expected = {
+        'holdings': lists['stocks'] + lists['etfs'],
+        'bond_holdings': lists['bonds'],
+        'pe_holdings': lists['pe'],
+        're_holdings': lists['re'],
+        'asset_classes': asset_classes,
+        'deposits_pct': pct_value(deposit_bp),
+        '_pdf_subtotals': subtotals,
+        '_pdf_holding_counts': counts,
+        '_total_value_eur': total_value + deposit,
+    }
+    return doc.layout(), expected
+
+
+# ── Table reports (SEB) ──
+
+def seb(scale, h):
+    """SEB report: a front page, then table pages read by word position (name, ISIN, weight, value columns).
+
+    Every page opens with its 'seisuga' date and the current section's header
+    row; a last page dated the month before must not be read.
+    """
+    width, height = PAGE_SIZE
+    x_isin, x_pct, x_value = width * 0.45, width * 0.80, width * 0.895
+    title = 'SEB Pensionifond investeeringute aruanne seisuga {}'
+    capacity = (height - 2 * MARGIN) // LEADING - 2
+    pages = [(width, height, [(MARGIN, MARGIN, 12, 'SEB Pensionifond')])]
+    rows, section_row = [], None
+
+    def add(cells):
+        nonlocal rows
+        if not rows or len(rows) >= capacity:
+            rows = [[(MARGIN, title.format('28.02.2026'))]] + ([section_row] if section_row else [])
+            pages.append(rows)
+        rows.append(cells)
+
+    expected = {key: [] for key in ('equity_funds', 'stocks', 'bonds', 'bond_funds', 'pe_funds', 're_funds')}
+    for header, key in [('Fondi liik Aktsiafond', 'equity_funds'), ('Fondi liik Võlakirjafond', 'bond_funds'),
+                        ('Fondi liik Kinnisvarafond', 're_funds'), ('Fondi liik Private Equity', 'pe_funds'),
+                        ('Väärtpaberi liik Võlakiri', 'bonds'), ('Väärtpaberi liik Aktsia', 'stocks')]:
+        section_row = [(MARGIN, header)]
+        add(section_row)
+        for _ in range(SEB_SECTIONS[key] * scale):
+            name = h.fund_name() if key.endswith('funds') else h.name(2)
+            bp, value = h.bp(), h.value()
+            entry = {'name': name, 'weight_pct': pct_value(bp)}
+            cells = [(MARGIN, name), (x_pct, pct(bp)), (x_value, group(value))]
+            if key != 'pe_funds':
+                entry['isin'] = h.isin('IE')
+                cells.append((x_isin, entry['isin']))
+            entry['value_eur'] = value
+            add(cells)
+            expected[key].append(entry)
+    section_row = None
+    add([(MARGIN, 'Hoiused'), (x_pct, pct(h.bp(500)))])
+
+    pages = pages[:1] + [(width, height, [(x, MARGIN + LEADING * i, FONT_SIZE, text)
+                                          for i, cells in enumerate(page) for x, text in cells])
+                         for page in pages[1:]]
+    # Previous month's report appended after the current one
+    pages.append((width, height, [(MARGIN, MARGIN, FONT_SIZE, title.format('31.01.2026')),
+                                  (MARGIN, MARGIN + LEADING, FONT_SIZE, 'Fondi liik Aktsiafond'),
+                                  (MARGIN, MARGIN + 2 * LEADING, FONT_SIZE, h.fund_name()),
+                                  (x_pct, MARGIN + 2 * LEADING, FONT_SIZE, pct(h.bp()))]))
+    expected.update({'deposits_pct': 0.0, 'derivatives_pct': 0.0})
+    return pages, expected
+
+
+# ── Entry points ──
+
+# provider → (generator, pipeline_shared parser that reads it)
+PROVIDERS = {
+    'tuleva': (tuleva, 'parse_tuleva_monthly'),
+    'tuleva_bond': (tuleva_bond, 'parse_tuleva_bond_monthly'),
+    'swedbank': (swedbank, 'parse_swedbank_monthly'),
+    'lhv': (lhv, 'parse_lhv_monthly'),
+    'seb': (seb, 'parse_seb_pdf'),
+}
+
+
+def generate(provider, path, scale=1, seed=0):
+    """Write a synthetic provider report of the given scale to path; return the expected parse."""
+    pages, expected = PROVIDERS[provider][0](scale, Holdings(random.Random(f'{provider}:{scale}:{seed}')))
+    write_pdf(path, pages)
+    return expected
+
+
+def holding_count(expected):
+    """Number of holdings in a ground truth."""
+    return sum(len(v) for v in expected.values() if isinstance(v, list))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('out_dir', type=Path)
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--provider', action='append', choices=sorted(PROVIDERS),
+                        help='Provider to generate (repeatable; default: all)')
+    args = parser.parse_args()
+
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    for provider in args.provider or PROVIDERS:
+        path = args.out_dir / f'{provider}_{args.scale}x.pdf'
+        expected = generate(provider, path, args.scale, args.seed)
+        path.with_suffix('.json').write_text(json.dumps(expected, ensure_ascii=False, indent=1), encoding='utf-8')
+        print(f'{path} ({holding_count(expected)} holdings, parsed by {PROVIDERS[provider][1]})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
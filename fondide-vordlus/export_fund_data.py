@@ -2,30 +2,57 @@
 V2 pipeline: Standardized parsing → validation → universal processing.
 
 Every fund goes through the same three steps:
-  1. parse_fund() → standardized dict (same schema for all 24 funds)
+  1. parse_fund() → standardized dict (same schema for all 24 funds), all funds in a
+     process pool (ParseStage) while the ETF holdings load
   2. validate_parsed_fund() → catches missing keys, weight mismatches, empty arrays
   3. process_fund() → one universal function for ETF lookthrough, stock merging, JSON output
+     (the ETF lookthrough of all funds runs first as one batch: lookthrough_funds())
 
 Imports heavy lifting (ETF loading, lookthrough engine, normalization) from v1.
 """
 import argparse
+import calendar
+import contextlib
+import functools
+import inspect
+import io
 import json
+import os
+import pickle
 import re
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import date
 from pathlib import Path
 
 import pandas as pd
+import pdfplumber
 
+from holders_index import DIRECT_PATH, HOLDERS_DIR, build_holders_index, write_holders_index
+from parse_cache import ParseCache, code_fingerprint, file_sha256
+from pdf_document import BACKENDS, DEFAULT_BACKEND, open_document, set_document_backend, set_document_cache
+from scenarios import parse_what_if
 # Import shared infrastructure (constants, ETF loading, lookthrough engine, etc.)
 from pipeline_shared import (
     _pct, _extract_eur_value,
     ISIN_RE, REPORT_DIR, OUT_DIR, COUNTRY_MAP,
-    ETF_ISIN_TO_CSV, OPAQUE_FUND_ISINS, TRUE_PROXY_ISINS,
-    LUMINOR_ETF_PROXY_MAP, ISHARES_PRODUCTS, EODHD_ETFS, fetch_ishares_holdings, fetch_eodhd_holdings, load_manual_holdings,
-    build_lookthrough, build_acwi, build_ssac_em,
-    normalize_company_name, _build_sector_lookup_with_fuzzy,
-    fund_to_json, build_etf_breakdown,
+    OPAQUE_FUND_ISINS, TRUE_PROXY_ISINS,
+    ISHARES_PRODUCTS, EODHD_ETFS, fetch_ishares_holdings, fetch_eodhd_holdings, load_manual_holdings,
+    archived_holdings,
+    build_lookthrough_batch, lookthrough_breakdown, lookthrough_engine, benchmark_index,
+    set_full_universe,
+    DERIVED_HOLDINGS, build_derived_holdings,
+    norm_keys, issuer_ids, register_holdings_sources, save_security_master, save_lookthrough_cache,
+    _build_sector_lookup_with_fuzzy,
+    _fill_fuzzy_sectors,
+    fund_to_json,
+    build_weight_store, save_exposure_history,
+    build_scenario_model, scenario_model_path,
+    compute_overlap_stats,
     compute_pairwise_correlations,
+    export_weights,
     load_monthly_config,
     fetch_pensionikeskus_aum,
     # Existing parsers (wrapped by v2 parsers)
@@ -36,6 +63,8 @@ from pipeline_shared import (
 
 BASE = Path('.')
 PARSED_DIR = BASE / 'data' / 'parsed'
+PARSE_CACHE_PATH = BASE / 'data' / 'cache' / 'parse_cache.json'
+PDF_TEXT_CACHE_DIR = BASE / 'data' / 'cache' / 'pdf_text'
 
 # ═══════════════════════════════════════════════════════════════════
 # FUND REGISTRY: maps fund_key → parsing + metadata config
@@ -132,25 +161,114 @@ def parse_fund(fund_key, provider, fund_type, month, pdf_path, alloc_cfg_entry=N
     if alloc_cfg_entry is not None:
         return _from_monthly_json(parsed, alloc_cfg_entry)
 
-    # Dispatch by provider
+    return _pdf_parser(fund_key, provider, fund_type)(parsed, pdf_path)
+
+
+def _pdf_parser(fund_key, provider, fund_type):
+    """The _parse_* function that reads this fund's PDF."""
     if provider == 'Tuleva':
-        if fund_type == 'bond':
-            return _parse_tuleva_bond(parsed, pdf_path)
-        return _parse_tuleva(parsed, pdf_path)
+        return _parse_tuleva_bond if fund_type == 'bond' else _parse_tuleva
     elif provider == 'Swedbank':
-        return _parse_swedbank(parsed, pdf_path)
+        return _parse_swedbank
     elif provider == 'LHV':
-        return _parse_lhv(parsed, pdf_path)
+        return _parse_lhv
     elif provider == 'SEB':
-        if fund_key == 'SEB Indeks':
-            return _parse_seb_indeks(parsed, pdf_path)
-        return _parse_seb(parsed, pdf_path)
+        return _parse_seb_indeks if fund_key == 'SEB Indeks' else _parse_seb
     elif provider == 'Luminor':
-        return _parse_luminor(parsed, pdf_path)
+        return _parse_luminor
     else:
         raise ValueError(f"Unknown provider: {provider}")
 
 
+def parser_fingerprint(fund_key, provider, fund_type):
+    """Fingerprint of the code that parses this fund's PDF (parse cache key, see parse_cache.py)."""
+    return _parser_code_fingerprint(_pdf_parser(fund_key, provider, fund_type))
+
+
+@functools.cache
+def _parser_code_fingerprint(pdf_parser):
+    # parse_fund and the dispatch count as text only: following them would reach every provider's parser
+    dispatch = [inspect.getsource(parse_fund), inspect.getsource(_pdf_parser)]
+    return code_fingerprint([_empty_parsed, pdf_parser], extras=dispatch + [f'pdfplumber {pdfplumber.__version__}'])
+
+
+# ── Parallel parsing ──
+
+PARSE_TIMEOUT = 300   # seconds one fund may take to parse before it is reported as an error
+
+
+def _parse_task(args, timeout=None):
+    """parse_fund(*args) with a time limit → (parsed or None, error or None, printed output).
+
+    Runs in a pool worker (or in-process with one worker). Output is captured
+    so the caller can print each fund's log in registry order. The time limit
+    uses SIGALRM, so it applies only on a main thread of a Unix process.
+    """
+    out = io.StringIO()
+    alarm = bool(timeout) and hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+    if alarm:
+        def expired(signum, frame):
+            raise TimeoutError(f'timed out after {timeout:g}s')
+        previous = signal.signal(signal.SIGALRM, expired)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with contextlib.redirect_stdout(out):
+            parsed = parse_fund(*args)
+        return parsed, None, out.getvalue()
+    except Exception as e:  # noqa: BLE001 - any parser failure falls back to the monthly JSON, as before
+        return None, str(e) or type(e).__name__, out.getvalue()
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def _init_parse_worker(pdf_backend, text_cache_dir):
+    """Pool worker setup: main()'s PDF backend and text cache (spawned workers don't inherit them)."""
+    set_document_backend(pdf_backend)
+    set_document_cache(text_cache_dir)
+
+
+class ParseStage:
+    """parse_fund for every fund, started up front and collected in registry order.
+
+    With more than one worker the funds are parsed in a process pool while the
+    caller goes on (loading ETF holdings); results() then waits for each fund
+    in turn. With one worker the funds are parsed in-process as results() asks
+    for them.
+    """
+
+    def __init__(self, jobs, workers=1, timeout=PARSE_TIMEOUT, cached=None,
+                 pdf_backend=DEFAULT_BACKEND, text_cache_dir=None):
+        self.jobs = jobs          # [(fund_key, parse_fund args)]
+        self.timeout = timeout
+        self.cached = cached or {}   # {fund_key: parsed} from the parse cache, not parsed again
+        self.executor = None
+        self.futures = {}
+        pending = [(fund_key, args) for fund_key, args in jobs if fund_key not in self.cached]
+        if workers > 1 and len(pending) > 1:
+            self.executor = ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=_init_parse_worker,
+                                                initargs=(pdf_backend, text_cache_dir))
+            self.futures = {fund_key: self.executor.submit(_parse_task, args, timeout) for fund_key, args in pending}
+
+    def results(self):
+        """Yield (fund_key, parsed or None, error or None, printed output) in job order."""
+        try:
+            for fund_key, args in self.jobs:
+                if fund_key in self.cached:
+                    yield fund_key, self.cached[fund_key], None, '   Parse cache hit (PDF and parser unchanged)\n'
+                elif self.executor is None:
+                    yield (fund_key, *_parse_task(args, self.timeout))
+                else:
+                    try:
+                        yield (fund_key, *self.futures[fund_key].result())
+                    except (BrokenProcessPool, pickle.PicklingError) as e:   # worker died or result not picklable
+                        yield fund_key, None, f'{type(e).__name__}: {e}', ''
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+
+
 def _from_monthly_json(parsed, alloc):
     """Convert monthly JSON allocation entry to standardized format.
 
@@ -333,8 +451,6 @@ def _parse_luminor(parsed, pdf_path):
     - Direct bonds section (Võlakirjad — different column layout with ISIN)
     - Deposits from Arvelduskonto line
     """
-    import pdfplumber
-
     equity_funds = []
     bond_funds = []
     bonds = []
@@ -528,9 +644,8 @@ def _parse_luminor(parsed, pdf_path):
             entry['value_eur'] = value_eur
         return entry
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ''
+    with open_document(pdf_path) as doc:
+        for text in doc.texts():
             for line in text.splitlines():
                 line = line.strip()
                 if not line:
@@ -935,39 +1050,23 @@ def validate_parsed_fund(parsed, prev_parsed=None, pk_aum=None):
 # STEP 4: UNIVERSAL process_fund()
 # ═══════════════════════════════════════════════════════════════════
 
-def process_fund(parsed, etf_holdings, acwi, acwi_keys, sector_lookup, fuzzy_sector_map=None):
-    """Universal fund processor. Works for all 24 funds.
+def _split_equity_funds(parsed, etf_holdings):
+    """Classify equity funds as look-through ETFs, opaque funds or unmapped ETFs.
 
-    Steps:
-    1. ETF lookthrough for equity_funds with ISIN/name mappings
-    2. Build direct stock DataFrame
-    3. Merge lookthrough stocks with direct stocks
-    4. Enrich with sectors from ACWI
-    5. Build fund_to_json output
-    6. Add non-equity holdings (bonds, PE, RE)
-    7. Build weight vectors for correlation
-    8. Build etf_breakdown
+    Returns (lookthrough_allocs, opaque_entries, unmapped_etf_entries).
     """
+    engine = lookthrough_engine(etf_holdings)
     provider = parsed['provider']
-
-    # ── 1. ETF lookthrough ──
-    equity_funds = parsed['equity_funds']
     lookthrough_allocs = []
     opaque_entries = []
     unmapped_etf_entries = []
 
-    for ef in equity_funds:
+    for ef in parsed['equity_funds']:
         isin = ef.get('isin', '')
-        etk = ETF_ISIN_TO_CSV.get(isin) if isin else None
-
-        # Luminor funds don't have ISINs — match by name
-        if not etk and provider == 'Luminor':
-            for pattern, ticker in LUMINOR_ETF_PROXY_MAP.items():
-                if pattern.lower() in ef['name'].lower():
-                    etk = ticker
-                    break
+        # ISIN proxy; Luminor funds don't have ISINs — match by name
+        etk = engine.resolve(isin, name=ef['name'] if provider == 'Luminor' else None)
 
-        if etk and etk in etf_holdings:
+        if etk:
             lookthrough_allocs.append({
                 'name': ef['name'],
                 'isin': isin,
@@ -989,10 +1088,109 @@ def process_fund(parsed, etf_holdings, acwi, acwi_keys, sector_lookup, fuzzy_sec
                 'type': 'etfs',
             })
 
-    lt_df = pd.DataFrame()
-    if lookthrough_allocs:
-        lt_df, lt_opaque = build_lookthrough(lookthrough_allocs, etf_holdings)
-        opaque_entries.extend(lt_opaque)
+    return lookthrough_allocs, opaque_entries, unmapped_etf_entries
+
+
+def lookthrough_funds(parsed_funds, etf_holdings):
+    """ETF look-through for a whole set of parsed funds in one batch.
+
+    parsed_funds: dict of fund_key -> parsed dict
+    Returns dict of fund_key -> {'allocs', 'opaque', 'unmapped', 'stocks',
+    'etf_breakdown', 'node'}, ready to pass to process_fund(lookthrough=...).
+    """
+    split = {key: _split_equity_funds(parsed, etf_holdings) for key, parsed in parsed_funds.items()}
+    batch = build_lookthrough_batch(
+        {key: allocs for key, (allocs, _, _) in split.items() if allocs}, etf_holdings)
+
+    results = {}
+    for key, (allocs, opaque_entries, unmapped_etf_entries) in split.items():
+        lt = batch.get(key)
+        results[key] = {
+            'allocs': allocs,
+            'opaque': opaque_entries + (lt['opaque'] if lt else []),
+            'unmapped': unmapped_etf_entries,
+            'stocks': lt['stocks'] if lt else pd.DataFrame(),
+            'etf_breakdown': lt['etf_breakdown'] if lt else [],
+            'node': key if lt else None,
+        }
+    return results
+
+
+def _print_what_if(model, fund, deltas):
+    """Print one --what-if scenario against the fund's base allocation."""
+    try:
+        result = model.evaluate(fund, deltas=deltas)
+        base = model.evaluate(fund)
+    except ValueError as e:
+        print(f'  WARNING: What-if for {fund} skipped: {e}')
+        return
+    overlap = f'overlap_with_{model.benchmark.lower()}_pct'
+    changes = ', '.join(f'{node} {delta:+g}pp' for node, delta in deltas.items())
+    print(f'\nWhat-if {fund}: {changes}')
+    print('  Allocation: ' + ', '.join(f'{node} {w:.2f}%' for node, w in result['allocation'].items()))
+    print(f'  Overlap with {model.benchmark}: {base[overlap]:.2f}% -> {result[overlap]:.2f}% '
+          f'({result["overlap_change"]:+.2f}pp)')
+    corr = sorted(result['correlations'].items(), key=lambda kv: -abs(kv[1] - base['correlations'][kv[0]]))
+    print('  Correlation: ' + ', '.join(f'{fn} {base["correlations"][fn]:.4f} -> {r:.4f}'
+                                        for fn, r in [kv for kv in corr if kv[0] != fund][:5]))
+    for label in ('sectors', 'countries'):
+        top = list(result[label].items())[:6]
+        print(f'  {label.capitalize()}: ' + (', '.join(f'{k} {v:+.2f}pp' for k, v in top) or 'unchanged'))
+
+
+def _fund_holders(etf_holdings, lookthrough, frame, scale=1.0, direct=None):
+    """One fund's stock contributions by path: DataFrame (key, name, path, weight).
+
+    Look-through contributions come from the fund's node, keyed like frame
+    (stock_id → norm_key); stocks missing from frame (dropped by the ACWI
+    filter) are left out and weights are multiplied by scale, as the fund's
+    own frame was. direct: the fund's own stock rows, with path 'direct'.
+    """
+    parts = []
+    node = lookthrough.get('node')
+    if node and 'stock_id' in frame.columns:
+        lt = lookthrough_engine(etf_holdings).contributions(node)
+        keys = frame.drop_duplicates('stock_id').set_index('stock_id')['norm_key']
+        lt['key'] = lt['stock_id'].map(keys)
+        lt = lt[lt['key'].notna()]
+        lt['weight'] = lt['weight'] * scale
+        parts.append(lt)
+    if direct is not None and not direct.empty:
+        parts.append(direct.assign(key=direct['norm_key'], path=DIRECT_PATH))
+    if not parts:
+        return None
+    df = pd.concat([p[['key', 'name', 'path', 'weight']] for p in parts], ignore_index=True)
+    return df.groupby(['key', 'path'], sort=False, as_index=False).agg(
+        name=('name', 'first'), weight=('weight', 'sum'))
+
+
+def process_fund(parsed, etf_holdings, benchmark, acwi_keys, sector_lookup, sector_matcher=None,
+                 lookthrough=None):
+    """Universal fund processor. Works for all 24 funds.
+
+    Steps:
+    1. ETF lookthrough for equity_funds with ISIN/name mappings
+    2. Build direct stock DataFrame
+    3. Merge lookthrough stocks with direct stocks
+    4. Enrich with sectors from ACWI
+    5. Build fund_to_json output
+    6. Add non-equity holdings (bonds, PE, RE)
+    7. Build weight vectors for correlation
+    8. Build etf_breakdown
+
+    lookthrough: this fund's entry from lookthrough_funds(); computed on the
+    spot when not given.
+    """
+    provider = parsed['provider']
+
+    # ── 1. ETF lookthrough ──
+    equity_funds = parsed['equity_funds']
+    if lookthrough is None:
+        lookthrough = lookthrough_funds({'_': parsed}, etf_holdings)['_']
+    lookthrough_allocs = lookthrough['allocs']
+    opaque_entries = list(lookthrough['opaque'])
+    unmapped_etf_entries = lookthrough['unmapped']
+    lt_df = lookthrough['stocks']
 
     # ── 2. Direct stocks DataFrame ──
     stocks = parsed['stocks']
@@ -1003,19 +1201,11 @@ def process_fund(parsed, etf_holdings, acwi, acwi_keys, sector_lookup, fuzzy_sec
             stock_df['location'] = stock_df['country'].map(COUNTRY_MAP).fillna(stock_df['country'])
         else:
             stock_df['location'] = ''
-        stock_df['norm_key'] = stock_df['name'].apply(normalize_company_name)
+        stock_df['norm_key'] = norm_keys(stock_df['name'])
 
         # Enrich with ACWI sector data
         stock_df['sector'] = stock_df['norm_key'].map(sector_lookup['sector'])
-        if fuzzy_sector_map:
-            for idx in stock_df[stock_df['sector'].isna()].index:
-                nk = stock_df.at[idx, 'norm_key']
-                if len(nk) >= 6:
-                    match = fuzzy_sector_map.get(nk[:6])
-                    if match:
-                        stock_df.at[idx, 'sector'] = match[0]
-                        if not stock_df.at[idx, 'location'] or stock_df.at[idx, 'location'] == stock_df.at[idx, 'country']:
-                            stock_df.at[idx, 'location'] = match[1]
+        _fill_fuzzy_sectors(stock_df, sector_matcher)
         stock_df.loc[stock_df['sector'].isna(), 'sector'] = 'Direct Investment'
 
         if 'stock_id' not in stock_df.columns:
@@ -1026,8 +1216,11 @@ def process_fund(parsed, etf_holdings, acwi, acwi_keys, sector_lookup, fuzzy_sec
         stock_df = pd.DataFrame()
 
     # ── 3. Merge lookthrough + direct stocks ──
+    breakdown = None
+    holders = None
+    sleeve = None
     if not lt_df.empty and not stock_df.empty:
-        lt_df['norm_key'] = lt_df['name'].apply(normalize_company_name)
+        lt_df['norm_key'] = norm_keys(lt_df['name'])
         lt_df['sector'] = lt_df['norm_key'].map(sector_lookup['sector']).fillna('')
         lt_df.loc[lt_df['sector'] == '', 'sector'] = 'Unknown'
 
@@ -1035,14 +1228,18 @@ def process_fund(parsed, etf_holdings, acwi, acwi_keys, sector_lookup, fuzzy_sec
             stock_df[['stock_id', 'ticker', 'name', 'weight', 'sector', 'location', 'norm_key']],
             lt_df[['stock_id', 'ticker', 'name', 'weight', 'sector', 'location', 'norm_key']],
         ], ignore_index=True)
-        df = df.groupby('norm_key', as_index=False).agg({
+        df['issuer_id'] = issuer_ids(df['norm_key'])
+        # Rows stay in key order, so equal weights keep their published order
+        df = df.groupby('issuer_id', as_index=False).agg({
             'stock_id': 'first', 'ticker': 'first', 'name': 'first', 'weight': 'sum',
-            'sector': 'first', 'location': 'first',
-        })
+            'sector': 'first', 'location': 'first', 'norm_key': 'first',
+        }).sort_values('norm_key', ignore_index=True)
+        holders = _fund_holders(etf_holdings, lookthrough, lt_df, direct=stock_df)
+        sleeve = {'filtered': False, 'normalize': False, 'scale': 1.0}
     elif not lt_df.empty:
         df = lt_df.copy()
         if 'norm_key' not in df.columns:
-            df['norm_key'] = df['name'].apply(normalize_company_name)
+            df['norm_key'] = norm_keys(df['name'])
         # Filter to ACWI universe for ETF lookthrough funds (no direct stocks)
         # In v1: process_etf_fund and process_luminor_fund both filter; process_seb_55 does not
         is_pure_etf = (len(stocks) == 0
@@ -1051,33 +1248,45 @@ def process_fund(parsed, etf_holdings, acwi, acwi_keys, sector_lookup, fuzzy_sec
                        and len(parsed['bonds']) == 0
                        and len(parsed['bond_funds']) == 0)
         should_filter_acwi = len(stocks) == 0 and provider not in ('SEB',)
+        filtered_by = None
         if should_filter_acwi:
-            acwi_universe = set(acwi['stock_id'])
-            df_filtered = df[df['stock_id'].isin(acwi_universe)].copy()
+            df_filtered = df[benchmark.holds(df['stock_id'])].copy()
             if not df_filtered.empty:
                 df = df_filtered
+                filtered_by = benchmark
         # Normalize weights
         equity_total = sum(ef['weight_pct'] for ef in equity_funds)
         total_w = df['weight'].sum()
+        scale = 1.0
         if total_w > 0:
             if is_pure_etf:
                 # Pure ETF funds: normalize to 100% (like v1 process_etf_fund)
                 df['weight'] = df['weight'] / total_w * 100
+                scale = 100 / total_w
             else:
                 # Mixed funds: normalize to equity_total (preserves fund intent)
                 df['weight'] = df['weight'] / total_w * equity_total
+                scale = equity_total / total_w
         df['sector'] = df['norm_key'].map(sector_lookup['sector']).fillna(df.get('sector', ''))
         df.loc[df['sector'].isin(['', None]), 'sector'] = 'Unknown'
+        # Sectors/countries from the ETFs' exposure vectors
+        if lookthrough.get('node'):
+            breakdown = lookthrough_breakdown(etf_holdings, lookthrough['node'], df, sector_lookup,
+                                              filtered_by, scale)
+        holders = _fund_holders(etf_holdings, lookthrough, df, scale=scale)
+        sleeve = {'filtered': filtered_by is not None, 'normalize': is_pure_etf and total_w > 0, 'scale': scale}
     elif not stock_df.empty:
         df = stock_df[['stock_id', 'ticker', 'name', 'weight', 'sector', 'location', 'norm_key']].copy()
+        holders = _fund_holders(etf_holdings, lookthrough, df, direct=stock_df)
     else:
         df = pd.DataFrame(columns=['stock_id', 'ticker', 'name', 'weight', 'sector', 'location', 'norm_key'])
 
     df = df.sort_values('weight', ascending=False).reset_index(drop=True) if not df.empty else df
+    if 'issuer_id' not in df.columns:
+        df['issuer_id'] = issuer_ids(df['norm_key'])
 
     # ── 4. Build JSON output ──
-    acwi_nk = acwi.copy()
-    fund_data = fund_to_json(df, parsed['fund_name'], acwi_nk, acwi_keys, sector_lookup)
+    fund_data = fund_to_json(df, parsed['fund_name'], benchmark, acwi_keys, sector_lookup, breakdown)
 
     # ── 5. Asset classes ──
     equity_funds_pct = sum(ef['weight_pct'] for ef in equity_funds)
@@ -1137,7 +1346,7 @@ def process_fund(parsed, etf_holdings, acwi, acwi_keys, sector_lookup, fuzzy_sec
 
     # ── 7. ETF breakdown ──
     if lookthrough_allocs:
-        fund_data['etf_breakdown'] = build_etf_breakdown(lookthrough_allocs, etf_holdings)
+        fund_data['etf_breakdown'] = lookthrough['etf_breakdown']
 
     # Opaque fund info
     if opaque_pct > 0:
@@ -1146,15 +1355,12 @@ def process_fund(parsed, etf_holdings, acwi, acwi_keys, sector_lookup, fuzzy_sec
 
     # ── 8. Weight vectors (for pairwise correlation) ──
     wv = fund_data['_weight_vec']
-    wv_export = fund_data['weights']
     for prefix, holdings in [('BOND', bond_holdings), ('ETF', etf_holdings_list),
                               ('RE', re_holdings), ('PE', pe_holdings)]:
         for h in holdings:
             key = f"{prefix}|{h['name']}"
             w = h.get('weight', h.get('weight_pct', 0))
             wv[key] = w
-            if w > 0.01:
-                wv_export[key] = round(w, 4)
 
     # ── 9. Sectors/countries for non-stock holdings ──
     sectors = fund_data['sectors']
@@ -1180,6 +1386,10 @@ def process_fund(parsed, etf_holdings, acwi, acwi_keys, sector_lookup, fuzzy_sec
     # ── 10. Metadata ──
     fund_data['type'] = parsed['fund_type']
     fund_data['provider'] = parsed['provider']
+    if holders is not None:
+        fund_data['_holders'] = holders
+    if sleeve is not None and lookthrough.get('node'):
+        fund_data['_sleeve'] = {'node': lookthrough['node'], **sleeve}
 
     return fund_data
 
@@ -1394,7 +1604,23 @@ def main():
                         help='Output path for fund_data.json (default: docs/fondide-vordlus/)')
     parser.add_argument('--offline', action='store_true',
                         help='Skip external data fetches (pensionikeskus AUM check)')
+    parser.add_argument('--full-universe', action='store_true',
+                        help='Look through full ETF constituent lists (no SAEM top-N cut); '
+                             'holdings too small to show are folded into other_holdings')
+    parser.add_argument('--what-if', action='append', default=[], type=parse_what_if, metavar='FUND:NODE=DELTA,...',
+                        help='Print a what-if reallocation of a fund, e.g. "Tuleva:SASU=-5,SAEM=+5" '
+                             '(deltas in percentage points; repeatable)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processes parsing fund PDFs in parallel (default: CPU count; 1 = in-process)')
+    parser.add_argument('--parse-timeout', type=float, default=PARSE_TIMEOUT, metavar='SECONDS',
+                        help=f'Give up on a fund whose PDF takes longer to parse (default: {PARSE_TIMEOUT})')
+    parser.add_argument('--force-reparse', action='store_true',
+                        help='Parse every PDF even if the parse cache has it (unchanged PDF and parser)')
+    parser.add_argument('--pdf-backend', choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                        help=f'How PDF pages are read (default: {DEFAULT_BACKEND}; pdfplumber: full page model, '
+                             'same parses, slower)')
     args = parser.parse_args()
+    set_full_universe(args.full_universe)
 
     print('=== V2 Multi-Source Pension Fund Pipeline ===\n')
 
@@ -1407,6 +1633,28 @@ def main():
     alloc_cfg = alloc_cfg or {}
     print(f'Month: {MONTH} ({len(reports_cfg or {})} reports, {len(alloc_cfg)} allocations)\n')
 
+    # Start parsing every fund; the PDFs are parsed while the ETF holdings load.
+    # PDFs parsed before by the same parser code are loaded from data/parsed/ instead.
+    set_document_cache(PDF_TEXT_CACHE_DIR)
+    set_document_backend(args.pdf_backend)
+    parse_cache = ParseCache.load(PARSE_CACHE_PATH, PARSED_DIR)
+    parse_jobs, fund_context, parse_keys, cached = [], {}, {}, {}
+    for fund_key, display_name, provider, fund_type, report_key, pdf_code in FUND_REGISTRY:
+        pdf_path = _resolve_pdf_path(fund_key, provider, pdf_code, MONTH, reports_cfg)
+        alloc_entry = alloc_cfg.get(fund_key)
+        parse_jobs.append((fund_key, (fund_key, provider, fund_type, MONTH, pdf_path, alloc_entry)))
+        fund_context[fund_key] = (provider, fund_type, report_key, pdf_path, alloc_entry)
+        if alloc_entry is None and pdf_path is not None and pdf_path.exists():
+            parse_keys[fund_key] = (file_sha256(pdf_path), parser_fingerprint(fund_key, provider, fund_type))
+            hit = None if args.force_reparse else parse_cache.get(fund_key, MONTH, *parse_keys[fund_key])
+            if hit is not None:
+                cached[fund_key] = hit
+    if parse_keys:
+        print(f'Parse cache: {len(cached)} of {len(parse_keys)} PDFs unchanged'
+              + (' (--force-reparse: parsing all)' if args.force_reparse else '') + '\n')
+    parse_stage = ParseStage(parse_jobs, workers=args.workers, timeout=args.parse_timeout, cached=cached,
+                             pdf_backend=args.pdf_backend, text_cache_dir=PDF_TEXT_CACHE_DIR)
+
     # Fetch pensionikeskus AUM for validation check 3
     pk_aum = {}
     if not args.offline:
@@ -1475,43 +1723,37 @@ def main():
         etf_holdings[tk] = fetch_eodhd_holdings(tk)
     for tk in ['GLOBALFOND_A']:
         etf_holdings[tk] = load_manual_holdings(tk)
-    etf_holdings['SSAC_EM'] = build_ssac_em(etf_holdings)
+    year, mo = map(int, MONTH.split('-'))
+    etf_holdings = archived_holdings(etf_holdings, date(year, mo, calendar.monthrange(year, mo)[1]))
+    for tk in DERIVED_HOLDINGS:
+        etf_holdings[tk] = build_derived_holdings(etf_holdings, tk)
     print(f'  Loaded {len(etf_holdings)} ETF data sources')
+    register_holdings_sources(etf_holdings)
 
     # ── Build ACWI benchmark ──
     print('Building ACWI benchmark...')
-    acwi = build_acwi(etf_holdings)
-    acwi['weight'] = acwi['weight'] / acwi['weight'].sum() * 100
-    acwi['norm_key'] = acwi['name'].apply(normalize_company_name)
-    sector_lookup, fuzzy_sector_map = _build_sector_lookup_with_fuzzy(acwi)
+    benchmark = benchmark_index(etf_holdings, 'ACWI')
+    acwi = benchmark.frame
+    sector_lookup, sector_matcher = _build_sector_lookup_with_fuzzy(acwi)
     acwi_keys = set(acwi['norm_key'])
     print(f'  ACWI: {len(acwi)} stocks\n')
 
     all_funds_data = {}
 
     # ACWI benchmark (internal, not in fund_order)
-    acwi_data = fund_to_json(acwi, 'MSCI ACWI', acwi, acwi_keys, sector_lookup)
+    acwi_data = fund_to_json(acwi, 'MSCI ACWI', benchmark, acwi_keys, sector_lookup)
     acwi_data['type'] = 'benchmark'
     acwi_data['provider'] = 'MSCI'
     acwi_data['asset_classes'] = {'stocks': 100.0}
     all_funds_data['ACWI'] = acwi_data
 
-    # ── Process all funds ──
-    data_sources = {}
-    for i, (fund_key, display_name, provider, fund_type, report_key, pdf_code) in enumerate(FUND_REGISTRY, 1):
+    # ── Parse and validate all funds ──
+    parsed_funds = {}
+    for i, (fund_key, parsed, error, output) in enumerate(parse_stage.results(), 1):
         print(f'{i:2d}. {fund_key}...')
-
-        # Resolve PDF path
-        pdf_path = _resolve_pdf_path(fund_key, provider, pdf_code, MONTH, reports_cfg)
-
-        # Get allocation from monthly JSON if available
-        alloc_entry = alloc_cfg.get(fund_key)
-
-        # Parse
-        try:
-            parsed = parse_fund(fund_key, provider, fund_type, MONTH, pdf_path, alloc_entry)
-        except Exception as e:
-            print(f'   ERROR parsing: {e}')
+        print(output, end='')
+        if error is not None:
+            print(f'   ERROR parsing: {error}')
             continue
 
         # Validate
@@ -1524,12 +1766,29 @@ def main():
 
         # Save parsed
         save_parsed(parsed, MONTH)
+        if fund_key in parse_keys:
+            parse_cache.put(fund_key, MONTH, *parse_keys[fund_key])
+
+        parsed_funds[fund_key] = parsed
+        fund_context[fund_key] += (prev_parsed,)
+
+    parse_cache.save(PARSE_CACHE_PATH)
+
+    # ── ETF look-through for all funds in one batch ──
+    print(f'\nLook-through for {len(parsed_funds)} funds...')
+    lookthroughs = lookthrough_funds(parsed_funds, etf_holdings)
+
+    # ── Process all funds ──
+    data_sources = {}
+    for fund_key, parsed in parsed_funds.items():
+        provider, fund_type, report_key, pdf_path, alloc_entry, prev_parsed = fund_context[fund_key]
 
         # Process
         try:
-            fund_data = process_fund(parsed, etf_holdings, acwi, acwi_keys, sector_lookup, fuzzy_sector_map)
+            fund_data = process_fund(parsed, etf_holdings, benchmark, acwi_keys, sector_lookup, sector_matcher,
+                                     lookthrough=lookthroughs[fund_key])
         except Exception as e:
-            print(f'   ERROR processing: {e}')
+            print(f'   ERROR processing {fund_key}: {e}')
             import traceback
             traceback.print_exc()
             continue
@@ -1538,7 +1797,7 @@ def main():
             all_funds_data[fund_key] = fund_data
             n = fund_data['n_stocks']
             src = 'JSON' if alloc_entry else (pdf_path.name if pdf_path else '?')
-            print(f'   => {n} stocks (from {src})')
+            print(f'   {fund_key} => {n} stocks (from {src})')
 
             # Compute top changes (month-over-month)
             _ensure_eur_values(parsed, pk_aum)
@@ -1571,40 +1830,39 @@ def main():
     for fn in fund_order:
         fd = all_funds_data[fn]
         print(f'  {fn:25s} {fd["n_stocks"]:5d} stocks  {fd["total_weight"]:6.1f}% weight')
+    folded = [fd['other_holdings'] for fd in all_funds_data.values() if 'other_holdings' in fd]
+    if folded:
+        print(f'  Full universe: {sum(o["n_stocks"] for o in folded)} holdings in {len(folded)} funds '
+              f'folded into other_holdings (max {max(o["weight"] for o in folded):.3f}% of a fund)')
+
+    store = build_weight_store(all_funds_data)
+    save_exposure_history(store, MONTH)
+
+    holders = {fn: fd.pop('_holders') for fn, fd in all_funds_data.items() if '_holders' in fd}
+    meta = write_holders_index(build_holders_index(holders), out_dir / HOLDERS_DIR, MONTH)
+    print(f'Holders index: {sum(meta["shards"].values())} stock entries in {len(meta["shards"])} shards '
+          f'({out_dir / HOLDERS_DIR})')
+
+    sleeves = {fn: fd.pop('_sleeve') for fn, fd in all_funds_data.items() if '_sleeve' in fd}
+    scenarios = build_scenario_model(etf_holdings, store, sleeves, sector_lookup, benchmark)
+    scenario_path = scenario_model_path(MONTH)
+    scenarios.save(scenario_path)
+    print(f'Scenario model: {len(sleeves)} funds over {len(scenarios.nodes)} ETFs ({scenario_path})')
+    for fund, deltas in args.what_if:
+        _print_what_if(scenarios, fund, deltas)
 
     print('\nComputing pairwise correlations...')
-    corr_matrix = compute_pairwise_correlations(all_funds_data, all_fund_names)
+    corr_matrix = compute_pairwise_correlations(store, all_fund_names)
 
     print('Computing overlap stats...')
-    overlap_stats = {}
-    for fi in fund_order:
-        vi = all_funds_data[fi]['_weight_vec']
-        ki = set(vi.keys())
-        for fj in fund_order:
-            if fi == fj:
-                continue
-            vj = all_funds_data[fj]['_weight_vec']
-            kj = set(vj.keys())
-            shared = ki & kj
-            only_i = ki - kj
-            only_j = kj - ki
-            sw_i = sum(vi.get(k, 0) for k in shared)
-            sw_j = sum(vj.get(k, 0) for k in shared)
-            ow_i = sum(vi.get(k, 0) for k in only_i)
-            ow_j = sum(vj.get(k, 0) for k in only_j)
-            overlap_stats[f'{fi}|{fj}'] = {
-                'shared': len(shared), 'only_a': len(only_i), 'only_b': len(only_j),
-                'total_a': len(ki), 'total_b': len(kj),
-                'shared_weight_a': round(sw_i, 2), 'shared_weight_b': round(sw_j, 2),
-                'only_weight_a': round(ow_i, 2), 'only_weight_b': round(ow_j, 2),
-            }
+    overlap_stats = compute_overlap_stats(store, fund_order)
 
     with open(out_dir / 'overlap_stats.json', 'w') as f:
         json.dump(overlap_stats, f, indent=2)
+    save_security_master()
+    save_lookthrough_cache()
 
-    # Remove internal weight vectors
-    for fd in all_funds_data.values():
-        fd.pop('_weight_vec', None)
+    export_weights(all_funds_data, store)
 
     acwi_sectors = list(all_funds_data['ACWI']['sectors'].keys())
 
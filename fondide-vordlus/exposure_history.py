@@ -0,0 +1,217 @@
+"""
+Month-by-month history of fund look-through exposures.
+
+fund_data.json only holds the month it was built for, so a trend (how did a
+fund's overlap with ACWI move over a year) used to need one pipeline run
+per month. Each run now also saves its weight store to data/history/ as one
+compressed .npz per month:
+  funds                      fund names (matrix rows)
+  keys                       key strings of the month's columns (normalized
+                             issuer keys, as in the fund 'weights')
+  indptr, indices, weights   the funds × keys matrix as CSR, zeros dropped
+  benchmark, full_universe   benchmark fund and look-through mode of the run
+Keys are stored as strings, sorted, and each fund's entries in key order:
+issuer ids come from the local security master cache and are not stable
+across machines, so re-running a month from the same inputs writes the same
+file. The pipeline saves default-mode runs only: a --full-universe run
+leaves the month's file alone.
+
+ExposureHistory reads every month once into columnar arrays (month, fund,
+key, weight) over a shared fund and key universe. Overlap, active share,
+turnover and drift are bincounts over those arrays, for all funds and months
+at once; each returns a months × funds DataFrame (NaN where a fund has no
+data for a month).
+"""
+import numpy as np
+import pandas as pd
+
+BENCHMARK = 'ACWI'
+
+
+def save_month(path, store, benchmark=BENCHMARK, full_universe=False):
+    """Write one month's weight store to path (replacing an earlier run of the month)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    keys = np.array(store.keys, dtype=str)
+    order = np.argsort(keys, kind='stable')
+    rank = np.empty(len(keys), dtype=np.int32)
+    rank[order] = np.arange(len(keys), dtype=np.int32)
+    keep = store.data != 0
+    rows, indices, weights = store.rows[keep], rank[store.indices[keep]], store.data[keep]
+    entries = np.lexsort((indices, rows))
+    counts = np.bincount(rows, minlength=len(store.funds))
+    indptr = np.zeros(len(store.funds) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(counts)
+    np.savez_compressed(
+        path,
+        funds=np.array(store.funds, dtype=str),
+        keys=keys[order],
+        indptr=indptr,
+        indices=indices[entries],
+        weights=weights[entries],
+        benchmark=np.array(benchmark),
+        full_universe=np.array(bool(full_universe)),
+    )
+
+
+class ExposureHistory:
+    """Fund × key weights of every saved month, as columnar entry arrays."""
+
+    def __init__(self, months, funds, keys, month, fund, key, weight, present, benchmarks, full_universe):
+        self.months = months                # month labels ('YYYY-MM'), oldest first
+        self.funds = funds                  # fund names, in first-seen order
+        self.keys = keys                    # key strings, sorted
+        self.month = month                  # per-entry month / fund / key codes and weights
+        self.fund = fund
+        self.key = key
+        self.weight = weight
+        self.present = present              # months × funds: fund saved that month
+        self.benchmarks = benchmarks
+        self.full_universe = full_universe  # per month
+        self.fund_index = {f: i for i, f in enumerate(funds)}
+        self.month_index = {m: i for i, m in enumerate(months)}
+        # Entries are stored month by month: month m is entries bounds[m]:bounds[m + 1]
+        self.bounds = np.searchsorted(month, np.arange(len(months) + 1))
+
+    def __len__(self):
+        return len(self.weight)
+
+    @classmethod
+    def load(cls, root, months=None):
+        """Read the saved months in root (all, or those listed), oldest first."""
+        paths = sorted(root.glob('*.npz')) if root.exists() else []
+        if months is not None:
+            paths = [p for p in paths if p.stem in set(months)]
+        parts = []
+        for path in paths:
+            with np.load(path) as data:
+                parts.append({k: data[k] for k in data.files})
+
+        funds = list(dict.fromkeys(f for p in parts for f in p['funds'].tolist()))
+        fund_index = {f: i for i, f in enumerate(funds)}
+        all_keys = np.concatenate([p['keys'] for p in parts]) if parts else np.zeros(0, dtype=str)
+        keys, key_codes = np.unique(all_keys, return_inverse=True)
+
+        month, fund, key, weight = [], [], [], []
+        present = np.zeros((len(parts), len(funds)), dtype=bool)
+        offset = 0
+        for m, p in enumerate(parts):
+            rows = np.array([fund_index[f] for f in p['funds'].tolist()], dtype=np.int32)
+            present[m, rows] = True
+            n = len(p['weights'])
+            month.append(np.full(n, m, dtype=np.int32))
+            fund.append(np.repeat(rows, np.diff(p['indptr'])))
+            key.append(key_codes[offset + p['indices']].astype(np.int32))
+            weight.append(p['weights'])
+            offset += len(p['keys'])
+
+        def joined(arrays, dtype):
+            return np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
+
+        full_universe = [bool(p['full_universe']) for p in parts]
+        if len(set(full_universe)) > 1:
+            mixed = [path.stem for path, full in zip(paths, full_universe) if full]
+            print(f'  WARNING: Exposure history mixes look-through modes (--full-universe: {", ".join(mixed)})')
+        return cls([p.stem for p in paths], funds, keys.tolist(),
+                   joined(month, np.int32), joined(fund, np.int32), joined(key, np.int32),
+                   joined(weight, float), present, [str(p['benchmark']) for p in parts], full_universe)
+
+    # ── Lookups ──
+
+    def _frame(self, values):
+        """months × funds DataFrame of per-cell values, NaN where the fund is missing."""
+        values = np.where(self.present, values, np.nan)
+        return pd.DataFrame(values, index=pd.Index(self.months, name='month'), columns=self.funds)
+
+    def _cells(self, month, fund, values):
+        """Sum values into a months × funds array."""
+        cells = month.astype(np.int64) * len(self.funds) + fund
+        total = np.bincount(cells, weights=values, minlength=len(self.months) * len(self.funds))
+        return total.reshape(len(self.months), len(self.funds))
+
+    def _entries(self, m, fund=None):
+        """Entry slice of month m, optionally one fund's entries only."""
+        idx = np.arange(self.bounds[m], self.bounds[m + 1])
+        return idx if fund is None else idx[self.fund[idx] == fund]
+
+    def weights(self, fund):
+        """keys × months DataFrame of one fund's weights (0 where not held)."""
+        f = self.fund_index[fund]
+        mask = self.fund == f
+        codes, inverse = np.unique(self.key[mask], return_inverse=True)
+        matrix = np.zeros((len(codes), len(self.months)))
+        matrix[inverse, self.month[mask]] = self.weight[mask]
+        keys = [self.keys[c] for c in codes.tolist()]
+        return pd.DataFrame(matrix, index=pd.Index(keys, name='key'), columns=self.months)
+
+    def totals(self):
+        """Total weight of each fund per month."""
+        return self._frame(self._cells(self.month, self.fund, self.weight))
+
+    # ── Analytics ──
+
+    def overlap(self, other=None):
+        """Σ_k min(w_fund, w_other) per month and fund; other defaults to each month's benchmark."""
+        n_keys = len(self.keys)
+        names = [other if other is not None else b for b in self.benchmarks]
+        has_ref = np.array([n in self.fund_index and self.present[m, self.fund_index[n]]
+                            for m, n in enumerate(names)], dtype=bool)
+        ref = [self._entries(m, self.fund_index[n]) for m, n in enumerate(names) if has_ref[m]]
+        ref = np.concatenate(ref) if ref else np.zeros(0, dtype=np.int64)
+        ref_codes = self.month[ref].astype(np.int64) * n_keys + self.key[ref]
+        order = np.argsort(ref_codes)
+        ref_codes, ref_weights = ref_codes[order], self.weight[ref][order]
+
+        # Each entry's reference weight for the same month and key (0 if the reference lacks it)
+        codes = self.month.astype(np.int64) * n_keys + self.key
+        at = np.searchsorted(ref_codes, codes)
+        found = at < len(ref_codes)
+        found[found] = ref_codes[at[found]] == codes[found]
+        matched = np.zeros(len(codes))
+        matched[found] = ref_weights[at[found]]
+        values = self._cells(self.month, self.fund, np.minimum(self.weight, matched))
+        values[~has_ref] = np.nan
+        return self._frame(values)
+
+    def active_share(self, benchmark=None):
+        """Active share vs the benchmark (100 − overlap, Cremers & Petajisto 2009), per month and fund."""
+        return 100 - self.overlap(benchmark)
+
+    def _distance(self, reference):
+        """½ Σ_k |w_t − w_r| per month t and fund, where r = reference[t] (−1: no reference)."""
+        n_funds, n_keys = len(self.funds), len(self.keys)
+        targets = [t for t in range(len(self.months)) if reference[t] >= 0]
+        if not targets:
+            return self._frame(np.full(self.present.shape, np.nan))
+        # Month t's own entries count +w, the reference month's entries (relabelled t) count −w
+        own = [self._entries(t) for t in targets]
+        refs = [self._entries(reference[t]) for t in targets]
+        idx = np.concatenate(own + refs)
+        month = np.concatenate([np.full(len(e), t) for t, e in zip(targets, own)]
+                               + [np.full(len(e), t) for t, e in zip(targets, refs)])
+        sign = np.concatenate([np.ones(sum(map(len, own))), -np.ones(sum(map(len, refs)))])
+
+        codes = (month.astype(np.int64) * n_funds + self.fund[idx]) * n_keys + self.key[idx]
+        cells, inverse = np.unique(codes, return_inverse=True)
+        diff = np.bincount(inverse, weights=sign * self.weight[idx], minlength=len(cells))
+        cell_month, cell_fund = np.divmod(cells // n_keys, n_funds)
+        result = self._cells(cell_month, cell_fund, np.abs(diff)) / 2
+
+        both = np.zeros(self.present.shape, dtype=bool)
+        for t in targets:
+            both[t] = self.present[t] & self.present[reference[t]]
+        return self._frame(np.where(both, result, np.nan))
+
+    def turnover(self):
+        """Month-over-month turnover ½ Σ|Δw| of each fund (vs the previous saved month)."""
+        return self._distance(np.arange(len(self.months)) - 1)
+
+    def drift(self, base=None):
+        """½ Σ|w_t − w_base| of each fund: how far its holdings moved since base (default: first month)."""
+        b = self.month_index[base] if base is not None else 0
+        return self._distance(np.full(len(self.months), b))
+
+    def changes(self, fund, start, end, top=20):
+        """Largest weight changes of one fund between two months (Series, end − start)."""
+        w = self.weights(fund)
+        delta = w[end] - w[start]
+        return delta[delta != 0].sort_values(key=abs, ascending=False).head(top)
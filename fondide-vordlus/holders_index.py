@@ -0,0 +1,104 @@
+"""
+Inverted holdings index: which funds hold a stock, and through what.
+
+Built during look-through from each fund's contributions: stock key (the
+normalized issuer key, as in the fund 'weights') → list of
+(fund, path, weight). A path is the chain of ETFs a holding is reached
+through ('SSAC > NDIA'), or 'direct' for stocks a fund holds itself.
+Weights are % of the fund, as in top_holdings.
+
+Exported as small JSON shards under docs/fondide-vordlus/holders/, one per
+leading SHARD_CHARS letters/digits of the stock's display names:
+  holders/index.json   month, fields, shard names and sizes
+  holders/{shard}.json {'names': {display name or key: key},
+                        'stocks': {key: {'names': [...], 'holders': [[fund, path, weight], ...]}}}
+A stock is written to the shard of each of its names (and of its key), so
+a query by the name the page shows, or by key, reads exactly one shard.
+"""
+import json
+from collections import defaultdict
+
+HOLDERS_DIR = 'holders'
+SHARD_CHARS = 2
+DIRECT_PATH = 'direct'
+WEIGHT_DIGITS = 4
+MIN_WEIGHT = 0.5 * 10 ** -WEIGHT_DIGITS   # contributions that round to 0 are left out
+
+
+def shard_of(name):
+    """Shard for a display name or key: its first SHARD_CHARS of A-Z/0-9 (uppercased), '_'-padded.
+
+    Same rule as the page: name.toUpperCase().replace(/[^A-Z0-9]/g, '').slice(0, 2).padEnd(2, '_')
+    """
+    chars = [c for c in str(name).upper() if c.isascii() and c.isalnum()]
+    return ''.join(chars[:SHARD_CHARS]).ljust(SHARD_CHARS, '_')
+
+
+def build_holders_index(holders):
+    """Shards of the inverted index from {fund: DataFrame (key, name, path, weight)}."""
+    stocks = defaultdict(lambda: {'names': [], 'holders': []})
+    for fund, df in holders.items():
+        df = df[df['weight'] >= MIN_WEIGHT]
+        for key, name, path, weight in zip(df['key'], df['name'], df['path'], df['weight']):
+            entry = stocks[key]
+            if name not in entry['names']:
+                entry['names'].append(name)
+            entry['holders'].append([fund, path, round(float(weight), WEIGHT_DIGITS)])
+
+    shards = defaultdict(lambda: {'names': {}, 'stocks': {}})
+    for key, entry in stocks.items():
+        entry['holders'].sort(key=lambda h: -h[2])
+        for name in [key] + entry['names']:
+            shard = shards[shard_of(name)]
+            shard['names'][name] = key
+            shard['stocks'][key] = entry
+    return dict(sorted(shards.items()))
+
+
+def write_holders_index(shards, out_dir, month):
+    """Write the shards and index.json to out_dir (replacing shards from an earlier run)."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for old in out_dir.glob('*.json'):
+        old.unlink()
+    for shard, data in shards.items():
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        (out_dir / f'{shard}.json').write_text(text, encoding='utf-8')
+    meta = {
+        'month': month,
+        'fields': ['fund', 'path', 'weight'],
+        'shards': {shard: len(data['stocks']) for shard, data in shards.items()},
+    }
+    with open(out_dir / 'index.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+class HoldersIndex:
+    """Read side of an exported holders index: one shard file per lookup."""
+
+    def __init__(self, path, normalize=None):
+        self.path = path
+        self.normalize = normalize
+        self._shards = {}
+
+    def _shard(self, shard):
+        if shard not in self._shards:
+            file = self.path / f'{shard}.json'
+            self._shards[shard] = json.loads(file.read_text(encoding='utf-8')) if file.exists() else None
+        return self._shards[shard]
+
+    def lookup(self, name):
+        """{'key', 'names', 'holders'} for a display name or key, or None if no fund holds it.
+
+        Names not in the index are retried as their normalized key when a
+        normalize function (normalize_company_name) was given.
+        """
+        candidates = [name]
+        if self.normalize is not None:
+            candidates.append(self.normalize(name))
+        for candidate in candidates:
+            shard = self._shard(shard_of(candidate))
+            if shard and candidate in shard['names']:
+                key = shard['names'][candidate]
+                return {'key': key, **shard['stocks'][key]}
+        return None
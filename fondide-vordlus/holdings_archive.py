@@ -0,0 +1,170 @@
+"""
+Point-in-time archive of ETF holdings snapshots.
+
+The flat files in data/raw/holdings/ only ever hold the latest constituents
+(EODHD caches are overwritten once they are a week old), so re-running an
+old month would look through today's ETFs. Every holdings frame the
+pipeline loads is also recorded here, once per distinct snapshot, and a run
+looks its ETFs up as of the report date instead.
+
+One JSON-lines file per ETF in data/cache/holdings_archive/, one snapshot per
+line, oldest first:
+  {"date": "YYYY-MM-DD", "source": file, "digest": content hash,
+   "rows": [...], "order": [...], "weights": [...]}
+rows rebuilds the other columns (ARCHIVE_COLS) sorted by stock_id (then the
+other columns), against the previous snapshot's sorted rows: ["=", i, j]
+copies its rows i:j, [[...], ...] lists new rows. The first snapshot lists
+every row. order gives each row of the file its position in the sorted rows
+and weights is the full weight_pct column, both in file order. Files are
+sorted by weight, so weight drift reorders them; sorted by stock_id the rows
+of consecutive snapshots line up, and as constituents barely change from
+month to month a snapshot costs little more than its weights and order.
+"""
+import bisect
+import json
+from datetime import date, timedelta
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+from lookthrough_cache import frame_digest
+
+ARCHIVE_COLS = ('stock_id', 'ticker', 'name', 'sector', 'asset_class', 'location')
+GRACE_DAYS = 7   # snapshots taken this many days after a report date still count as of it
+
+
+class HoldingsArchive:
+    """Dated holdings snapshots per ETF, delta-encoded, with as-of lookup."""
+
+    def __init__(self, root):
+        self.root = root
+        self._snapshots = {}
+        self._sorted = {}
+        self._frames = {}
+        self.recorded = []
+
+    def _path(self, ticker):
+        return self.root / f'{ticker}.jsonl'
+
+    def _load(self, ticker):
+        """Snapshot records of ticker, oldest first (read on first use)."""
+        if ticker not in self._snapshots:
+            path = self._path(ticker)
+            lines = path.read_text(encoding='utf-8').splitlines() if path.exists() else []
+            self._snapshots[ticker] = [json.loads(line) for line in lines if line.strip()]
+        return self._snapshots[ticker]
+
+    def dates(self, ticker):
+        """Snapshot dates of ticker (ISO strings), oldest first."""
+        return [s['date'] for s in self._load(ticker)]
+
+    def tickers(self):
+        """ETFs with at least one archived snapshot."""
+        return sorted(p.stem for p in self.root.glob('*.jsonl')) if self.root.exists() else []
+
+    # ── Reading ──
+
+    def _sorted_rows(self, ticker, i):
+        """Attribute rows of snapshot i in stock_id order (delta chain replayed, memoised)."""
+        key = (ticker, i)
+        if key not in self._sorted:
+            snapshot = self._load(ticker)[i]
+            prev = self._sorted_rows(ticker, i - 1) if i else []
+            rows = []
+            for op in snapshot['rows']:
+                if op and op[0] == '=':
+                    rows.extend(prev[op[1]:op[2]])
+                else:
+                    rows.extend(tuple(r) for r in op)
+            self._sorted[key] = rows
+        return self._sorted[key]
+
+    def _rows(self, ticker, i):
+        """Attribute rows of snapshot i in file order (memoised)."""
+        key = (ticker, i)
+        if key not in self._frames:
+            rows = self._sorted_rows(ticker, i)
+            self._frames[key] = [rows[k] for k in self._load(ticker)[i]['order']]
+        return self._frames[key]
+
+    def frame(self, ticker, i):
+        """Holdings frame of snapshot i, in the loaders' format."""
+        snapshot = self._load(ticker)[i]
+        df = pd.DataFrame(self._rows(ticker, i), columns=list(ARCHIVE_COLS))
+        df['weight_pct'] = pd.Series(snapshot['weights'], dtype=float)
+        df.attrs.update(as_of=snapshot['date'], source=snapshot['source'])
+        return df
+
+    def as_of(self, ticker, report_date, grace_days=GRACE_DAYS):
+        """Latest snapshot of ticker taken by report_date (+ grace_days): (index, date), or None."""
+        cutoff = (date.fromisoformat(str(report_date)) + timedelta(days=grace_days)).isoformat()
+        i = bisect.bisect_right(self.dates(ticker), cutoff)
+        return (i - 1, self.dates(ticker)[i - 1]) if i else None
+
+    # ── Writing ──
+
+    def record(self, ticker, df, snapshot_date, source=''):
+        """Archive df as ticker's snapshot on snapshot_date unless it is already there.
+
+        Returns True if the archive changed. A frame identical to the snapshot
+        before its date is not stored again; a different frame for an archived
+        date replaces that snapshot. Snapshots stay in date order, re-encoding
+        the one after an inserted snapshot.
+        """
+        if df.empty or not all(c in df.columns for c in ARCHIVE_COLS + ('weight_pct',)):
+            return False
+        digest = frame_digest(df)
+        snapshots = self._load(ticker)
+        dates = self.dates(ticker)
+        at = bisect.bisect_left(dates, snapshot_date)
+        replace = at < len(dates) and dates[at] == snapshot_date
+        if replace and snapshots[at]['digest'] == digest:
+            return False
+        if not replace and at and snapshots[at - 1]['digest'] == digest:
+            return False
+
+        decoded = [self._sorted_rows(ticker, i) for i in range(len(snapshots))]
+        rows = list(df[list(ARCHIVE_COLS)].itertuples(index=False, name=None))
+        by_key = sorted(range(len(rows)), key=lambda k: _row_key(rows[k]))
+        order = [0] * len(rows)
+        for position, k in enumerate(by_key):
+            order[k] = position
+        rows = [rows[k] for k in by_key]
+        entry = {'date': snapshot_date, 'source': source, 'digest': digest,
+                 'order': order, 'weights': df['weight_pct'].astype(float).tolist()}
+        if replace:
+            snapshots[at], decoded[at] = entry, rows
+        else:
+            snapshots.insert(at, entry)
+            decoded.insert(at, rows)
+        for i in range(at, min(at + 2, len(snapshots))):
+            snapshots[i]['rows'] = _delta(decoded[i - 1] if i else [], decoded[i])
+        self._sorted = {k: v for k, v in self._sorted.items() if k[0] != ticker}
+        self._frames = {k: v for k, v in self._frames.items() if k[0] != ticker}
+        self._write(ticker)
+        self.recorded.append((ticker, snapshot_date))
+        return True
+
+    def _write(self, ticker):
+        self.root.mkdir(parents=True, exist_ok=True)
+        keys = ('date', 'source', 'digest', 'rows', 'order', 'weights')
+        lines = [json.dumps({k: s[k] for k in keys}, ensure_ascii=False, separators=(',', ':'))
+                 for s in self._load(ticker)]
+        self._path(ticker).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def _row_key(row):
+    """Sort key of an attribute row: stock_id, then the other columns."""
+    return [str(v) for v in row]
+
+
+def _delta(prev, rows):
+    """Sorted rows encoded against the previous snapshot's: copied ranges and runs of new rows."""
+    ops = []
+    matcher = SequenceMatcher(None, prev, rows, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(['=', i1, i2])
+        elif j2 > j1:
+            ops.append([list(r) for r in rows[j1:j2]])
+    return ops
@@ -0,0 +1,125 @@
+"""
+Columnar cache of ETF holdings files.
+
+fetch_ishares_holdings and fetch_eodhd_holdings used to build their frames
+from the raw files on every run (csv.reader rows or parsed JSON, one dict
+per row, then a DataFrame of string columns). Each holdings file in
+data/raw/holdings/ is now converted once into a typed, dictionary-encoded
+data/cache/holdings/<file>.npz:
+  values, offsets            the sorted distinct values of each string column
+                             (STRING_COLS), concatenated: column j's are
+                             values[offsets[j]:offsets[j + 1]]
+  codes                      rows × string columns, int32 index into the
+                             column's values (-1 for missing)
+  weight_pct                 float64
+  meta                       JSON: the source's mtime, size and SHA-256, the
+                             converter fingerprint, and the frame's attrs
+                             (as_of, source)
+Loading is a few array reads. sector, asset_class and location come back as
+categoricals (CATEGORICAL_COLS), the other strings as string columns.
+
+A cache file is used while its source's mtime and size match. A touched
+source (EODHD re-fetch, git checkout) is hashed, and the cache file is kept
+if the content is unchanged. The converter's code fingerprint
+(parse_cache.code_fingerprint) is stored as well, so editing a loader
+rebuilds its cache files.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from parse_cache import code_fingerprint, file_sha256
+
+STRING_COLS = ('ticker', 'name', 'sector', 'asset_class', 'location', 'stock_id')
+CATEGORICAL_COLS = ('sector', 'asset_class', 'location')
+HOLDINGS_COLS = ('ticker', 'name', 'sector', 'asset_class', 'location', 'weight_pct', 'stock_id')
+
+
+def _encode(df):
+    """(values, offsets, codes) of df's STRING_COLS; missing values get code -1."""
+    values, offsets, codes = [], [0], np.empty((len(df), len(STRING_COLS)), dtype=np.int32)
+    for j, col in enumerate(STRING_COLS):
+        codes[:, j], distinct = pd.factorize(df[col], sort=True)
+        values.extend(distinct)
+        offsets.append(len(values))
+    return np.array(values, dtype=str), np.array(offsets, dtype=np.int64), codes
+
+
+def _decode(values, codes, categorical):
+    """One string column from its distinct values and codes."""
+    if categorical:
+        return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(pd.Index(values, dtype='str')))
+    strings = np.append(values.astype(object), np.nan)[codes]   # code -1 → the appended NaN
+    return pd.array(strings, dtype='str')
+
+
+class HoldingsCache:
+    """Typed columnar copies of holdings files, one .npz per source file."""
+
+    def __init__(self, root):
+        self.root = root
+        self.fingerprints = {}
+
+    def _path(self, source):
+        return self.root / f'{source.name}.npz'
+
+    def _fingerprint(self, convert):
+        """Fingerprint of convert and of this cache's own encoding."""
+        if convert not in self.fingerprints:
+            self.fingerprints[convert] = code_fingerprint([convert, HoldingsCache])
+        return self.fingerprints[convert]
+
+    def load(self, source, convert):
+        """Holdings frame of source: from its cache file, else convert(source) (cached for next time).
+
+        convert(source) is the loader's own reader, returning the holdings
+        frame (HOLDINGS_COLS) with its attrs. Empty frames are not cached.
+        """
+        stat = source.stat()
+        fingerprint = self._fingerprint(convert)
+        path = self._path(source)
+        arrays, meta = self._read(path)
+        if meta.get('converter') == fingerprint and meta.get('size') == stat.st_size:
+            if meta['mtime_ns'] == stat.st_mtime_ns:
+                return self._frame(arrays, meta)
+            if meta['sha256'] == file_sha256(source):
+                meta['mtime_ns'] = stat.st_mtime_ns   # touched, same content
+                self._write(path, arrays, meta)
+                return self._frame(arrays, meta)
+
+        df = convert(source)
+        if df.empty:
+            return df
+        values, offsets, codes = _encode(df)
+        arrays = {'values': values, 'offsets': offsets, 'codes': codes,
+                  'weight_pct': df['weight_pct'].to_numpy(dtype=np.float64)}
+        meta = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': file_sha256(source),
+                'converter': fingerprint, 'attrs': dict(df.attrs)}
+        self._write(path, arrays, meta)
+        return self._frame(arrays, meta)
+
+    def _read(self, path):
+        """(arrays, meta) of a cache file; ({}, {}) if missing or unreadable."""
+        if not path.exists():
+            return {}, {}
+        try:
+            with np.load(path) as data:
+                arrays = {k: data[k] for k in data.files}
+            return arrays, json.loads(str(arrays.pop('meta')))
+        except (OSError, ValueError, KeyError) as e:
+            print(f'  WARNING: Could not read holdings cache {path}: {e}')
+            return {}, {}
+
+    def _write(self, path, arrays, meta):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, meta=np.array(json.dumps(meta)), **arrays)
+
+    def _frame(self, arrays, meta):
+        values, offsets, codes = arrays['values'], arrays['offsets'], arrays['codes']
+        columns = {col: _decode(values[offsets[j]:offsets[j + 1]], codes[:, j], col in CATEGORICAL_COLS)
+                   for j, col in enumerate(STRING_COLS)}
+        columns['weight_pct'] = arrays['weight_pct']
+        df = pd.DataFrame({col: columns[col] for col in HOLDINGS_COLS})
+        df.attrs.update(meta['attrs'])
+        return df
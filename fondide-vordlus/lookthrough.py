@@ -0,0 +1,563 @@
+"""
+Sparse look-through engine.
+
+Every ETF becomes one sparse row over an integer-coded stock universe.
+ETFs, sub-ETFs, proxies and funds form a holdings graph; each node is
+flattened into its constituents once (recursively, with cycle detection),
+so a fund's stock-level portfolio is a single allocation-vector ×
+ETF-matrix product instead of nested row loops.
+
+Rows are numpy CSR arrays (indices/data) and products are accumulated with
+np.bincount; pandas is only used at the frame boundaries (holdings frames
+in, stock-level frames out).
+
+Nodes also carry label exposure vectors (e.g. weight per sector or per
+country), so a fund's breakdown is the allocation-weighted sum of its ETFs'
+vectors rather than a groupby over its stock-level frame.
+"""
+import functools
+from itertools import pairwise
+
+import numpy as np
+import pandas as pd
+
+from lookthrough_cache import RowCache, config_digest, frame_digest
+from parse_cache import code_fingerprint
+
+ATTR_COLS = ['stock_id', 'ticker', 'name', 'sector', 'location']
+OUTPUT_COLS = ['stock_id', 'ticker', 'name', 'weight', 'sector', 'location']
+MULTIPLY_CHUNK = 1 << 21   # (fund, stock) entries aggregated per batch in multiply()
+PATH_SEP = ' > '           # joins node keys in an entry's path (e.g. 'SSAC > NDIA')
+
+
+def _prefixed(prefix, via):
+    """Paths of entries reached through node prefix ('' = held directly by prefix)."""
+    out = np.full(len(via), prefix, dtype=object)
+    deeper = via != ''
+    out[deeper] = prefix + PATH_SEP + via[deeper]
+    return out
+
+
+class StockUniverse:
+    """Integer codes for stock_ids, plus the source rows that reference them.
+
+    Names can differ slightly between ETF files for the same stock_id, so
+    attributes are kept per source row rather than per stock.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self._chunks = []
+        self._code_chunks = []
+        self._n_rows = 0
+        self._attrs = None
+        self._codes = None
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def n_rows(self):
+        """Number of source rows registered so far."""
+        return self._n_rows
+
+    def encode(self, stock_ids):
+        """Integer codes for stock_ids; unseen ids are appended in order."""
+        index = self.index
+        return np.array([index.setdefault(s, len(index)) for s in stock_ids], dtype=np.int64)
+
+    def add_rows(self, df):
+        """Register holdings rows. Returns (stock codes, source row numbers)."""
+        codes = self.encode(df['stock_id'].tolist())
+        start = self._n_rows
+        self._chunks.append(df[ATTR_COLS].to_numpy(dtype=object))
+        self._code_chunks.append(codes)
+        self._n_rows += len(df)
+        self._attrs = None
+        self._codes = None
+        return codes, np.arange(start, self._n_rows, dtype=np.int64)
+
+    def attrs(self, rows):
+        """Attribute matrix (ATTR_COLS order) for source row numbers."""
+        if self._attrs is None:
+            self._attrs = (np.concatenate(self._chunks) if self._chunks
+                           else np.empty((0, len(ATTR_COLS)), dtype=object))
+        return self._attrs[rows]
+
+    def row_codes(self):
+        """Stock code of every source row."""
+        if self._codes is None:
+            self._codes = (np.concatenate(self._code_chunks) if self._code_chunks
+                           else np.empty(0, dtype=np.int64))
+        return self._codes
+
+
+class RowLabels:
+    """A label (e.g. sector) for every source row of a StockUniverse.
+
+    Rows labelled None/NaN are not counted. A stock is mixed when its source
+    rows disagree (different labels, or counted in one ETF but not another):
+    a fund's frame takes the stock's attributes from whichever ETF lists it
+    first, so breakdowns keep mixed stocks apart for the caller to resolve.
+    """
+
+    def __init__(self, universe, labels):
+        codes, uniques = pd.factorize(pd.Series(labels, dtype=object), sort=True)
+        self.names = list(uniques)
+        self.codes = np.where(codes >= 0, codes, len(self.names))   # uncounted rows -> extra slot
+        self.n_rows = len(codes)
+
+        stocks = universe.row_codes()[:self.n_rows]
+        lo = np.full(len(universe), len(self.names) + 1)
+        hi = np.full(len(universe), -1)
+        np.minimum.at(lo, stocks, self.codes)
+        np.maximum.at(hi, stocks, self.codes)
+        self.mixed = lo < hi
+
+    def __len__(self):
+        return len(self.names)
+
+
+class SparseRow:
+    """One flattened ETF: stock codes, weights and source rows.
+
+    outer holds the ETF's own position weight; inner holds the sub-ETF
+    constituent weight for expanded positions (NaN for direct holdings), so a
+    fund weight fw contributes fw * outer [* inner / 100] in the same
+    operation order as the original row-by-row accumulation. via holds each
+    entry's path of sub-nodes below this one ('' for direct holdings).
+    """
+    __slots__ = ('deps', 'indices', 'inner', 'outer', 'src', 'via')
+
+    def __init__(self, indices, outer, inner, src, deps, via=None):
+        self.indices = indices
+        self.outer = outer
+        self.inner = inner
+        self.src = src
+        self.deps = deps
+        self.via = np.full(len(indices), '', dtype=object) if via is None else via
+
+    def scaled(self, fw=1.0):
+        """Contribution of each entry when the fund holds fw (fraction) of this ETF."""
+        c = fw * self.outer
+        sub = ~np.isnan(self.inner)
+        if sub.any():
+            c[sub] = c[sub] * self.inner[sub] / 100.0
+        return c
+
+    @property
+    def data(self):
+        """Weight of each entry per 100% of the ETF."""
+        return self.scaled(1.0)
+
+
+class Exposure:
+    """Result of an allocation × matrix product, in first-contribution order."""
+    __slots__ = ('codes', 'src', 'weight')
+
+    def __init__(self, codes, weight, src):
+        self.codes = codes
+        self.weight = weight
+        self.src = src
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class AllocationMatrix:
+    """Funds × ETFs weight matrix, kept as (fund, ticker, weight) triples.
+
+    Tickers can be any graph node (ETF, proxy or fund). A fund may list the
+    same ETF more than once (e.g. two SAWD share
+    classes); each listing stays a separate entry so sums keep their order.
+    """
+
+    def __init__(self):
+        self.funds = []
+        self.fund_index = []
+        self.tickers = []
+        self.weights = []
+
+    def add(self, fund, tickers, weights):
+        """Append one fund's allocations (weights as fractions of the fund)."""
+        i = len(self.funds)
+        self.funds.append(fund)
+        self.fund_index.extend([i] * len(tickers))
+        self.tickers.extend(tickers)
+        self.weights.extend(weights)
+
+    def dense(self):
+        """(funds, etf tickers, funds × ETFs array) with repeated listings summed."""
+        etfs = list(dict.fromkeys(self.tickers))
+        col = {t: j for j, t in enumerate(etfs)}
+        w = np.zeros((len(self.funds), len(etfs)))
+        np.add.at(w, (np.asarray(self.fund_index, dtype=np.int64),
+                      np.asarray([col[t] for t in self.tickers], dtype=np.int64)), self.weights)
+        return self.funds, etfs, w
+
+
+@functools.cache
+def _code_fingerprint():
+    """Fingerprint of the flattening code, part of every cached row's config."""
+    return code_fingerprint([LookthroughEngine, RowCache])
+
+
+class LookthroughEngine:
+    """Holdings graph over a shared StockUniverse.
+
+    Nodes are ETFs (any key of etf_holdings), proxies (an ISIN or fund-name
+    pattern standing in for another node) and funds (weighted lists of other
+    nodes). An ETF position whose ticker is itself a node — a sub-ETF such
+    as NDIA inside SSAC — is an edge, expanded recursively to any depth.
+
+    Each node's flattened row is computed once and reused by every parent;
+    it is rebuilt only if a holdings frame or fund definition it depends on
+    has been replaced. With a row_cache (lookthrough_cache.RowCache) ETF
+    rows also carry over between runs while their holdings are unchanged.
+    """
+
+    def __init__(self, etf_holdings, top_n=None, row_cache=None):
+        self.holdings = etf_holdings
+        self.top_n = dict(top_n or {})
+        self.row_cache = row_cache
+        self._digests = {}
+        self.universe = StockUniverse()
+        self.proxies = {}
+        self.name_proxies = {}
+        self.funds = {}
+        self._equity = {}
+        self._rows = {}
+        self._summaries = {}
+        self._breakdowns = {}
+        self._expanding = []
+
+    def __contains__(self, key):
+        return self._node(key) is not None
+
+    def add_proxy(self, key, target):
+        """Let key (e.g. an ISIN) stand for node target."""
+        self.proxies[key] = target
+
+    def add_name_proxy(self, pattern, target):
+        """Let fund names containing pattern (case-insensitive) stand for target."""
+        self.name_proxies[pattern.lower()] = target
+
+    def add_fund(self, key, children, weights):
+        """Register a fund node holding children (node keys) at weights (fractions)."""
+        self.funds[key] = (tuple(children), tuple(weights))
+
+    def resolve(self, key=None, name=None):
+        """Node key for an ETF ticker/ISIN/fund key, else by name pattern; None if unknown."""
+        seen = []
+        while key and key not in seen:
+            seen.append(key)
+            if key in self.funds or self._frame(key) is not None:
+                return key
+            key = self.proxies.get(key)
+        if key:
+            print(f'  WARNING: Proxy cycle {" -> ".join(seen + [key])}')
+            return None
+        if name:
+            lowered = name.lower()
+            for pattern, target in self.name_proxies.items():
+                if pattern in lowered:
+                    return self.resolve(target)
+        return None
+
+    def _frame(self, key):
+        """Holdings frame for an ETF node, or None (missing or empty)."""
+        df = self.holdings.get(key)
+        if df is None or df.empty:
+            return None
+        return df
+
+    def _node(self, key):
+        """Definition object of a node: its holdings frame or fund tuple."""
+        if key in self.funds:
+            return self.funds[key]
+        return self._frame(key)
+
+    def _equity_frame(self, ticker):
+        """Equity rows of one ETF's holdings frame (top-N truncated where configured)."""
+        df = self.holdings[ticker]
+        eq = df[df['asset_class'] == 'Equity']
+        if ticker in self.top_n:
+            eq = eq.nlargest(self.top_n[ticker], 'weight_pct')
+        return eq
+
+    def _equity_rows(self, ticker):
+        """Equity rows of one ETF, encoded once."""
+        df = self.holdings[ticker]
+        hit = self._equity.get(ticker)
+        if hit is not None and hit[0] is df:
+            return hit[1]
+        eq = self._equity_frame(ticker)
+        codes, src = self.universe.add_rows(eq)
+        rows = (codes, src, eq['weight_pct'].to_numpy(dtype=float), eq['ticker'].to_numpy(dtype=object))
+        self._equity[ticker] = (df, rows)
+        return rows
+
+    def _is_edge(self, ticker, parent):
+        """True if an ETF position with this ticker refers to another node."""
+        return bool(ticker) and ticker != parent and self._node(ticker) is not None
+
+    def row(self, key):
+        """Flattened sparse row of a node, sub-nodes expanded recursively."""
+        hit = self._rows.get(key)
+        if hit is not None and all(self._node(k) is d for k, d in hit.deps):
+            return hit
+        if key in self._expanding:
+            raise ValueError(f'Cycle in holdings graph: {" -> ".join(self._expanding + [key])}')
+
+        self._expanding.append(key)
+        try:
+            row = self._expand_fund(key) if key in self.funds else self._etf_row(key)
+        finally:
+            self._expanding.pop()
+        self._rows[key] = row
+        return row
+
+    def _child_row(self, key):
+        """Row of a child node, or None (with a warning) if it would close a cycle."""
+        try:
+            return self.row(key)
+        except ValueError as e:
+            if key not in self._expanding:
+                raise
+            print(f'  WARNING: {e} (skipped)')
+            return None
+
+    def _digest(self, key):
+        """Content hash of a holdings source's frame and top-N (None if missing or empty), memoised."""
+        df = self._frame(key)
+        if df is None:
+            return None
+        hit = self._digests.get(key)
+        if hit is None or hit[0] is not df:
+            hit = self._digests[key] = (df, frame_digest(df, self.top_n.get(key)))
+        return hit[1]
+
+    def _etf_row(self, ticker):
+        """Flattened row of an ETF node, rebuilt from the row cache when its inputs are unchanged."""
+        cache = self.row_cache
+        if cache is None:
+            return self._expand_etf(ticker)
+        sources = [k for k in self.holdings if self._frame(k) is not None]
+        config = config_digest(self.proxies, self.name_proxies, sources, _code_fingerprint())
+        hit = cache.get(ticker, config, self._digest)
+        if hit is not None:
+            attrs, outer, inner, via, deps = hit
+            codes, src = self.universe.add_rows(attrs)
+            return SparseRow(codes, outer, inner, src, [(k, self.holdings[k]) for k in deps], via)
+        row = self._expand_etf(ticker)
+        cache.put(ticker, config, {k: self._digest(k) for k, _ in row.deps},
+                  self.universe.attrs(row.src), row.outer, row.inner, row.via)
+        return row
+
+    def _expand_etf(self, ticker):
+        codes, src, w, tickers = self._equity_rows(ticker)
+        deps = {ticker: self.holdings[ticker]}
+        is_sub = np.fromiter((self._is_edge(t, ticker) for t in tickers),
+                             dtype=bool, count=len(tickers))
+        if not is_sub.any():
+            return SparseRow(codes, w, np.full(len(w), np.nan), src, list(deps.items()))
+
+        parts_i, parts_o, parts_n, parts_s, parts_v = [], [], [], [], []
+        start = 0
+        for pos in np.flatnonzero(is_sub):
+            parts_i.append(codes[start:pos])
+            parts_o.append(w[start:pos])
+            parts_n.append(np.full(pos - start, np.nan))
+            parts_s.append(src[start:pos])
+            parts_v.append(np.full(pos - start, '', dtype=object))
+            start = pos + 1
+            sub = self._child_row(tickers[pos])
+            if sub is None:
+                continue
+            parts_i.append(sub.indices)
+            parts_o.append(np.full(len(sub.indices), w[pos]))
+            parts_n.append(sub.data)
+            parts_s.append(sub.src)
+            parts_v.append(_prefixed(tickers[pos], sub.via))
+            deps.update(sub.deps)
+        parts_i.append(codes[start:])
+        parts_o.append(w[start:])
+        parts_n.append(np.full(len(w) - start, np.nan))
+        parts_s.append(src[start:])
+        parts_v.append(np.full(len(w) - start, '', dtype=object))
+
+        return SparseRow(np.concatenate(parts_i), np.concatenate(parts_o),
+                         np.concatenate(parts_n), np.concatenate(parts_s), list(deps.items()),
+                         np.concatenate(parts_v))
+
+    def _expand_fund(self, key):
+        children, weights = self.funds[key]
+        deps = {key: self.funds[key]}
+        parts_i, parts_o, parts_s, parts_v = [], [], [], []
+        for child, fw in zip(children, weights):
+            sub = self._child_row(child)
+            if sub is None:
+                continue
+            parts_i.append(sub.indices)
+            parts_o.append(sub.scaled(fw))
+            parts_s.append(sub.src)
+            parts_v.append(_prefixed(child, sub.via))
+            deps.update(sub.deps)
+        if not parts_i:
+            empty = np.empty(0, dtype=np.int64)
+            return SparseRow(empty, np.empty(0), np.empty(0), empty, list(deps.items()))
+        outer = np.concatenate(parts_o)
+        return SparseRow(np.concatenate(parts_i), outer, np.full(len(outer), np.nan),
+                         np.concatenate(parts_s), list(deps.items()), np.concatenate(parts_v))
+
+    def combine(self, tickers, fund_weights=None):
+        """Allocation × matrix product for a single fund.
+
+        fund_weights gives the fraction of the fund in each ticker (defaults to
+        1.0 each, i.e. the raw ETF weights). Tickers may repeat.
+        """
+        if fund_weights is None:
+            fund_weights = [1.0] * len(tickers)
+        alloc = AllocationMatrix()
+        alloc.add(None, tickers, fund_weights)
+        return self.multiply(alloc)[0]
+
+    def multiply(self, alloc):
+        """Funds × ETFs allocation matrix times the ETF × stock matrix.
+
+        Returns one Exposure per fund (in alloc.funds order). Funds are
+        aggregated in batches of about MULTIPLY_CHUNK flattened entries, each
+        in a single bincount over (fund, stock) keys, so memory stays bounded
+        however many funds and constituents there are. Within a fund
+        contributions are summed in allocation order, matching sequential
+        accumulation exactly.
+        """
+        rows = [self.row(t) for t in alloc.tickers]
+        n_funds = len(alloc.funds)
+        empty = np.empty(0, dtype=np.int64)
+        if not rows:
+            return [Exposure(empty, np.empty(0), empty) for _ in range(n_funds)]
+
+        # AllocationMatrix lists each fund's entries contiguously, in fund order
+        fund_index = np.asarray(alloc.fund_index, dtype=np.int64)
+        sizes = np.array([len(r.indices) for r in rows], dtype=np.int64)
+        fund_sizes = np.cumsum(np.bincount(fund_index, weights=sizes, minlength=n_funds))
+        exposures = []
+        lo = 0
+        while lo < n_funds:
+            done = fund_sizes[lo - 1] if lo else 0
+            hi = max(int(np.searchsorted(fund_sizes, done + MULTIPLY_CHUNK, 'right')), lo + 1)
+            a, b = np.searchsorted(fund_index, [lo, hi])
+            exposures.extend(self._aggregate(rows[a:b], alloc.weights[a:b], fund_index[a:b] - lo, hi - lo))
+            lo = hi
+        return exposures
+
+    def _aggregate(self, rows, weights, fund_of, n_funds):
+        """Exposures of n_funds funds from their rows, fund weights and fund positions."""
+        n = len(self.universe)
+        empty = np.empty(0, dtype=np.int64)
+        if not rows:
+            return [Exposure(empty, np.empty(0), empty) for _ in range(n_funds)]
+        indices = np.concatenate([r.indices for r in rows])
+        src = np.concatenate([r.src for r in rows])
+        data = np.concatenate([r.scaled(fw) for fw, r in zip(weights, rows)])
+        fund_of = np.repeat(fund_of, [len(r.indices) for r in rows])
+        keys = fund_of * n + indices
+
+        uniq, first, inv = np.unique(keys, return_index=True, return_inverse=True)
+        totals = np.bincount(inv, weights=data)
+        order = np.argsort(first, kind='stable')
+        uniq, totals, first = uniq[order], totals[order], first[order]
+
+        bounds = np.searchsorted(uniq // n, np.arange(n_funds + 1))
+        return [Exposure(uniq[a:b] % n, totals[a:b], src[first[a:b]])
+                for a, b in pairwise(bounds)]
+
+    def breakdown(self, key, labels):
+        """Exposure of a node to each label of a RowLabels (memoised per node).
+
+        Returns a 2 × (len(labels) + 2) array: row 0 holds the weight per label
+        (per 100% of the node), row 1 the number of entries carrying it.
+        Column -2 collects uncounted entries and column -1 the entries on
+        mixed stocks, whatever their label. ETF nodes bincount their
+        flattened row once; fund nodes sum their children's vectors at the
+        allocation weights.
+        """
+        row = self.row(key)
+        hit = self._breakdowns.get((key, id(labels)))
+        if hit is not None and hit[0] is row and hit[1] is labels:
+            return hit[2]
+        n = len(labels) + 2
+        if key in self.funds:
+            vec = np.zeros((2, n))
+            for child, fw in zip(*self.funds[key]):
+                if self._child_row(child) is not None:
+                    sub = self.breakdown(child, labels)
+                    vec[0] += fw * sub[0]
+                    vec[1] += sub[1]
+        else:
+            if len(row.src) and row.src.max() >= labels.n_rows:
+                raise ValueError(f'RowLabels cover {labels.n_rows} source rows, {key} needs more')
+            codes = np.where(labels.mixed[row.indices], n - 1, labels.codes[row.src])
+            vec = np.array([np.bincount(codes, weights=row.data, minlength=n),
+                            np.bincount(codes, minlength=n).astype(float)])
+        self._breakdowns[(key, id(labels))] = (row, labels, vec)
+        return vec
+
+    def etf_summary(self, ticker, top=20):
+        """Position count and top direct holdings of one ETF (memoised).
+
+        n_stocks counts the flattened positions (direct holdings plus
+        everything held through sub-ETFs); top lists (name, weight_pct) of the
+        largest direct holdings.
+        """
+        row = self.row(ticker)
+        hit = self._summaries.get((ticker, top))
+        if hit is not None and hit[0] is row:
+            return hit[1]
+        eq = self._equity_frame(ticker)
+        is_sub = np.fromiter((self._is_edge(t, ticker) for t in eq['ticker']),
+                             dtype=bool, count=len(eq))
+        top_rows = eq[~is_sub].nlargest(top, 'weight_pct')
+        summary = {
+            'n_stocks': len(row.indices),
+            'top': list(zip(top_rows['name'], top_rows['weight_pct'])),
+        }
+        self._summaries[(ticker, top)] = (row, summary)
+        return summary
+
+    def to_frame(self, exposure):
+        """Stock-level DataFrame sorted by weight (build_lookthrough format)."""
+        if len(exposure) == 0:
+            return pd.DataFrame()
+        attrs = self.universe.attrs(exposure.src)
+        df = pd.DataFrame({
+            'stock_id': attrs[:, 0],
+            'ticker': attrs[:, 1],
+            'name': attrs[:, 2],
+            'weight': exposure.weight,
+            'sector': attrs[:, 3],
+            'location': attrs[:, 4],
+        }, columns=OUTPUT_COLS)
+        return df.sort_values('weight', ascending=False).reset_index(drop=True)
+
+    def contributions(self, key):
+        """Stock-level contributions of a node by path: DataFrame (stock_id, name, path, weight).
+
+        One row per (stock, path) in first-contribution order; for a fund node
+        the path starts with the allocation's ETF (e.g. 'SSAC > NDIA').
+        """
+        row = self.row(key)
+        if not len(row.indices):
+            return pd.DataFrame(columns=['stock_id', 'name', 'path', 'weight'])
+        attrs = self.universe.attrs(row.src)
+        df = pd.DataFrame({
+            'code': row.indices,
+            'stock_id': attrs[:, 0],
+            'name': attrs[:, 2],
+            'path': row.via,
+            'weight': row.data,
+        })
+        df = df.groupby(['code', 'path'], sort=False, as_index=False).agg(
+            stock_id=('stock_id', 'first'), name=('name', 'first'), weight=('weight', 'sum'))
+        return df[['stock_id', 'name', 'path', 'weight']]
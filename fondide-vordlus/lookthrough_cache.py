@@ -0,0 +1,135 @@
+"""
+Month-over-month cache of flattened ETF rows.
+
+Most holdings files in data/raw/holdings/ do not change from one month to
+the next; most funds only shift their allocation weights. The cache keeps
+every ETF node's flattened look-through row (stock attributes, outer and
+inner weights, sub-ETF paths) from the last run, keyed by:
+  - the content hash of each holdings frame the row was built from (the ETF
+    and any sub-ETFs it expands), with its top-N truncation
+  - a config hash: proxy mappings, the set of loaded holdings sources (a
+    newly loaded source can turn a position into a sub-ETF edge) and a
+    fingerprint of the flattening code (parse_cache.code_fingerprint of the
+    look-through engine and this cache), so editing it rebuilds every row
+
+A row whose hashes still match is rebuilt from the cache instead of being
+flattened again; a fund over such rows is just a reweighting of cached
+vectors. Saved as JSON, like the security master.
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+HASH_COLS = ('stock_id', 'ticker', 'name', 'sector', 'location', 'weight_pct', 'asset_class')
+ROW_ATTRS = ('stock_id', 'ticker', 'name', 'sector', 'location')
+
+
+def frame_digest(df, top_n=None):
+    """Content hash of a holdings frame (the columns the look-through reads) and its top-N cut."""
+    cols = [c for c in HASH_COLS if c in df.columns]
+    hashed = pd.util.hash_pandas_object(df[cols].astype(str), index=False).to_numpy()
+    return hashlib.sha1(json.dumps([cols, top_n]).encode() + hashed.tobytes()).hexdigest()
+
+
+def config_digest(proxies, name_proxies, sources, code=''):
+    """Hash of everything besides the frames that decides how an ETF flattens (code: its fingerprint)."""
+    payload = [sorted(proxies.items()), sorted(name_proxies.items()), sorted(sources), code]
+    return hashlib.sha1(json.dumps(payload).encode()).hexdigest()
+
+
+class RowCache:
+    """Flattened ETF rows and fund allocations of the last run, persisted as JSON."""
+
+    def __init__(self):
+        self.rows = {}
+        self.funds = {}
+        self.hits = []
+        self.misses = []
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.rows)
+
+    # ── Persistence ──
+
+    @classmethod
+    def load(cls, path):
+        """Load from path; start empty if missing or unreadable."""
+        cache = cls()
+        if not path.exists():
+            return cache
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f'  WARNING: Could not read look-through cache {path}: {e}')
+            return cache
+        cache.rows = data.get('rows', {})
+        cache.funds = data.get('funds', {})
+        return cache
+
+    def save(self, path):
+        """Write to path if anything changed since load."""
+        if not self.dirty:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {'rows': self.rows, 'funds': self.funds}
+        path.write_text(json.dumps(data, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+        self.dirty = False
+
+    # ── Rows ──
+
+    def get(self, ticker, config, digest_of):
+        """Cached row of ticker as (attrs frame, outer, inner, via, deps), or None if stale.
+
+        digest_of(key) gives the current frame hash of a holdings source.
+        """
+        entry = self.rows.get(ticker)
+        if (entry is None or entry['config'] != config
+                or any(digest_of(dep) != digest for dep, digest in entry['deps'].items())):
+            self.misses.append(ticker)
+            return None
+        self.hits.append(ticker)
+        attrs = pd.DataFrame(entry['attrs'], columns=list(ROW_ATTRS))
+        outer = np.asarray(entry['outer'], dtype=float)
+        inner = np.asarray(entry['inner'], dtype=float)
+        via = np.asarray(entry['via'], dtype=object)
+        return attrs, outer, inner, via, list(entry['deps'])
+
+    def put(self, ticker, config, deps, attrs, outer, inner, via):
+        """Store a freshly flattened row. deps: {source: frame hash}; attrs: (n, 5) object array."""
+        self.rows[ticker] = {
+            'config': config,
+            'deps': deps,
+            'attrs': attrs.tolist(),
+            'outer': outer.tolist(),
+            'inner': inner.tolist(),
+            'via': via.tolist(),
+        }
+        self.dirty = True
+
+    # ── Funds ──
+
+    def fund_changes(self, allocations):
+        """Classify funds against the last run and remember their allocations.
+
+        allocations: {fund: ([(node, weight), ...], set of holdings sources
+        its row depends on)}. Returns (recomputed, reweighted, unchanged) fund
+        lists: recomputed funds depend on an ETF row rebuilt this run; the
+        others are reweightings of cached rows, with or without new weights.
+        """
+        recomputed, reweighted, unchanged = [], [], []
+        rebuilt = set(self.misses)
+        for fund, (alloc, nodes) in allocations.items():
+            alloc = [[node, float(w)] for node, w in alloc]
+            if nodes & rebuilt:
+                recomputed.append(fund)
+            elif self.funds.get(fund) == alloc:
+                unchanged.append(fund)
+            else:
+                reweighted.append(fund)
+            if self.funds.get(fund) != alloc:
+                self.funds[fund] = alloc
+                self.dirty = True
+        return recomputed, reweighted, unchanged
@@ -0,0 +1,118 @@
+"""
+Company-name normalization shared by the whole pipeline.
+
+normalize_company_name() maps a holding name to the key used to join stocks
+across sources (ETF CSVs, EODHD, fund PDFs): upper-case, strip parentheses,
+articles, share-class markers and corporate suffixes, keep only [A-Z0-9],
+then apply _COMPANY_ALIASES.
+
+All patterns are precompiled, corporate suffixes are dropped in one pass
+over the words of the name, and results are kept in a bounded LRU cache
+shared by every caller in the process. normalize_names() is the vectorised
+path for a whole pandas Series (each distinct name is normalized once).
+"""
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+NORMALIZE_CACHE_SIZE = 1 << 16
+
+_PARENS_RE = re.compile(r'\([^)]*\)')
+_THE_RE = re.compile(r'\bTHE\b')
+_CLASS_RE = re.compile(r'\bCLASS\s+[A-Z]\b')
+_SHS_RE = re.compile(r'\b[A-Z]\s+SHS\b')
+_WORD_RE = re.compile(r'\w+')
+_TRAILING_LETTER_RE = re.compile(r'\s+[A-Z]\s*$')
+_NON_ALNUM_RE = re.compile(r'[^A-Z0-9]+')
+_PUNCT_TABLE = str.maketrans({"'": ' ', '\u2019': ' ', '&': ' AND ', '/': ' '})
+
+# Corporate suffixes removed as whole words ('A/S' is listed for completeness;
+# '/' has already become a space by the time suffixes are stripped)
+CORPORATE_SUFFIXES = frozenset({
+    'INCORPORATED', 'INC', 'CORPORATION', 'CORP', 'COMPANY', 'CO', 'HOLDINGS', 'HOLDING',
+    'GROUP', 'PLC', 'LTD', 'LIMITED', 'NV', 'SA', 'AG', 'SPA', 'OYJ', 'AB', 'A/S', 'SE', 'PL', 'ADR',
+})
+
+
+def _drop_suffix(m):
+    word = m.group(0)
+    return ' ' if word in CORPORATE_SUFFIXES else word
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_company_name(name):
+    """Join key for a company name, e.g. 'Apple Inc.' -> 'APPLE'."""
+    if not name:
+        return ''
+    s = name.upper()
+    s = _PARENS_RE.sub(' ', s)
+    s = s.translate(_PUNCT_TABLE)
+    # THE, CLASS x and x SHS must stay separate passes: removing one can
+    # create a match for the next (e.g. 'B CLASS A SHS')
+    s = _THE_RE.sub(' ', s)
+    s = _CLASS_RE.sub(' ', s)
+    s = _SHS_RE.sub(' ', s)
+    # Remove corporate suffixes
+    s = _WORD_RE.sub(_drop_suffix, s)
+    # Remove trailing single letter (share class indicator: A, B, C, etc.)
+    s = _TRAILING_LETTER_RE.sub(' ', s.strip())
+    s = _NON_ALNUM_RE.sub('', s)
+    return _COMPANY_ALIASES.get(s, s)
+
+
+def normalize_names(names):
+    """normalize_company_name over a Series (or list), one call per distinct name."""
+    names = names if isinstance(names, pd.Series) else pd.Series(names, dtype=object)
+    uniques = pd.unique(names)
+    return names.map(dict(zip(uniques, map(normalize_company_name, uniques))))
+
+
+_COMPANY_ALIASES = {
+    # Big tech variants
+    'NVIDIACORP': 'NVIDIA', 'AMAZONCOM': 'AMAZON', 'AMAZONCOMSERVICES': 'AMAZON',
+    'METAFORMS': 'METAPLATFORMS', 'METAPLATFORMSA': 'METAPLATFORMS',
+    'ALPHABETA': 'ALPHABET', 'ALPHABETCAPITAL': 'ALPHABET',
+    'MICROSOFTCORP': 'MICROSOFT',
+    'APPLEINC': 'APPLE',
+    # TSMC
+    'TAIWANSEMICONDUCTORMANUFACTURING': 'TSMC',
+    'TAIWANSEMICONDUCTOR': 'TSMC', 'TAIWANSEMICONDUCTORMFG': 'TSMC',
+    'TAIWANSEMICONDUCTORMANUFACTURINGCO': 'TSMC',
+    # Financial
+    'JPMORGANCHASEAND': 'JPMORGANCHASE', 'JPMORGAN': 'JPMORGANCHASE',
+    'BERKSHIREHATHAWAY': 'BERKSHIRE', 'BERKSHIREHATHAWAYCAPITAL': 'BERKSHIRE',
+    'GOLDMANSACHS': 'GOLDMANSACHS', 'GOLDMANSACHSINTERNATIONAL': 'GOLDMANSACHS',
+    'MORGANSTANLEY': 'MORGANSTANLEY', 'MORGANSTANLEYANDCO': 'MORGANSTANLEY',
+    'BANKOFAMERICA': 'BOFA', 'BANKAMERICANA': 'BOFA',
+    'MIZUHOFINANCIAL': 'MIZUHO',
+    # Consumer
+    'WALMART': 'WALMARTSTORES', 'WALMARTSTORESWALMART': 'WALMARTSTORES',
+    'PEPSICO': 'PEPSI',
+    'MCDONALDS': 'MCDONALD',
+    'PROCTER': 'PROCTERANDGAMBLE', 'PROCTERCOMGAMBLE': 'PROCTERANDGAMBLE',
+    'COCACOLA': 'COKE', 'COCACOLAEUROPACIFIC': 'COKE',
+    # Healthcare
+    'UNITEDHEALTH': 'UNITEDHEALTH', 'UNITEDHEALTHUNITEDHEALTH': 'UNITEDHEALTH',
+    'JOHNSONANDJOHNSON': 'JNJ', 'JOHNSONJOHNSON': 'JNJ',
+    'ELILILLYAND': 'ELILILLY', 'ELILILLYANDCO': 'ELILILLY',
+    # Industrial/other
+    'HILTONWORLDWIDE': 'HILTON',
+    'GENERALELECTRIC': 'GE', 'GEAEROSPACE': 'GE', 'GEVERNOVA': 'GEVERNOVA',
+    'APPLIEDMATERIALS': 'AMAT',
+    'MICRONTECHNOLOGY': 'MICRONTECHNOLOGIES',
+    'BROADCOM': 'BROADCOM', 'BROADCOMINC': 'BROADCOM',
+    'TOSHIBACORP': 'TOSHIBA',
+    'SAMSUNGELECTRONICS': 'SAMSUNG', 'SAMSUNGELECTRONICSPFD': 'SAMSUNG',
+    'TOYOTAMOTOR': 'TOYOTA', 'TOYOTAMOTORCORP': 'TOYOTA',
+    'SONYGROUP': 'SONY', 'SONYGROUPCORP': 'SONY',
+    'SHELLTRANSPORT': 'SHELL', 'SHELLPLC': 'SHELL',
+    'TOTALENERGIES': 'TOTALENERGIES', 'TOTALENERGIESSE': 'TOTALENERGIES',
+    'NESTLESA': 'NESTLE', 'NESTLE': 'NESTLE',
+    'NOVONORDISK': 'NOVONORDISK', 'NOVONORDISKA': 'NOVONORDISK',
+    'ROCHEGENUSSSCHEIN': 'ROCHE', 'ROCHE': 'ROCHE',
+    'ASMLHOLDING': 'ASML', 'ASML': 'ASML',
+    'LVMHMOETHENNESSY': 'LVMH', 'LVMHMOETHENNESSYLOUISVUITTON': 'LVMH',
+    'SABORIN': 'SAP', 'SAPAG': 'SAP', 'SAPSE': 'SAP',
+    'SIEMENSAG': 'SIEMENS', 'SIEMENS': 'SIEMENS',
+}
@@ -0,0 +1,168 @@
+"""
+Parse cache for investment-report PDFs.
+
+save_parsed() already writes every fund's standardized parse to
+data/parsed/YYYY-MM/<fund>.json. The cache remembers, per month and fund,
+what that file was parsed from:
+  - the SHA-256 of the PDF
+  - a fingerprint of the parser: the source of the fund's parser function
+    and of every function, class, local module, constant and local object
+    (e.g. a section parser's tables) it reaches by global name (so the cache
+    survives edits to the processing code, but not to the parser or its
+    helpers), plus the pdfplumber version
+When both still match, the saved JSON is loaded instead of parsing the PDF
+again. Saved as JSON in data/cache/, like the look-through cache.
+"""
+import hashlib
+import inspect
+import json
+import re
+import types
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+CHUNK = 1 << 20
+CONSTANT_TYPES = (str, int, float, bool, bytes, tuple, list, dict, set, frozenset, re.Pattern)
+
+
+def file_sha256(path):
+    """SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_local(obj):
+    """True for functions, classes and modules defined in this directory."""
+    try:
+        return Path(inspect.getsourcefile(obj)).resolve().parent == HERE
+    except TypeError:
+        return False
+
+
+def _global_names(code):
+    """Global names a code object and its nested functions/comprehensions refer to."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def _describe(value, stack):
+    """Stable text of an instance of a local class: its public attributes, by value.
+
+    Functions and classes it holds count by name and go on stack, to be
+    fingerprinted by source. Private attributes (memoised state) are left out.
+    """
+    if isinstance(value, (types.FunctionType, type, types.ModuleType)):
+        if _is_local(value):
+            stack.append(value)
+        return f'{getattr(value, "__module__", "")}.{getattr(value, "__qualname__", value.__name__)}'
+    if isinstance(value, dict):
+        return '{' + ', '.join(f'{_describe(k, stack)}: {_describe(v, stack)}' for k, v in value.items()) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(_describe(v, stack) for v in value) + ']'
+    if isinstance(value, (set, frozenset)):
+        return '{' + ', '.join(sorted(_describe(v, stack) for v in value)) + '}'
+    if value is None or isinstance(value, CONSTANT_TYPES):
+        return repr(value)
+    if _is_local(type(value)):
+        stack.append(type(value))
+        attrs = {k: v for k, v in vars(value).items() if not k.startswith('_')}
+        return f'{type(value).__qualname__}({_describe(attrs, stack)})'
+    return type(value).__qualname__
+
+
+def code_fingerprint(roots, extras=()):
+    """SHA-256 over the source of roots and everything local they reach by global name.
+
+    Functions and classes from local modules are followed through their global
+    names; local modules used by attribute count with their whole source;
+    constants (str, number, container, regex) count with their repr; instances
+    of local classes count with their public attributes (_describe).
+    """
+    parts = {f'extra:{e}' for e in extras}
+    seen = set()
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        parts.add(f'{getattr(obj, "__module__", "")}.{getattr(obj, "__qualname__", obj.__name__)}:'
+                  f'{inspect.getsource(obj)}')
+        if isinstance(obj, types.ModuleType):
+            continue
+        members = [obj] if inspect.isfunction(obj) else [m for m in vars(obj).values() if inspect.isfunction(m)]
+        for func in members:
+            for name in sorted(_global_names(func.__code__)):
+                if name not in func.__globals__:
+                    continue
+                value = func.__globals__[name]
+                if isinstance(value, (types.FunctionType, type, types.ModuleType)):
+                    if _is_local(value):
+                        stack.append(value)
+                elif isinstance(value, CONSTANT_TYPES):
+                    if isinstance(value, (set, frozenset)):
+                        value = sorted(value, key=repr)
+                    parts.add(f'{func.__module__}.{name}={value!r}')
+                elif _is_local(type(value)):
+                    parts.add(f'{func.__module__}.{name}={_describe(value, stack)}')
+    return hashlib.sha256('\n'.join(sorted(parts)).encode()).hexdigest()
+
+
+class ParseCache:
+    """{month/fund: PDF hash and parser fingerprint} of the saved parses, persisted as JSON."""
+
+    def __init__(self, parsed_dir):
+        self.parsed_dir = parsed_dir
+        self.entries = {}
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, path, parsed_dir):
+        """Load from path; start empty if missing or unreadable."""
+        cache = cls(parsed_dir)
+        if not path.exists():
+            return cache
+        try:
+            cache.entries = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f'  WARNING: Could not read parse cache {path}: {e}')
+        return cache
+
+    def save(self, path):
+        """Write to path if anything changed since load."""
+        if not self.dirty:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.entries, ensure_ascii=False, indent=1, sort_keys=True), encoding='utf-8')
+        self.dirty = False
+
+    def _parsed_path(self, fund_key, month):
+        # Same file name as export_fund_data.save_parsed
+        return self.parsed_dir / month / f"{fund_key.replace(' ', '_').replace('+', 'plus')}.json"
+
+    def get(self, fund_key, month, pdf_hash, parser):
+        """The saved parse of fund_key for month if it came from this PDF and parser, else None."""
+        entry = self.entries.get(f'{month}/{fund_key}')
+        path = self._parsed_path(fund_key, month)
+        if entry != {'pdf': pdf_hash, 'parser': parser} or not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    def put(self, fund_key, month, pdf_hash, parser):
+        """Record that the saved parse of fund_key for month came from this PDF and parser."""
+        entry = {'pdf': pdf_hash, 'parser': parser}
+        if self.entries.get(f'{month}/{fund_key}') != entry:
+            self.entries[f'{month}/{fund_key}'] = entry
+            self.dirty = True
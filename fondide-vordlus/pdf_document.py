@@ -0,0 +1,293 @@
+"""
+Shared page-level access to report PDFs for the parsers.
+
+Every parser used to open its PDF with pdfplumber and extract what it needed
+page by page, so a file read by two parsers (or twice by one) was laid out
+twice. open_document() hands out one PdfDocument per file content (SHA-256):
+  - page count, page sizes, text, words and chars are extracted lazily and
+    memoised per page and extraction parameters
+  - release(i) drops the backend's parsed objects of page i once a parser is
+    done with it; texts() does so while iterating, so long reports never
+    hold more than one laid-out page
+  - with set_document_cache(dir), page counts, sizes, text and words are also
+    saved to dir/<sha256>.json, keyed by parameters and the pdfplumber
+    version. A PDF whose extractions are all on disk is never opened. Chars
+    are only memoised in memory.
+The MAX_DOCUMENTS most recently used documents stay memoised between calls.
+
+Pages are read by one of two backends (set_document_backend(), or per
+document with open_document(path, backend=...)):
+  - 'pdfminer' (default): pdfminer.six interprets each page into lean char
+    records: text, box, upright, size. pdfminer's layout analysis is off
+    (LAParams None), and so is building LTCurve/LTRect/LTImage objects for
+    paths and images, which the parsers never read. Text and words are then
+    laid out by pdfplumber's own line/word clustering (chars_to_textmap,
+    extract_words), so they are identical to the pdfplumber backend's.
+  - 'pdfplumber': pdfplumber's full page model, where every char becomes a
+    dict of ~20 attributes (fonts, colours, matrix, marked content). Kept
+    for compatibility and for chars() callers that need those attributes.
+benchmarks/bench_pdf_backends.py checks both give identical parses.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+
+import pdfplumber
+from pdfminer.converter import PDFLayoutAnalyzer
+from pdfminer.pdfinterp import PDFPageInterpreter
+from pdfplumber.utils import chars_to_textmap, extract_words
+from pdfplumber.utils.exceptions import PdfminerException
+
+MAX_DOCUMENTS = 4
+CHUNK = 1 << 20
+DEFAULT_BACKEND = 'pdfminer'
+
+_DOCUMENTS = OrderedDict()
+_SETTINGS = {'cache_dir': None, 'backend': DEFAULT_BACKEND}
+
+
+def set_document_cache(cache_dir):
+    """Persist page extractions under cache_dir (None: memory only)."""
+    _SETTINGS['cache_dir'] = cache_dir
+
+
+def set_document_backend(backend):
+    """Read pages with backend ('pdfminer' or 'pdfplumber') from now on."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+    _SETTINGS['backend'] = backend
+
+
+def clear_documents():
+    """Forget all memoised documents (e.g. between benchmark runs)."""
+    while _DOCUMENTS:
+        _DOCUMENTS.popitem()[1].close()
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def open_document(pdf_path, backend=None):
+    """The PdfDocument for pdf_path's content (shared by every parser reading it)."""
+    backend = backend or _SETTINGS['backend']
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+    sha = _file_sha256(pdf_path)
+    doc = _DOCUMENTS.pop((sha, backend), None)
+    if doc is None:
+        doc = PdfDocument(pdf_path, sha, _SETTINGS['cache_dir'], backend)
+    _DOCUMENTS[(sha, backend)] = doc
+    while len(_DOCUMENTS) > MAX_DOCUMENTS:
+        _DOCUMENTS.popitem(last=False)[1].close()
+    return doc
+
+
+def _key(kind, page, params):
+    return f'{kind}:{page}:{json.dumps(params, sort_keys=True)}'
+
+
+# ── Backends ──
+
+class PlumberPages:
+    """pdfplumber's page model (compatibility backend)."""
+
+    def __init__(self, path):
+        self.pdf = pdfplumber.open(path)
+
+    def __len__(self):
+        return len(self.pdf.pages)
+
+    def size(self, i):
+        page = self.pdf.pages[i]
+        return [page.width, page.height]
+
+    def text(self, i, **params):
+        return self.pdf.pages[i].extract_text(**params)
+
+    def words(self, i, **params):
+        return self.pdf.pages[i].extract_words(**params)
+
+    def chars(self, i):
+        return self.pdf.pages[i].chars
+
+    def release(self, i):
+        self.pdf.pages[i].close()
+
+    def close(self):
+        self.pdf.close()
+
+
+class _CharCollector(PDFLayoutAnalyzer):
+    """pdfminer device keeping a page's chars as the records pdfplumber's text and word clustering read.
+
+    Coordinates are converted exactly as pdfplumber's Page.process_object does.
+    Paths and images are dropped unrendered.
+    """
+
+    def __init__(self, rsrcmgr, page):
+        super().__init__(rsrcmgr, pageno=page.page_number, laparams=None)
+        self.chars = []
+        self.height = page.height
+        self.mb_x0, self.mb_top = page.mediabox[:2]
+        self.initial_doctop = page.initial_doctop
+
+    def render_char(self, *args):
+        adv = super().render_char(*args)
+        c = self.cur_item._objs.pop()
+        top = (self.height - c.y1) + self.mb_top
+        self.chars.append({
+            'text': c.get_text(),
+            'x0': c.x0 + self.mb_x0, 'x1': c.x1 + self.mb_x0,
+            'top': top, 'bottom': (self.height - c.y0) + self.mb_top,
+            'doctop': self.initial_doctop + top,
+            'width': c.width, 'height': c.height,
+            'upright': c.upright, 'size': c.size,
+        })
+        return adv
+
+    def paint_path(self, *args):
+        pass
+
+    def render_image(self, *args):
+        pass
+
+
+class MinerPages(PlumberPages):
+    """pdfminer.six chars laid out by pdfplumber's text utilities (fast backend).
+
+    pdfplumber still opens the document, for its resource manager and page
+    geometry (boxes, rotation, doctop); its per-page object model is never built.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._chars = {}
+
+    def chars(self, i):
+        if i not in self._chars:
+            page = self.pdf.pages[i]
+            device = _CharCollector(self.pdf.rsrcmgr, page)
+            try:
+                PDFPageInterpreter(self.pdf.rsrcmgr, device).process_page(page.page_obj)
+            except Exception as e:   # any pdfminer failure, wrapped as pdfplumber's Page does
+                raise PdfminerException(e) from e
+            self._chars[i] = device.chars
+        return self._chars[i]
+
+    def text(self, i, **params):
+        # Same defaults as pdfplumber's Page.extract_text
+        page = self.pdf.pages[i]
+        params = {k: tuple(v) if isinstance(v, list) else v for k, v in params.items()}
+        defaults = {'layout_bbox': page.bbox}
+        if 'layout_width_chars' not in params:
+            defaults['layout_width'] = page.width
+        if 'layout_height_chars' not in params:
+            defaults['layout_height'] = page.height
+        return chars_to_textmap(self.chars(i), **{**defaults, **params}).as_string
+
+    def words(self, i, **params):
+        return extract_words(self.chars(i), **params)
+
+    def release(self, i):
+        self._chars.pop(i, None)
+        super().release(i)
+
+
+BACKENDS = {'pdfminer': MinerPages, 'pdfplumber': PlumberPages}
+
+
+class PdfDocument:
+    """One PDF, opened on first use, with memoised per-page extractions.
+
+    Use as a context manager: leaving it closes the PDF (memoised extractions
+    stay) and writes new extractions to the disk cache.
+    """
+
+    def __init__(self, path, sha, cache_dir=None, backend=DEFAULT_BACKEND):
+        self.path = path
+        self.sha = sha
+        self.backend = backend
+        self.cache_path = cache_dir / f'{sha}.json' if cache_dir is not None else None
+        self._pdf = None
+        self._memo = {}
+        self._dirty = False
+        if self.cache_path is not None and self.cache_path.exists():
+            try:
+                saved = json.loads(self.cache_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                print(f'  WARNING: Could not read PDF text cache {self.cache_path}: {e}')
+            else:
+                if saved.get('pdfplumber') == pdfplumber.__version__:
+                    self._memo = saved['pages']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._get('pages', -1, {}, lambda: len(self._open()))
+
+    def _open(self):
+        if self._pdf is None:
+            self._pdf = BACKENDS[self.backend](self.path)
+        return self._pdf
+
+    def _get(self, kind, page, params, extract):
+        key = _key(kind, page, params)
+        if key not in self._memo:
+            self._memo[key] = extract()
+            self._dirty = self.cache_path is not None
+        return self._memo[key]
+
+    # ── Extractions ──
+
+    def size(self, i):
+        """(width, height) of page i."""
+        return tuple(self._get('size', i, {}, lambda: self._open().size(i)))
+
+    def width(self, i):
+        return self.size(i)[0]
+
+    def text(self, i, **params):
+        """page.extract_text(**params) of page i ('' for a page without text)."""
+        return self._get('text', i, params, lambda: self._open().text(i, **params) or '')
+
+    def words(self, i, **params):
+        """page.extract_words(**params) of page i."""
+        return self._get('words', i, params, lambda: self._open().words(i, **params))
+
+    def chars(self, i):
+        """Chars of page i (memoised in memory only; the pdfminer backend's carry position and text only)."""
+        return self._open().chars(i)
+
+    def texts(self, start=0, **params):
+        """Text of each page from start on, releasing every page once its text is out."""
+        for i in range(start, len(self)):
+            yield self.text(i, **params)
+            self.release(i)
+
+    # ── Lifetime ──
+
+    def release(self, i):
+        """Drop the parsed objects and chars of page i (text and words stay)."""
+        if self._pdf is not None:
+            self._pdf.release(i)
+
+    def close(self):
+        """Close the PDF and save new extractions to the disk cache."""
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        if self._dirty:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            data = {'pdfplumber': pdfplumber.__version__, 'pages': self._memo}
+            self.cache_path.write_text(json.dumps(data, ensure_ascii=False, separators=(',', ':')),
+                                       encoding='utf-8')
+            self._dirty = False
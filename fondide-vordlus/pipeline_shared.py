@@ -7,17 +7,38 @@ Exports unified JSON to docs/fondide-vordlus/.
 """
 import argparse
 import csv
+import hashlib
+import inspect
 import io
 import json
 import os
 import re
 import urllib.request
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-import pdfplumber
+
+import name_normalizer
+from benchmark_index import (
+    EXCLUDED_SECTORS,
+    BenchmarkIndex,
+    ranked,
+    sector_country_weights,
+)
+from exposure_history import save_month
+from holdings_archive import HoldingsArchive
+from holdings_cache import HoldingsCache
+from lookthrough import AllocationMatrix, LookthroughEngine, RowLabels
+from lookthrough_cache import RowCache
+from name_normalizer import _COMPANY_ALIASES, normalize_company_name
+from pdf_document import open_document
+from scenarios import ScenarioModel
+from section_parser import Rule, Section, SectionParser, contains
+from sector_matcher import SectorMatcher
+from security_master import SecurityMaster
+from weight_store import WeightRow, WeightStore, union_correlations
 
 # Load .env file if present (for EODHD_API_KEY etc.)
 _env_path = Path('.env')
@@ -52,8 +73,14 @@ ISHARES_PRODUCTS = {
     'ISAC': {'id': 251850, 'slug': 'ishares-msci-acwi-ucits-etf'},  # same as SSAC
     'EMXC': {'id': 315592, 'slug': 'ishares-msci-em-ex-china-ucits-etf'},
 }
-SUB_ETF_TICKERS = {'NDIA', '4BRZ', 'CNYA', 'IKSA'}
+# ETF holdings truncated to their largest positions before look-through.
+# Sub-ETFs (e.g. NDIA/4BRZ/CNYA/IKSA inside SSAC) need no config: any position
+# whose ticker is itself a loaded holdings source is looked through recursively.
 SAEM_TOP_N = 1500
+LOOKTHROUGH_TOP_N = {'SAEM': SAEM_TOP_N}
+# Full-universe mode (--full-universe) keeps every constituent instead and
+# folds holdings too small to show (weight rounds to 0.000) into 'other_holdings'
+FULL_UNIVERSE_MIN_WEIGHT = 0.0005
 
 # MSCI Emerging Markets country classification (used to extract EM from SSAC/ACWI)
 EM_COUNTRIES = {
@@ -366,8 +393,8 @@ def parse_tuleva_monthly(pdf_path):
     Returns: {allocations: [{name, isin, weight_pct, value_eur}], deposits_pct: float,
               _pdf_subtotals, _pdf_holding_counts, _total_value_eur}
     """
-    with pdfplumber.open(pdf_path) as pdf:
-        text = pdf.pages[0].extract_text() or ''
+    with open_document(pdf_path) as doc:
+        text = doc.text(0)
 
     allocations = []
     in_equity_funds = False
@@ -449,8 +476,8 @@ def parse_tuleva_bond_monthly(pdf_path):
     Returns: {bond_funds: [{name, isin, weight_pct, value_eur}], deposits_pct: float,
               _pdf_subtotals, _pdf_holding_counts, _total_value_eur}
     """
-    with pdfplumber.open(pdf_path) as pdf:
-        text = pdf.pages[0].extract_text() or ''
+    with open_document(pdf_path) as doc:
+        text = doc.text(0)
 
     bond_funds = []
     in_bond_funds = False
@@ -524,214 +551,101 @@ def parse_tuleva_bond_monthly(pdf_path):
     }
 
 
+# ── Swedbank section tables ──
+# Section headers are bare ('AKTSIAD', 'AKTSIAD (järg)' on continuation
+# pages), subtotals are 'AKTSIAD KOKKU ... 29,37%'. FONDIOSAKUD holds fund
+# subsections, each closed by its own '... kokku' line.
+
+_NO_KOKKU = r'(?!(?i:.*kokku))'   # the line has no 'kokku' in any case
+_SWEDBANK_PCT_RE = re.compile(r'(\d+[\.,]\d+)\s*%')
+_SWEDBANK_ROW_PCT_RE = re.compile(r'(\d+[\.,]\d+%)')
+_SWEDBANK_FUND_SUBSECTIONS = [
+    # (header prefix, subtotal prefix, key)
+    ('Aktsiafondid', 'Aktsiafondid kokku', 'equity_funds'),
+    ('Kinnisvarafondid', 'Kinnisvarafondid kokku', 're_funds'),
+    ('Private Equity', 'Private Equity fondid kokku', 'pe_funds'),
+    ('Võlakirjafondid', 'Võlakirjafondid kokku', 'bond_funds'),
+]
+
+_SWEDBANK_RULES = [
+    Rule(r'AKTSIAD(?:\Z| \(järg\))', goto='stocks'),
+    Rule(r'AKTSIAD KOKKU', goto=None, subtotal='stocks'),
+    Rule(r'VÕLAKIRJAD(?:\Z| \(järg\))', goto='bonds'),
+    Rule(r'VÕLAKIRJAD KOKKU', goto=None, subtotal='bonds'),
+    Rule(r'FONDIOSAKUD(?:\Z| \(järg\))', goto='fondiosakud'),
+    Rule(r'FONDIOSAKUD KOKKU', goto=None),
+    Rule(r'HOIUSED KOKKU', total='deposits_pct', pct=_SWEDBANK_ROW_PCT_RE, deposit_eur=True),
+    Rule(r'TULETISINSTRUMENDID KOKKU', total='derivatives_pct', pct=re.compile(r'-?\d+[\.,]\d+%')),
+]
+for _header, _subtotal, _key in _SWEDBANK_FUND_SUBSECTIONS:
+    _SWEDBANK_RULES += [
+        Rule(_NO_KOKKU + re.escape(_header), goto=f'fondiosakud/{_key}', within='fondiosakud'),
+        Rule(re.escape(_subtotal), goto='fondiosakud', subtotal=_key, within='fondiosakud'),
+    ]
+_SWEDBANK_RULES.append(Rule(contains(['Nimetus', 'maksumus', 'puhasväärtusest'])))   # column headers
+
+
+def _swedbank_stock(row, target):
+    after_isin = row.line[row.isin_match.end():].strip()
+    country_m = re.match(r'([A-Z]{2})\s', after_isin)
+    entry = {'name': _clean_swedbank_name(row.line[:row.isin_match.start()].strip()), 'isin': row.isin,
+             'country': country_m.group(1) if country_m else '', 'weight_pct': row.weight}
+    if row.value_eur:
+        entry['value_eur'] = row.value_eur
+    return entry
+
+
+def _swedbank_bond(row, target):
+    entry = {'name': row.line[:row.isin_match.start()].strip(), 'isin': row.isin, 'weight_pct': row.weight}
+    if row.value_eur:
+        entry['value_eur'] = row.value_eur
+    return entry
+
+
+def _swedbank_fund(row, target):
+    # Name: everything before ISIN, or full line if no ISIN
+    name_part = row.line[:row.isin_match.start()].strip() if row.isin_match else row.line
+    entry = {'name': _strip_fund_manager_suffix(name_part), 'weight_pct': row.weight}
+    if row.isin:
+        entry['isin'] = row.isin
+    if row.value_eur:
+        entry['value_eur'] = row.value_eur
+    return entry
+
+
+_SWEDBANK_SECTIONS = {
+    'stocks': Section('stocks', count='stocks', make=_swedbank_stock, pct=_SWEDBANK_ROW_PCT_RE,
+                      isin_required=True, min_weight=0),
+    'bonds': Section('bonds', count='bonds', make=_swedbank_bond, pct=_SWEDBANK_ROW_PCT_RE,
+                     weight='last', isin_required=True),
+}
+for _header, _subtotal, _key in _SWEDBANK_FUND_SUBSECTIONS:
+    _SWEDBANK_SECTIONS[f'fondiosakud/{_key}'] = Section(_key, count=_key, make=_swedbank_fund,
+                                                        pct=_SWEDBANK_ROW_PCT_RE, min_weight=0)
+
+_SWEDBANK_PARSER = SectionParser(_SWEDBANK_RULES, _SWEDBANK_SECTIONS, pct=_SWEDBANK_PCT_RE, pct_value=_pct,
+                                 isin_re=ISIN_RE, eur_value=_extract_eur_value,
+                                 deposit_eur=_extract_deposit_eur,
+                                 totals={'deposits_pct': 0.0, 'derivatives_pct': 0.0})
+
+
 def parse_swedbank_monthly(pdf_path):
     """Parse Swedbank K-series monthly investment report.
     Returns: {stocks, bonds, equity_funds, bond_funds, re_funds, pe_funds,
               deposits_pct, derivatives_pct,
               _pdf_subtotals, _pdf_holding_counts, _total_value_eur}
     """
-    stocks = []
-    bonds = []
-    equity_funds = []
-    bond_funds = []
-    re_funds = []
-    pe_funds = []
-    in_section = None
-    in_sub = None  # sub-section within FONDIOSAKUD
-    deposits_pct = 0.0
-    derivatives_pct = 0.0
-    pdf_subtotals = {}
-    pdf_holding_counts = {}  # section → count of data lines with %
-    total_value_eur = 0
-
-    # Track current section key for holding counts
-    def _count_key():
-        if in_section == 'stocks':
-            return 'stocks'
-        if in_section == 'bonds':
-            return 'bonds'
-        if in_section == 'fondiosakud' and in_sub:
-            return in_sub
-        return None
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ''
-            for line in text.splitlines():
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Section transitions
-                if line == 'AKTSIAD' or line.startswith('AKTSIAD (järg)'):
-                    in_section = 'stocks'
-                    continue
-                if line.startswith('AKTSIAD KOKKU'):
-                    pct_m = re.findall(r'(\d+[\.,]\d+)\s*%', line)
-                    if pct_m:
-                        pdf_subtotals['stocks'] = _pct(pct_m[0] + '%')
-                    in_section = None
-                    continue
-                if line == 'VÕLAKIRJAD' or line.startswith('VÕLAKIRJAD (järg)'):
-                    in_section = 'bonds'
-                    continue
-                if line.startswith('VÕLAKIRJAD KOKKU'):
-                    pct_m = re.findall(r'(\d+[\.,]\d+)\s*%', line)
-                    if pct_m:
-                        pdf_subtotals['bonds'] = _pct(pct_m[0] + '%')
-                    in_section = None
-                    continue
-                if line == 'FONDIOSAKUD' or line.startswith('FONDIOSAKUD (järg)'):
-                    in_section = 'fondiosakud'
-                    in_sub = None
-                    continue
-                if line.startswith('FONDIOSAKUD KOKKU'):
-                    in_section = None
-                    in_sub = None
-                    continue
-                if line.startswith('HOIUSED KOKKU'):
-                    pct_m = re.findall(r'(\d+[\.,]\d+%)', line)
-                    if pct_m:
-                        deposits_pct = _pct(pct_m[0])
-                    dep_val = _extract_deposit_eur(line)
-                    if dep_val:
-                        total_value_eur += dep_val
-                    continue
-                if line.startswith('TULETISINSTRUMENDID KOKKU'):
-                    pct_m = re.findall(r'-?\d+[\.,]\d+%', line)
-                    if pct_m:
-                        derivatives_pct = _pct(pct_m[0])
-                    continue
-
-                # Sub-section transitions within FONDIOSAKUD
-                if in_section == 'fondiosakud':
-                    if line.startswith('Aktsiafondid') and 'kokku' not in line.lower():
-                        in_sub = 'equity_funds'
-                        continue
-                    if line.startswith('Aktsiafondid kokku'):
-                        pct_m = re.findall(r'(\d+[\.,]\d+)\s*%', line)
-                        if pct_m:
-                            pdf_subtotals['equity_funds'] = _pct(pct_m[0] + '%')
-                        in_sub = None
-                        continue
-                    if line.startswith('Kinnisvarafondid') and 'kokku' not in line.lower():
-                        in_sub = 're_funds'
-                        continue
-                    if line.startswith('Kinnisvarafondid kokku'):
-                        pct_m = re.findall(r'(\d+[\.,]\d+)\s*%', line)
-                        if pct_m:
-                            pdf_subtotals['re_funds'] = _pct(pct_m[0] + '%')
-                        in_sub = None
-                        continue
-                    if line.startswith('Private Equity') and 'kokku' not in line.lower():
-                        in_sub = 'pe_funds'
-                        continue
-                    if line.startswith('Private Equity fondid kokku'):
-                        pct_m = re.findall(r'(\d+[\.,]\d+)\s*%', line)
-                        if pct_m:
-                            pdf_subtotals['pe_funds'] = _pct(pct_m[0] + '%')
-                        in_sub = None
-                        continue
-                    if line.startswith('Võlakirjafondid') and 'kokku' not in line.lower():
-                        in_sub = 'bond_funds'
-                        continue
-                    if line.startswith('Võlakirjafondid kokku'):
-                        pct_m = re.findall(r'(\d+[\.,]\d+)\s*%', line)
-                        if pct_m:
-                            pdf_subtotals['bond_funds'] = _pct(pct_m[0] + '%')
-                        in_sub = None
-                        continue
-
-                # Skip headers
-                if any(x in line for x in ['Nimetus', 'maksumus', 'puhasväärtusest']):
-                    continue
-
-                # Count data lines with percentage per section
-                ck = _count_key()
-                if ck and re.search(r'\d+[\.,]\d+%', line):
-                    pdf_holding_counts[ck] = pdf_holding_counts.get(ck, 0) + 1
-
-                if in_section == 'stocks':
-                    isin_match = ISIN_RE.search(line)
-                    if not isin_match:
-                        continue
-                    isin = isin_match.group(0)
-                    pct_matches = re.findall(r'(\d+[\.,]\d+%)', line)
-                    if not pct_matches:
-                        continue
-                    weight = _pct(pct_matches[0])
-                    if weight <= 0:
-                        continue
-                    value_eur = _extract_eur_value(line)
-                    if value_eur:
-                        total_value_eur += value_eur
-                    name_part = line[:isin_match.start()].strip()
-                    after_isin = line[isin_match.end():].strip()
-                    country_m = re.match(r'([A-Z]{2})\s', after_isin)
-                    country = country_m.group(1) if country_m else ''
-                    name = _clean_swedbank_name(name_part)
-                    entry = {'name': name, 'isin': isin, 'country': country, 'weight_pct': weight}
-                    if value_eur:
-                        entry['value_eur'] = value_eur
-                    stocks.append(entry)
-
-                elif in_section == 'bonds':
-                    isin_match = ISIN_RE.search(line)
-                    if not isin_match:
-                        continue
-                    pct_matches = re.findall(r'(\d+[\.,]\d+%)', line)
-                    if not pct_matches:
-                        continue
-                    weight = _pct(pct_matches[-1])
-                    value_eur = _extract_eur_value(line)
-                    if value_eur:
-                        total_value_eur += value_eur
-                    name = line[:isin_match.start()].strip()
-                    entry = {'name': name, 'isin': isin_match.group(0), 'weight_pct': weight}
-                    if value_eur:
-                        entry['value_eur'] = value_eur
-                    bonds.append(entry)
-
-                elif in_section == 'fondiosakud' and in_sub:
-                    pct_matches = re.findall(r'(\d+[\.,]\d+%)', line)
-                    if not pct_matches:
-                        continue
-                    weight = _pct(pct_matches[0])
-                    if weight <= 0:
-                        continue
-                    value_eur = _extract_eur_value(line)
-                    if value_eur:
-                        total_value_eur += value_eur
-                    isin_match = ISIN_RE.search(line)
-                    isin = isin_match.group(0) if isin_match else None
-                    # Name: everything before ISIN, or full line if no ISIN
-                    if isin_match:
-                        name_part = line[:isin_match.start()].strip()
-                    else:
-                        name_part = line
-                    name_part = _strip_fund_manager_suffix(name_part)
-                    entry = {'name': name_part, 'weight_pct': weight}
-                    if isin:
-                        entry['isin'] = isin
-                    if value_eur:
-                        entry['value_eur'] = value_eur
-                    if in_sub == 'equity_funds':
-                        equity_funds.append(entry)
-                    elif in_sub == 'bond_funds':
-                        bond_funds.append(entry)
-                    elif in_sub == 're_funds':
-                        re_funds.append(entry)
-                    elif in_sub == 'pe_funds':
-                        pe_funds.append(entry)
-
+    with open_document(pdf_path) as doc:
+        result = _SWEDBANK_PARSER.parse(doc.texts())
+    rows = result.rows
     return {
-        'stocks': stocks, 'bonds': bonds,
-        'equity_funds': equity_funds, 'bond_funds': bond_funds,
-        'pe_funds': pe_funds, 're_funds': re_funds,
-        'deposits_pct': deposits_pct, 'derivatives_pct': derivatives_pct,
-        '_pdf_subtotals': pdf_subtotals,
-        '_pdf_holding_counts': pdf_holding_counts,
-        '_total_value_eur': total_value_eur,
+        'stocks': rows['stocks'], 'bonds': rows['bonds'],
+        'equity_funds': rows['equity_funds'], 'bond_funds': rows['bond_funds'],
+        'pe_funds': rows['pe_funds'], 're_funds': rows['re_funds'],
+        'deposits_pct': result.totals['deposits_pct'], 'derivatives_pct': result.totals['derivatives_pct'],
+        '_pdf_subtotals': result.subtotals,
+        '_pdf_holding_counts': result.counts,
+        '_total_value_eur': result.total_value_eur,
     }
 
 
@@ -793,9 +707,8 @@ def parse_luminor_monthly(pdf_path):
     current_section = None
     pending_name = ''
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ''
+    with open_document(pdf_path) as doc:
+        for text in doc.texts():
             for line in text.splitlines():
                 line = line.strip()
                 if not line:
@@ -910,205 +823,229 @@ def _clean_luminor_name(raw):
     return result
 
 
-def parse_seb_pdf(pdf_path):
-    """Parse any SEB fund investment report PDF using word-level extraction.
+# ── SEB report layout ──
+
+# Strategy descriptions that mark where an SEB fund name ends
+_SEB_STRATEGY_PATTERNS = [
+    r'\s+Vastutustundlik\b.*',
+    r'\s+Euroopa\s+(pangandussektori|aktsiate|ehituse|ettevõtete|võlakirjade).*',
+    r'\s+USA\s+(tehnoloogia|aktsiate|väikeettevõtete).*',
+    r'\s+Globaalne\b.*',
+    r'\s+Ida-Euroopa\b.*',
+    r'\s+Poola\s+aktsiate.*',
+    r'\s+Jaapani\s+aktsiate.*',
+    r'\s+Eesti,\s+Läti.*',
+    r'\s+Eesti\s+metsafond.*',
+    r'\s+Varajases\b.*',
+    r'\s+arenevate\b.*',
+    r'\s+Šiauliai\b.*',
+    r'\s+Inbank\s+võlakiri.*',
+    r'\s+LHV\s+panga\b.*',
+    r'\s+Luminor\s+panga\b.*',
+    r'\s+IT\s+firma\b.*',
+    r'\s+Bigpank\b.*',
+    r'\s+Coop\s+panga\b.*',
+    r'\s+Eesti\s+Energia\b.*',
+    r'\s+Ignitise\b.*',
+    r'\s+Hepsori\b.*',
+    r'\s+Tallinna\s+Sadama\b.*',
+    r'\s+Leedu\s+energia.*',
+    r'\s+Läti\s+energia.*',
+    r'\s+Läti\s+võrgu.*',
+    r'\s+Saksamaa\b.*',
+    r'\s+Prantsusmaa\b.*',
+    r'\s+Eesti\s+valitsusvõla.*',
+    r'\s+Artea\s+panga\b.*',
+    r'\s+Citadele\s+panga\b.*',
+    r'\s+SEB\s+börsiväliste\b.*',
+]
+_SEB_STRATEGY_RES = [re.compile(p) for p in _SEB_STRATEGY_PATTERNS]
+# One alternation over all patterns: names it does not match (most rows) skip the ordered search
+_SEB_STRATEGY_ANY = re.compile('|'.join(f'(?:{p})' for p in _SEB_STRATEGY_PATTERNS))
+_SEB_FOOTNOTES_RE = re.compile(r'[¹²³]+')
+_SEB_COUNTRY_SUFFIX_RE = re.compile(r'\s+(Eesti|Leedu|Läti|Iirimaa|Rootsi|Saksamaa|Luksemburg|'
+                                    r'Hispaania|Prantsusmaa|Suurbritannia|Artea|Citadele|'
+                                    r'LHV|Luminor|IT|Šiauliai)\s*$')
+_SEB_SPACES_RE = re.compile(r'\s+')
+_SEB_PCT_RE = re.compile(r'^(-?\d+[\.,]\d+)%$')
+_SEB_DIGITS_RE = re.compile(r'^[\d\s]+$')
+_SEB_NUMERIC_RE = re.compile(r'^[\d\s,\.]+$')
+_SEB_DATE_RE = re.compile(r'seisuga (\d{2}\.\d{2}\.\d{4})')
+_SEB_SKIP_PREFIXES = ('Reguleeritud', 'Taristui', 'Investeering Fondi', 'Emitendi')
+_SEB_WORD_PARAMS = {'x_tolerance': 5, 'y_tolerance': 3, 'keep_blank_chars': False}
+
+
+def _seb_trim_strategy(name):
+    """Cut an SEB name at the first strategy pattern (in list order) found past its first 5 chars."""
+    if not _SEB_STRATEGY_ANY.search(name):
+        return name
+    for pat in _SEB_STRATEGY_RES:
+        m = pat.search(name)
+        if m and m.start() > 5:
+            return name[:m.start()].strip()
+    return name
 
-    Uses pdfplumber word extraction with coordinates to match names, ISINs,
-    percentages, and EUR values that appear on the same row (same y-coordinate).
-    Works for both inline and multi-column SEB PDF layouts.
 
-    Returns dict with keys: equity_funds, bonds, stocks, re_funds, pe_funds,
-    bond_funds, deposits_pct, derivatives_pct.
-    Each list contains dicts: {name, isin, weight_pct, value_eur}.
+def _seb_clean_name(name):
+    name = _SEB_FOOTNOTES_RE.sub('', name).strip()
+    name = _SEB_COUNTRY_SUFFIX_RE.sub('', name)
+    return _SEB_SPACES_RE.sub(' ', name).strip()
+
+
+def _seb_page_rows(words, y_merge=3):
+    """Text rows of an SEB page's words: [(words sorted by x, row text)], top to bottom.
+
+    Words are bucketed by top (to 0.1 pt); a row starts at the first unused
+    bucket and takes every later bucket within y_merge of it, in one sweep
+    over the sorted tops.
     """
-    from collections import defaultdict
-
-    # Strategy patterns that mark where the fund name ends
-    _STRATEGY_PATTERNS = [
-        r'\s+Vastutustundlik\b.*',
-        r'\s+Euroopa\s+(pangandussektori|aktsiate|ehituse|ettevõtete|võlakirjade).*',
-        r'\s+USA\s+(tehnoloogia|aktsiate|väikeettevõtete).*',
-        r'\s+Globaalne\b.*',
-        r'\s+Ida-Euroopa\b.*',
-        r'\s+Poola\s+aktsiate.*',
-        r'\s+Jaapani\s+aktsiate.*',
-        r'\s+Eesti,\s+Läti.*',
-        r'\s+Eesti\s+metsafond.*',
-        r'\s+Varajases\b.*',
-        r'\s+arenevate\b.*',
-        r'\s+Šiauliai\b.*',
-        r'\s+Inbank\s+võlakiri.*',
-        r'\s+LHV\s+panga\b.*',
-        r'\s+Luminor\s+panga\b.*',
-        r'\s+IT\s+firma\b.*',
-        r'\s+Bigpank\b.*',
-        r'\s+Coop\s+panga\b.*',
-        r'\s+Eesti\s+Energia\b.*',
-        r'\s+Ignitise\b.*',
-        r'\s+Hepsori\b.*',
-        r'\s+Tallinna\s+Sadama\b.*',
-        r'\s+Leedu\s+energia.*',
-        r'\s+Läti\s+energia.*',
-        r'\s+Läti\s+võrgu.*',
-        r'\s+Saksamaa\b.*',
-        r'\s+Prantsusmaa\b.*',
-        r'\s+Eesti\s+valitsusvõla.*',
-        r'\s+Artea\s+panga\b.*',
-        r'\s+Citadele\s+panga\b.*',
-        r'\s+SEB\s+börsiväliste\b.*',
-    ]
+    tops = [round(w['top'], 1) for w in words]
+    order = sorted(range(len(words)), key=tops.__getitem__)
+    rows = []
+    group, anchor = [], None
+    for i in order:
+        if anchor is None or tops[i] - anchor > y_merge:
+            if group:
+                rows.append(group)
+            group, anchor = [], tops[i]
+        group.append(words[i])
+    if group:
+        rows.append(group)
+    result = []
+    for group in rows:
+        rw = sorted(group, key=lambda w: w['x0'])
+        result.append((rw, ' '.join(w['text'] for w in rw)))
+    return result
 
-    def _trim_strategy(name):
-        for pat in _STRATEGY_PATTERNS:
-            m = re.search(pat, name)
-            if m and m.start() > 5:
-                return name[:m.start()].strip()
-        return name
 
-    def _clean_name(name):
-        name = re.sub(r'[¹²³]+', '', name).strip()
-        name = re.sub(r'\s+(Eesti|Leedu|Läti|Iirimaa|Rootsi|Saksamaa|Luksemburg|'
-                      r'Hispaania|Prantsusmaa|Suurbritannia|Artea|Citadele|'
-                      r'LHV|Luminor|IT|Šiauliai)\s*$', '', name)
-        name = re.sub(r'\s+', ' ', name).strip()
-        return name
+def _seb_page_date(rows):
+    """First 'seisuga DD.MM.YYYY' date on a page, or None."""
+    for _, full in rows:
+        m = _SEB_DATE_RE.search(full)
+        if m:
+            return m.group(1)
+    return None
 
-    def _extract_page(page, y_merge=3):
-        words = page.extract_words(x_tolerance=5, y_tolerance=3,
-                                   keep_blank_chars=False)
-        pw = page.width
-
-        # Group words by y, merging nearby rows
-        raw = defaultdict(list)
-        for w in words:
-            raw[round(w['top'], 1)].append(w)
-        sorted_ys = sorted(raw.keys())
-        merged = {}
-        used = set()
-        for y in sorted_ys:
-            if y in used:
-                continue
-            group = list(raw[y])
-            used.add(y)
-            for y2 in sorted_ys:
-                if y2 not in used and abs(y2 - y) <= y_merge:
-                    group.extend(raw[y2])
-                    used.add(y2)
-            merged[y] = group
-
-        items = []
-        section = None
-
-        for y in sorted(merged.keys()):
-            rw = sorted(merged[y], key=lambda w: w['x0'])
-            full = ' '.join(w['text'] for w in rw)
-
-            # Name from leftmost column
-            nlim = pw * 0.25
-            nwords = [w['text'] for w in rw if w['x0'] < nlim]
-            nraw = ' '.join(nwords).strip()
-
-            # Section detection
-            if 'Fondi liik' in full:
-                if 'Aktsiafond' in full:
-                    section = 'equity_funds'
-                elif 'Kinnisvarafond' in full:
-                    section = 're_funds'
-                elif 'Private Equity' in full:
-                    section = 'pe_funds'
-                elif 'Võlakirjafond' in full:
-                    section = 'bond_funds'
-                continue
-            if 'Väärtpaberi liik' in full:
-                if 'Võlakiri' in full:
-                    section = 'bonds'
-                elif 'Aktsia' in full:
-                    section = 'stocks'
-                continue
-            if nraw.startswith('Hoiused') or nraw.startswith('Tuletisinstrumendid'):
-                section = 'other'
-                continue
-            if 'puhasväärtus' in nraw or 'Muu vara' in nraw:
-                section = 'other'
-                continue
-            if nraw.startswith('Fondiosakud') or 'Fondi osaku' in nraw:
-                continue
-            if not section or section == 'other':
-                continue
 
-            # Percentage
-            pct = None
-            for w in reversed(rw):
-                m = re.match(r'^(-?\d+[\.,]\d+)%$', w['text'])
+def _seb_row_items(rows, pw):
+    """Holding rows of an SEB page as {name, isin, weight_pct, value_eur, section} dicts."""
+    items = []
+    section = None
+    nlim = pw * 0.25
+    mlo, mhi = pw * 0.89, pw * 0.95
+    for rw, full in rows:
+        # Name from leftmost column
+        nraw = ' '.join(w['text'] for w in rw if w['x0'] < nlim).strip()
+
+        # Section detection
+        if 'Fondi liik' in full:
+            if 'Aktsiafond' in full:
+                section = 'equity_funds'
+            elif 'Kinnisvarafond' in full:
+                section = 're_funds'
+            elif 'Private Equity' in full:
+                section = 'pe_funds'
+            elif 'Võlakirjafond' in full:
+                section = 'bond_funds'
+            continue
+        if 'Väärtpaberi liik' in full:
+            if 'Võlakiri' in full:
+                section = 'bonds'
+            elif 'Aktsia' in full:
+                section = 'stocks'
+            continue
+        if nraw.startswith('Hoiused') or nraw.startswith('Tuletisinstrumendid'):
+            section = 'other'
+            continue
+        if 'puhasväärtus' in nraw or 'Muu vara' in nraw:
+            section = 'other'
+            continue
+        if nraw.startswith('Fondiosakud') or 'Fondi osaku' in nraw:
+            continue
+        if not section or section == 'other':
+            continue
+
+        # Percentage
+        pct = None
+        for w in reversed(rw):
+            m = _SEB_PCT_RE.match(w['text'])
+            if m:
+                pct = float(m.group(1).replace(',', '.'))
+                break
+        if pct is None or pct <= 0 or pct >= 100:
+            continue
+
+        # ISIN
+        isin = None
+        for w in rw:
+            if w['x0'] > pw * 0.4:
+                m = ISIN_RE.search(w['text'].replace(' ', ''))
                 if m:
-                    pct = float(m.group(1).replace(',', '.'))
+                    isin = m.group(0)
                     break
-            if pct is None or pct <= 0 or pct >= 100:
-                continue
 
-            # ISIN
-            isin = None
-            for w in rw:
-                if w['x0'] > pw * 0.4:
-                    cl = w['text'].replace(' ', '')
-                    m = ISIN_RE.search(cl)
-                    if m:
-                        isin = m.group(0)
-                        break
-
-            # EUR market value (column at ~89-95% of page width)
-            # SEB PDFs format values as space-separated 3-digit groups
-            # (e.g. "9 580 480"). Occasionally pdfplumber merges a trailing
-            # digit from an adjacent column, producing 4-digit groups like
-            # "7080" instead of "708". Cap each word at 3 digits to fix.
-            mlo, mhi = pw * 0.89, pw * 0.95
-            vw = [w for w in rw if mlo < w['x0'] < mhi
-                  and re.match(r'^[\d\s]+$', w['text'])]
-            eur = None
-            if vw:
-                parts = []
-                for w in vw:
-                    d = re.sub(r'\s', '', w['text'])
-                    if len(d) > 3 and len(parts) > 0:
-                        d = d[:3]  # trim spurious trailing digit
-                    parts.append(d)
-                vd = ''.join(parts)
-                if vd.isdigit() and len(vd) >= 3:
-                    eur = int(vd)
-
-            # Clean name
-            name = _trim_strategy(_clean_name(nraw))
-            name = _clean_name(name)
-            if not name or len(name) < 3:
-                continue
-            if any(name.startswith(s) for s in
-                   ['Reguleeritud', 'Taristui', 'Investeering Fondi', 'Emitendi']):
-                continue
-            if re.match(r'^[\d\s,\.]+$', name):
-                continue
+        # EUR market value (column at ~89-95% of page width)
+        # SEB PDFs format values as space-separated 3-digit groups
+        # (e.g. "9 580 480"). Occasionally pdfplumber merges a trailing
+        # digit from an adjacent column, producing 4-digit groups like
+        # "7080" instead of "708". Cap each word at 3 digits to fix.
+        vw = [w for w in rw if mlo < w['x0'] < mhi and _SEB_DIGITS_RE.match(w['text'])]
+        eur = None
+        if vw:
+            parts = []
+            for w in vw:
+                d = _SEB_SPACES_RE.sub('', w['text'])
+                if len(d) > 3 and len(parts) > 0:
+                    d = d[:3]  # trim spurious trailing digit
+                parts.append(d)
+            vd = ''.join(parts)
+            if vd.isdigit() and len(vd) >= 3:
+                eur = int(vd)
+
+        # Clean name
+        name = _seb_clean_name(_seb_trim_strategy(_seb_clean_name(nraw)))
+        if not name or len(name) < 3:
+            continue
+        if name.startswith(_SEB_SKIP_PREFIXES):
+            continue
+        if _SEB_NUMERIC_RE.match(name):
+            continue
 
-            items.append({
-                'name': name, 'isin': isin,
-                'weight_pct': pct, 'value_eur': eur,
-                'section': section,
-            })
-        return items
+        items.append({
+            'name': name, 'isin': isin,
+            'weight_pct': pct, 'value_eur': eur,
+            'section': section,
+        })
+    return items
 
-    # Parse current-month pages only
-    with pdfplumber.open(pdf_path) as pdf:
-        if len(pdf.pages) < 2:
+
+def parse_seb_pdf(pdf_path):
+    """Parse any SEB fund investment report PDF using word-level extraction.
+
+    Uses pdfplumber word extraction with coordinates to match names, ISINs,
+    percentages, and EUR values that appear on the same row (same y-coordinate).
+    Works for both inline and multi-column SEB PDF layouts. Each page's words
+    are extracted once and serve both the report date check and the rows.
+
+    Returns dict with keys: equity_funds, bonds, stocks, re_funds, pe_funds,
+    bond_funds, deposits_pct, derivatives_pct.
+    Each list contains dicts: {name, isin, weight_pct, value_eur}.
+    """
+    # Parse current-month pages only (from page 2 until a page dated otherwise)
+    all_items = []
+    with open_document(pdf_path) as doc:
+        if len(doc) < 2:
             return {}
-        p2 = pdf.pages[1].extract_text() or ''
-        dates = re.findall(r'seisuga (\d{2}\.\d{2}\.\d{4})', p2)
-        cur_date = dates[0] if dates else ''
-
-        all_items = []
-        for pi in range(1, len(pdf.pages)):
-            pt = pdf.pages[pi].extract_text() or ''
-            d = re.findall(r'seisuga (\d{2}\.\d{2}\.\d{4})', pt)
-            if d and d[0] != cur_date and pi > 1:
+        cur_date = None
+        for pi in range(1, len(doc)):
+            rows = _seb_page_rows(doc.words(pi, **_SEB_WORD_PARAMS))
+            doc.release(pi)
+            d = _seb_page_date(rows)
+            if pi == 1:
+                cur_date = d or ''
+            elif d and d != cur_date:
                 break
-            all_items.extend(_extract_page(pdf.pages[pi]))
+            all_items.extend(_seb_row_items(rows, doc.width(pi)))
 
     # Group by section
     result = {
@@ -1150,170 +1087,89 @@ def _seb_indeks_hardcoded_allocations():
     ]
 
 
-def parse_lhv_monthly(pdf_path):
-    """Parse LHV monthly report (bonds, stocks, ETFs, PE, RE).
-    Returns dict matching LLK50_parsed.json format, plus
-    _pdf_subtotals, _pdf_holding_counts, _total_value_eur.
-    """
-    bonds = []
-    stocks = []
-    etf_equity = []
-    pe_funds = []
-    re_funds = []
-    deposits_pct = 0.0
-    derivatives_pct = 0.0
-    pdf_subtotals = {}
-    pdf_holding_counts = {}
-    total_value_eur = 0
-
-    current_section = None  # 'bonds', 'stocks', 'etf_equity', 'pe', 're'
-
-    # Map section names to standardized keys for subtotals/counts
-    _SECTION_TO_KEY = {
-        'bonds': 'bonds', 'stocks': 'stocks',
-        'etf_equity': 'equity_funds', 'fondiosakud': 'equity_funds',
-        'pe': 'pe_funds', 're': 're_funds',
-    }
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ''
-            for line in text.splitlines():
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Section markers — LHV section headers include count and percentage:
-                # "Võlainstrumendid 12 ... 8.45%", "Aktsiad 43 ... 22.63%"
-                if 'Võlainstrumendid' in line and 'kokku' not in line.lower():
-                    if re.match(r'^Võlainstrumendid\s', line):
-                        pct_m = re.findall(r'(\d+[\.,]\d+)%', line)
-                        if pct_m:
-                            pdf_subtotals['bonds'] = _pct(pct_m[0] + '%')
-                        current_section = 'bonds'
-                        continue
-                if line.startswith('Aktsiad') and 'kokku' not in line.lower() and 'fond' not in line.lower():
-                    if re.match(r'^Aktsiad\s+\d', line):
-                        pct_m = re.findall(r'(\d+[\.,]\d+)%', line)
-                        if pct_m:
-                            pdf_subtotals['stocks'] = _pct(pct_m[0] + '%')
-                        current_section = 'stocks'
-                        continue
-                if line.startswith('Aktsiafondid') and 'kokku' not in line.lower():
-                    if re.match(r'^Aktsiafondid\s+\d', line):
-                        pct_m = re.findall(r'(\d+[\.,]\d+)%', line)
-                        if pct_m:
-                            pdf_subtotals['equity_funds'] = _pct(pct_m[0] + '%')
-                        current_section = 'etf_equity'
-                        continue
-                if line.startswith('Erakapitalifondid') and 'kokku' not in line.lower():
-                    pct_m = re.findall(r'(\d+[\.,]\d+)%', line)
-                    if pct_m:
-                        pdf_subtotals['pe_funds'] = _pct(pct_m[0] + '%')
-                    current_section = 'pe'
-                    continue
-                if line.startswith('Kinnisvarafondid') and 'kokku' not in line.lower():
-                    pct_m = re.findall(r'(\d+[\.,]\d+)%', line)
-                    if pct_m:
-                        pdf_subtotals['re_funds'] = _pct(pct_m[0] + '%')
-                    current_section = 're'
-                    continue
-                if 'Fondiosakud' in line and re.match(r'^Fondiosakud\s+\d', line):
-                    current_section = 'fondiosakud'
-                    continue
-                if line.startswith('Tuletisinstrumendid'):
-                    # Extract derivatives percentage (can be negative)
-                    pct_m = re.findall(r'(-?\d+[\.,]\d+)%', line)
-                    if pct_m:
-                        derivatives_pct = _pct(pct_m[0] + '%')
-                    current_section = None
-                    continue
-                if '2. Hoiused' in line:
-                    # Extract deposit percentage from line like "2. Hoiused 37 956 570 4.33% 4.61%"
-                    pct_m = re.findall(r'(\d+[\.,]\d+)%', line)
-                    if pct_m:
-                        deposits_pct = _pct(pct_m[0] + '%')
-                    dep_val = _extract_deposit_eur(line)
-                    if dep_val:
-                        total_value_eur += dep_val
-                    current_section = 'deposits'
-                    continue
-
-                # Skip headers
-                if any(x in line for x in ['Keskmine', 'soetushind', 'soetusväärtus',
-                                            'Emitent/väärtpaberi', 'Fondi osaku',
-                                            'Fondivalitseja', 'Osakaal fondi',
-                                            'Tootlus', 'aegumiseni', 'ühikule',
-                                            'Reiting', 'Reitingu-agentuur',
-                                            'Emitendi riik', 'ISIN-kood', 'Valuuta',
-                                            'eelneval kuul', 'varade puhas-',
-                                            'Oodatav krediidikahju', 'kokku (EUR)',
-                                            'Alusvara', 'Tuletisinstrumendi',
-                                            'Krediidiasutuse', 'Hoiuse liik',
-                                            'Päritoluriik', 'Algus-kuupäev',
-                                            'Lõpp-tähtaeg', 'Intress',
-                                            '3. Muud varad', 'VARAD KOKKU',
-                                            'Fondi kohustused', 'FONDI VARADE',
-                                            '* Lühendatud', '** Keskmise',
-                                            '(1) Investeering', '(2) Reguleeritud',
-                                            '(3) Instrumendi']):
-                    continue
-
-                if current_section == 'deposits':
-                    # "2. Hoiused 18 488 908 5.67% 9.88%" — the section header has the total
-                    continue
-
-                # Count data lines with percentage per section
-                sk = _SECTION_TO_KEY.get(current_section)
-                if sk and re.search(r'\d+[\.,]\d+%', line):
-                    pdf_holding_counts[sk] = pdf_holding_counts.get(sk, 0) + 1
-
-                # Parse data lines - need percentage at end
-                pct_matches = re.findall(r'(\d+[\.,]\d+)%', line)
-                if not pct_matches:
-                    continue
-                weight = _pct(pct_matches[-1] + '%')
-                if weight <= 0 or weight > 50:
-                    continue
-
-                # Extract EUR market value
-                value_eur = _extract_eur_value(line)
-                if value_eur:
-                    total_value_eur += value_eur
+# ── LHV section tables ──
+# Section headers carry count and percentage ("Võlainstrumendid 12 ...
+# 8.45%", "Aktsiad 43 ... 22.63%"). Rows are read in every section but the
+# deposits one ("2. Hoiused 18 488 908 5.67% 9.88%" has the total); their
+# weight is the last % on the line.
+
+_LHV_PCT_RE = re.compile(r'(\d+[\.,]\d+)%')
+_LHV_HEADER_WORDS = [
+    'Keskmine', 'soetushind', 'soetusväärtus', 'Emitent/väärtpaberi', 'Fondi osaku',
+    'Fondivalitseja', 'Osakaal fondi', 'Tootlus', 'aegumiseni', 'ühikule',
+    'Reiting', 'Reitingu-agentuur', 'Emitendi riik', 'ISIN-kood', 'Valuuta',
+    'eelneval kuul', 'varade puhas-', 'Oodatav krediidikahju', 'kokku (EUR)',
+    'Alusvara', 'Tuletisinstrumendi', 'Krediidiasutuse', 'Hoiuse liik',
+    'Päritoluriik', 'Algus-kuupäev', 'Lõpp-tähtaeg', 'Intress',
+    '3. Muud varad', 'VARAD KOKKU', 'Fondi kohustused', 'FONDI VARADE',
+    '* Lühendatud', '** Keskmise', '(1) Investeering', '(2) Reguleeritud', '(3) Instrumendi',
+]
 
-                # Find ISIN if present
-                isin_match = ISIN_RE.search(line)
-                isin = isin_match.group(0) if isin_match else None
+_LHV_RULES = [
+    Rule(_NO_KOKKU + r'Võlainstrumendid\s', goto='bonds', subtotal='bonds'),
+    Rule(r'(?!(?i:.*(?:kokku|fond)))Aktsiad\s+\d', goto='stocks', subtotal='stocks'),
+    Rule(_NO_KOKKU + r'Aktsiafondid\s+\d', goto='etf_equity', subtotal='equity_funds'),
+    Rule(_NO_KOKKU + r'Erakapitalifondid', goto='pe', subtotal='pe_funds'),
+    Rule(_NO_KOKKU + r'Kinnisvarafondid', goto='re', subtotal='re_funds'),
+    Rule(r'Fondiosakud\s+\d', goto='fondiosakud'),
+    # Derivatives percentage can be negative
+    Rule(r'Tuletisinstrumendid', goto=None, total='derivatives_pct', pct=re.compile(r'(-?\d+[\.,]\d+)%')),
+    Rule(contains(['2. Hoiused']), goto='deposits', total='deposits_pct', deposit_eur=True),
+    Rule(contains(_LHV_HEADER_WORDS)),   # column headers, footnotes
+]
 
-                # Extract country (Estonian names)
-                country = _extract_lhv_country(line)
 
-                # Extract name
-                name = _extract_lhv_name(line, isin)
+def _lhv_entry(row, target):
+    """Holding entry of an LHV row; target is the entry 'type'."""
+    country = _extract_lhv_country(row.line)
+    name = _extract_lhv_name(row.line, row.isin)
+    if not name or len(name) < 2:
+        return None
+    if target in ('pe', 're'):
+        entry = {'name': name, 'weight': row.weight, 'type': target}
+        if row.value_eur:
+            entry['value_eur'] = row.value_eur
+        return entry
+    entry = {'name': name, 'isin': row.isin, 'weight': row.weight, 'country': country}
+    if row.value_eur:
+        entry['value_eur'] = row.value_eur
+    entry['type'] = target
+    return entry
+
+
+_LHV_ROW = {'pct': _LHV_PCT_RE, 'weight': 'last', 'min_weight': 0, 'max_weight': 50}
+_LHV_SECTIONS = {
+    None: Section(**_LHV_ROW),   # rows outside a section still count towards _total_value_eur
+    'bonds': Section('bonds', count='bonds', make=_lhv_entry, **_LHV_ROW),
+    'stocks': Section('stocks', count='stocks', make=_lhv_entry, **_LHV_ROW),
+    'etf_equity': Section('etfs', count='equity_funds', make=_lhv_entry, **_LHV_ROW),
+    'fondiosakud': Section('etfs', count='equity_funds', make=_lhv_entry, **_LHV_ROW),
+    'pe': Section('pe', count='pe_funds', make=_lhv_entry, **_LHV_ROW),
+    're': Section('re', count='re_funds', make=_lhv_entry, **_LHV_ROW),
+}
 
-                if not name or len(name) < 2:
-                    continue
+_LHV_PARSER = SectionParser(_LHV_RULES, _LHV_SECTIONS, pct=_LHV_PCT_RE, pct_value=_pct,
+                            isin_re=ISIN_RE, eur_value=_extract_eur_value, deposit_eur=_extract_deposit_eur,
+                            totals={'deposits_pct': 0.0, 'derivatives_pct': 0.0})
 
-                entry = {'name': name, 'isin': isin, 'weight': weight, 'country': country}
-                if value_eur:
-                    entry['value_eur'] = value_eur
 
-                if current_section == 'bonds':
-                    bonds.append({**entry, 'type': 'bonds'})
-                elif current_section == 'stocks':
-                    stocks.append({**entry, 'type': 'stocks'})
-                elif current_section in ('etf_equity', 'fondiosakud'):
-                    etf_equity.append({**entry, 'type': 'etfs'})
-                elif current_section == 'pe':
-                    pe_entry = {'name': name, 'weight': weight, 'type': 'pe'}
-                    if value_eur:
-                        pe_entry['value_eur'] = value_eur
-                    pe_funds.append(pe_entry)
-                elif current_section == 're':
-                    re_entry = {'name': name, 'weight': weight, 'type': 're'}
-                    if value_eur:
-                        re_entry['value_eur'] = value_eur
-                    re_funds.append(re_entry)
+def parse_lhv_monthly(pdf_path):
+    """Parse LHV monthly report (bonds, stocks, ETFs, PE, RE).
+    Returns dict matching LLK50_parsed.json format, plus
+    _pdf_subtotals, _pdf_holding_counts, _total_value_eur.
+    """
+    with open_document(pdf_path) as doc:
+        result = _LHV_PARSER.parse(doc.texts())
+    bonds = result.rows['bonds']
+    stocks = result.rows['stocks']
+    etf_equity = result.rows['etfs']
+    pe_funds = result.rows['pe']
+    re_funds = result.rows['re']
+    deposits_pct = result.totals['deposits_pct']
+    derivatives_pct = result.totals['derivatives_pct']
+    pdf_subtotals = result.subtotals
+    pdf_holding_counts = result.counts
+    total_value_eur = result.total_value_eur
 
     # Compute asset class percentages
     stock_pct = sum(s['weight'] for s in stocks)
@@ -1401,9 +1257,9 @@ def parse_seb_55_monthly(pdf_path):
     """Parse SEB 55+ monthly report (complex multi-column: bonds, stocks, ETFs, RE, PE).
     Returns dict with allocations organized by asset class.
     """
-    with pdfplumber.open(pdf_path) as pdf:
-        text_p1 = pdf.pages[1].extract_text() or ''
-        text_p2 = pdf.pages[2].extract_text() or ''
+    with open_document(pdf_path) as doc:
+        text_p1 = doc.text(1)
+        text_p2 = doc.text(2)
 
     # SEB 55+ has a multi-column layout similar to SEB Indeks
     # Extract investment names and weights from the concatenated columns
@@ -1953,8 +1809,21 @@ def _load_luminor_allocations(data):
 # SECTION 2: ETF HOLDINGS LOADING
 # ═══════════════════════════════════════════════════════════════════
 
+# ── Holdings cache (typed columnar copies of the holdings files) ──
+HOLDINGS_CACHE_DIR = BASE / 'data' / 'cache' / 'holdings'
+_HOLDINGS_CACHE = {}
+
+
+def holdings_cache():
+    """Process-wide HoldingsCache over HOLDINGS_CACHE_DIR."""
+    cache = _HOLDINGS_CACHE.get('cache')
+    if cache is None:
+        cache = _HOLDINGS_CACHE['cache'] = HoldingsCache(HOLDINGS_CACHE_DIR)
+    return cache
+
+
 def fetch_ishares_holdings(ticker):
-    """Load iShares ETF holdings from cached CSV."""
+    """Load iShares ETF holdings from cached CSV (via its columnar holdings cache)."""
     cache_path = CACHE_DIR / f'{ticker}_holdings.csv'
     if ticker == 'ISAC':
         cache_path = CACHE_DIR / 'ISAC_acwi_holdings.csv'
@@ -1963,8 +1832,19 @@ def fetch_ishares_holdings(ticker):
     if not cache_path.exists():
         print(f'  WARNING: CSV not found for {ticker}: {cache_path}')
         return pd.DataFrame()
+    return holdings_cache().load(cache_path, _read_ishares_csv)
+
+
+def _read_ishares_csv(cache_path):
+    """Holdings frame of an iShares holdings CSV (HOLDINGS_COLS, as_of from its header)."""
     raw_text = cache_path.read_text(encoding='utf-8-sig')
     rows = list(csv.reader(io.StringIO(raw_text)))
+    as_of = None
+    if rows and len(rows[0]) >= 2 and rows[0][0].strip() == 'Fund Holdings as of':
+        try:
+            as_of = datetime.strptime(rows[0][1].strip(), '%d/%b/%Y').date().isoformat()
+        except ValueError:
+            print(f'  WARNING: Unreadable holdings date in {cache_path.name}: {rows[0][1]!r}')
     header_idx = next(i for i, r in enumerate(rows) if len(r) >= 3 and r[0].strip() == 'Ticker')
     header = [c.strip() for c in rows[header_idx]]
     data = []
@@ -1982,6 +1862,7 @@ def fetch_ishares_holdings(ticker):
     df = df.rename(columns={'Ticker': 'ticker', 'Name': 'name', 'Sector': 'sector',
                             'Asset Class': 'asset_class', 'Location': 'location'})
     df['stock_id'] = df['ticker'] + '|' + df['location']
+    df.attrs.update(as_of=as_of, source=cache_path.name)
     return df
 
 
@@ -1995,23 +1876,21 @@ def fetch_eodhd_holdings(ticker):
     cache_path = CACHE_DIR / f'{ticker}_eodhd_holdings.json'
 
     # Use cache if fresh (< 7 days)
+    fresh = False
     if cache_path.exists():
         import time
         age_days = (time.time() - cache_path.stat().st_mtime) / 86400
         if age_days < 7:
             print(f'  Using cached EODHD data for {ticker} ({age_days:.1f} days old)')
-            data = json.loads(cache_path.read_text())
-        else:
-            data = None
-    else:
-        data = None
+            fresh = True
 
-    if data is None:
+    if not fresh:
         if not EODHD_API_KEY:
             print('  ERROR: EODHD_API_KEY not set. Set it in .env or as environment variable.')
             return pd.DataFrame()
         url = f'https://eodhistoricaldata.com/api/fundamentals/{eodhd_ticker}?api_token={EODHD_API_KEY}&fmt=json'
         print(f'  Fetching EODHD: {eodhd_ticker}...')
+        data = None
         last_err = None
         for attempt in range(3):
             try:
@@ -2029,10 +1908,20 @@ def fetch_eodhd_holdings(ticker):
             print(f'  ERROR fetching EODHD {eodhd_ticker} after 3 attempts: {last_err}')
             return pd.DataFrame()
 
+    df = holdings_cache().load(cache_path, _read_eodhd_json)
+    if df.empty:
+        print(f'  WARNING: No holdings in EODHD data for {ticker}')
+        return pd.DataFrame()
+    print(f'  EODHD {ticker}: {len(df)} holdings loaded')
+    return df
+
+
+def _read_eodhd_json(cache_path):
+    """Holdings frame of a saved EODHD fundamentals JSON (HOLDINGS_COLS; empty without holdings)."""
+    data = json.loads(cache_path.read_text())
     etf_data = data.get('ETF_Data', {})
     holdings = etf_data.get('Holdings', {})
     if not holdings:
-        print(f'  WARNING: No holdings in EODHD data for {ticker}')
         return pd.DataFrame()
 
     rows = []
@@ -2051,7 +1940,8 @@ def fetch_eodhd_holdings(ticker):
 
     df = pd.DataFrame(rows)
     df['stock_id'] = df['ticker'] + '|' + df['location']
-    print(f'  EODHD {ticker}: {len(df)} holdings loaded')
+    # EODHD has no holdings date; the fundamentals' update date is the closest
+    df.attrs.update(as_of=data.get('General', {}).get('UpdatedAt'), source=cache_path.name)
     return df
 
 
@@ -2075,33 +1965,136 @@ def load_manual_holdings(ticker):
     return df
 
 
+# ── Point-in-time holdings archive ──
+HOLDINGS_ARCHIVE_DIR = BASE / 'data' / 'cache' / 'holdings_archive'
+_HOLDINGS_ARCHIVE = {}
+
+
+def holdings_archive():
+    """Process-wide HoldingsArchive over HOLDINGS_ARCHIVE_DIR."""
+    archive = _HOLDINGS_ARCHIVE.get('archive')
+    if archive is None:
+        archive = _HOLDINGS_ARCHIVE['archive'] = HoldingsArchive(HOLDINGS_ARCHIVE_DIR)
+    return archive
+
+
+def archived_holdings(etf_holdings, report_date):
+    """Record freshly loaded holdings in the archive and return the holdings as of report_date.
+
+    Frames whose loader knows their date (df.attrs['as_of']) are archived
+    once per distinct snapshot. Each ETF is then taken from its latest
+    snapshot up to holdings_archive.GRACE_DAYS after report_date; ETFs without one keep the
+    loaded frame (with a warning if that frame is dated later).
+    """
+    archive = holdings_archive()
+    for tk, df in etf_holdings.items():
+        if df.attrs.get('as_of'):
+            archive.record(tk, df, df.attrs['as_of'], df.attrs.get('source', ''))
+
+    result = {}
+    current, older, missing, undated = [], [], [], []
+    for tk, df in etf_holdings.items():
+        hit = archive.as_of(tk, report_date)
+        if hit is None and not df.attrs.get('as_of') and not df.empty:
+            undated.append(tk)
+        if hit is None:
+            result[tk] = df
+            if df.attrs.get('as_of'):
+                missing.append(f'{tk} ({df.attrs["as_of"]})')
+        elif hit[1] == df.attrs.get('as_of'):
+            result[tk] = df
+            current.append(tk)
+        else:
+            result[tk] = archive.frame(tk, hit[0])
+            older.append(f'{tk} {hit[1]}')
+    if archive.recorded:
+        print(f'  Holdings archive: {len(archive.recorded)} new snapshots '
+              f'({", ".join(f"{tk} {d}" for tk, d in archive.recorded)})')
+    print(f'  Holdings as of {report_date}: {len(current)} current'
+          f'{", " + str(len(older)) + " archived (" + ", ".join(older) + ")" if older else ""}'
+          f'{", " + str(len(undated)) + " undated (" + ", ".join(undated) + ")" if undated else ""}')
+    if missing:
+        print(f'  WARNING: No archived holdings as of {report_date}, using later files: {", ".join(missing)}')
+    return result
+
+
 # ═══════════════════════════════════════════════════════════════════
 # SECTION 3: LOOK-THROUGH ENGINE
 # ═══════════════════════════════════════════════════════════════════
 
-def build_lookthrough(allocations, etf_holdings):
-    """Build stock-level portfolio from ETF allocations.
-    allocations: list of {isin, weight_pct, etf_ticker}
-    etf_holdings: dict of ticker -> DataFrame
+_ENGINES = {}
+_FULL_UNIVERSE = {'enabled': False}
+
+# ── Look-through row cache (flattened ETF rows, persisted between runs) ──
+LOOKTHROUGH_CACHE_PATH = BASE / 'data' / 'cache' / 'lookthrough_rows.json'
+_ROW_CACHE = {}
+
+
+def lookthrough_cache():
+    """Process-wide RowCache, loaded from LOOKTHROUGH_CACHE_PATH on first use."""
+    cache = _ROW_CACHE.get('cache')
+    if cache is None:
+        cache = _ROW_CACHE['cache'] = RowCache.load(LOOKTHROUGH_CACHE_PATH)
+    return cache
+
+
+def save_lookthrough_cache():
+    """Persist the look-through row cache if it changed during this run."""
+    lookthrough_cache().save(LOOKTHROUGH_CACHE_PATH)
+
+
+def set_full_universe(enabled=True):
+    """Look through every ETF's full constituent list (no LOOKTHROUGH_TOP_N).
+
+    Exported top_holdings are pruned instead: positions below
+    FULL_UNIVERSE_MIN_WEIGHT are folded into the fund's 'other_holdings'.
     """
+    _FULL_UNIVERSE['enabled'] = enabled
+    _ENGINES.clear()
+
+
+def full_universe():
+    """True when set_full_universe() is on."""
+    return _FULL_UNIVERSE['enabled']
+
+
+def lookthrough_engine(etf_holdings):
+    """Holdings graph for an etf_holdings dict (one per dict, reused).
+
+    ETF nodes are the keys of etf_holdings; ETF_ISIN_TO_CSV and
+    LUMINOR_ETF_PROXY_MAP are registered as proxy nodes. ETFs are truncated
+    per LOOKTHROUGH_TOP_N unless set_full_universe() is on.
+    """
+    engine = _ENGINES.get(id(etf_holdings))
+    if engine is None or engine.holdings is not etf_holdings:
+        engine = LookthroughEngine(etf_holdings, top_n=None if full_universe() else LOOKTHROUGH_TOP_N,
+                                   row_cache=lookthrough_cache())
+        for isin, ticker in ETF_ISIN_TO_CSV.items():
+            engine.add_proxy(isin, ticker)
+        for pattern, ticker in LUMINOR_ETF_PROXY_MAP.items():
+            engine.add_name_proxy(pattern, ticker)
+        _ENGINES.clear()
+        _ENGINES[id(etf_holdings)] = engine
+    return engine
+
+
+def _resolve_allocations(allocations, etf_holdings):
+    """Split allocations into look-through (tickers, fund weights) and opaque entries."""
     # Validate weight sum
     total_weight = sum(a['weight_pct'] for a in allocations)
     if total_weight < 90 or total_weight > 110:
         print(f'  WARNING: Allocation weights sum to {total_weight:.1f}% (expected ~100%)')
 
-    sw = {}
+    engine = lookthrough_engine(etf_holdings)
     opaque_entries = []
+    tickers, fund_weights = [], []
 
     for alloc in allocations:
         isin = alloc.get('isin', '')
-        fw = alloc['weight_pct'] / 100.0
-        etk = alloc.get('etf_ticker')
+        # Explicit ticker, else map ISIN to CSV ticker via the proxy nodes
+        etk = engine.resolve(alloc.get('etf_ticker') or isin)
 
         if not etk:
-            # Map ISIN to CSV ticker
-            etk = ETF_ISIN_TO_CSV.get(isin)
-
-        if not etk or etk not in etf_holdings:
             if isin in OPAQUE_FUND_ISINS:
                 opaque_entries.append({
                     'name': alloc.get('name', isin),
@@ -2113,82 +2106,186 @@ def build_lookthrough(allocations, etf_holdings):
                       f'(name={alloc.get("name","?")}, weight={alloc["weight_pct"]:.2f}%)')
             continue
 
-        eq = etf_holdings[etk]
-        eq = eq[eq['asset_class'] == 'Equity'].copy()
-        if etk == 'SAEM':
-            eq = eq.nlargest(SAEM_TOP_N, 'weight_pct')
+        tickers.append(etk)
+        fund_weights.append(alloc['weight_pct'] / 100.0)
+
+    return tickers, fund_weights, opaque_entries
+
+
+def build_lookthrough(allocations, etf_holdings):
+    """Build stock-level portfolio from ETF allocations.
+    allocations: list of {isin, weight_pct, etf_ticker}
+    etf_holdings: dict of ticker -> DataFrame
+    """
+    tickers, fund_weights, opaque_entries = _resolve_allocations(allocations, etf_holdings)
+    engine = lookthrough_engine(etf_holdings)
+    return engine.to_frame(engine.combine(tickers, fund_weights)), opaque_entries
 
-        for _, r in eq.iterrows():
-            tk, w = r['ticker'], r['weight_pct']
-            if tk in SUB_ETF_TICKERS and tk in etf_holdings:
-                for _, sr in etf_holdings[tk][etf_holdings[tk]['asset_class'] == 'Equity'].iterrows():
-                    if sr['ticker'] in SUB_ETF_TICKERS:
-                        continue
-                    c = fw * w * sr['weight_pct'] / 100.0
-                    sid = sr['stock_id']
-                    if sid in sw:
-                        sw[sid]['weight'] += c
-                    else:
-                        sw[sid] = {'stock_id': sid, 'ticker': sr['ticker'], 'name': sr['name'],
-                                   'weight': c, 'sector': sr['sector'], 'location': sr['location']}
-            else:
-                c = fw * w
-                sid = r['stock_id']
-                if sid in sw:
-                    sw[sid]['weight'] += c
-                else:
-                    sw[sid] = {'stock_id': sid, 'ticker': tk, 'name': r['name'],
-                               'weight': c, 'sector': r['sector'], 'location': r['location']}
 
-    df = pd.DataFrame(sw.values()).sort_values('weight', ascending=False).reset_index(drop=True) if sw else pd.DataFrame()
-    return df, opaque_entries
+def build_lookthrough_batch(fund_allocations, etf_holdings):
+    """Look through every fund's ETF allocations in one pass.
+
+    fund_allocations: dict of fund -> list of {isin, weight_pct, etf_ticker}
+    Returns dict of fund -> {'stocks', 'opaque', 'etf_breakdown'} where
+    'stocks' is the build_lookthrough DataFrame for that fund.
+    """
+    engine = lookthrough_engine(etf_holdings)
+    alloc = AllocationMatrix()
+    opaque = {}
+    resolved = {}
+    for fund, allocations in fund_allocations.items():
+        tickers, fund_weights, opaque[fund] = _resolve_allocations(allocations, etf_holdings)
+        alloc.add(fund, tickers, fund_weights)
+        engine.add_fund(fund, tickers, fund_weights)
+        resolved[fund] = list(zip(tickers, fund_weights))
+
+    exposures = engine.multiply(alloc)
+    _log_recomputed(engine, {fund: (pairs, {k for k, _ in engine.row(fund).deps} - {fund})
+                             for fund, pairs in resolved.items()})
+    return {
+        fund: {
+            'stocks': engine.to_frame(exposure),
+            'opaque': opaque[fund],
+            'etf_breakdown': build_etf_breakdown(fund_allocations[fund], etf_holdings),
+        }
+        for fund, exposure in zip(alloc.funds, exposures)
+    }
+
+
+def _log_recomputed(engine, allocations):
+    """Print which ETF rows were rebuilt this run and which funds only reweight cached rows."""
+    cache = engine.row_cache
+    if cache is None:
+        return
+    rebuilt = list(dict.fromkeys(cache.misses))
+    reused = [t for t in dict.fromkeys(cache.hits) if t not in rebuilt]
+    recomputed, reweighted, unchanged = cache.fund_changes(allocations)
+    print(f'  Look-through cache: {len(rebuilt)} ETFs recomputed'
+          f'{" (" + ", ".join(rebuilt) + ")" if rebuilt else ""}, {len(reused)} reused')
+    print(f'  Funds: {len(recomputed)} recomputed{" (" + ", ".join(recomputed) + ")" if recomputed else ""}, '
+          f'{len(reweighted)} reweighted from cached rows, {len(unchanged)} unchanged')
 
 
 def build_acwi(etf_holdings):
     """Build ACWI benchmark portfolio from SSAC ETF."""
-    eq = etf_holdings['SSAC']
-    eq = eq[eq['asset_class'] == 'Equity'].copy()
-    sw = {}
-    for _, r in eq.iterrows():
-        tk, w = r['ticker'], r['weight_pct']
-        if tk in SUB_ETF_TICKERS and tk in etf_holdings:
-            for _, sr in etf_holdings[tk][etf_holdings[tk]['asset_class'] == 'Equity'].iterrows():
-                if sr['ticker'] in SUB_ETF_TICKERS:
-                    continue
-                c = w * sr['weight_pct'] / 100.0
-                sid = sr['stock_id']
-                if sid in sw:
-                    sw[sid]['weight'] += c
-                else:
-                    sw[sid] = {'stock_id': sid, 'ticker': sr['ticker'], 'name': sr['name'],
-                               'weight': c, 'sector': sr['sector'], 'location': sr['location']}
-        else:
-            sid = r['stock_id']
-            if sid in sw:
-                sw[sid]['weight'] += w
-            else:
-                sw[sid] = {'stock_id': sid, 'ticker': tk, 'name': r['name'],
-                           'weight': w, 'sector': r['sector'], 'location': r['location']}
-    return pd.DataFrame(sw.values()).sort_values('weight', ascending=False).reset_index(drop=True)
+    return build_benchmark(etf_holdings, 'SSAC')
 
 
-def build_ssac_em(etf_holdings):
-    """Build EM-only holdings from SSAC by filtering for EM countries.
+def build_benchmark(etf_holdings, source):
+    """Stock-level portfolio of one holdings source (ETFs looked through)."""
+    engine = lookthrough_engine(etf_holdings)
+    return engine.to_frame(engine.combine([source]))
 
-    Returns a DataFrame in the same format as other etf_holdings entries,
-    containing only EM-country equities from SSAC with weights renormalized
-    to sum to ~100%. Sub-ETF tickers (NDIA, 4BRZ, CNYA, IKSA) are included
-    as-is and will be decomposed downstream.
 
-    This is a better proxy for standard MSCI EM (large+mid cap) funds than
-    SAEM, which tracks MSCI EM IMI ESG Screened (includes ~1500 small caps).
+# Benchmarks funds can be compared against: name -> holdings source
+BENCHMARKS = {
+    'ACWI': 'SSAC',
+    'SSAC_EM': 'SSAC_EM',
+    'World': 'SAWD',
+}
+_BENCHMARKS = {}
+
+
+def benchmark_index(etf_holdings, name='ACWI'):
+    """BenchmarkIndex for one of BENCHMARKS, built once per holdings dict.
+
+    Weights are normalized to 100 and rows get norm_key and issuer_id.
+    """
+    cache_key = (id(etf_holdings), name)
+    if cache_key not in _BENCHMARKS:
+        frame = build_benchmark(etf_holdings, BENCHMARKS[name])
+        frame['weight'] = frame['weight'] / frame['weight'].sum() * 100
+        frame['norm_key'] = norm_keys(frame['name'])
+        frame['issuer_id'] = issuer_ids(frame['norm_key'])
+        _BENCHMARKS[cache_key] = BenchmarkIndex(name, frame)
+    return _BENCHMARKS[cache_key]
+
+
+_EXPOSURE_LABELS = {}
+
+
+def _exposure_labels(engine, sector_lookup, benchmark=None):
+    """(sector, country) RowLabels over the engine's source rows, as process_fund labels them.
+
+    A row's sector is the ACWI sector of its normalized name, else its own
+    ('Unknown' if blank). Rows in EXCLUDED_SECTORS, and rows outside the
+    benchmark when one is given, are not counted. Each RowLabels comes with
+    the stock_ids of its mixed stocks. Rebuilt when the universe grows.
+    """
+    universe = engine.universe
+    cache_key = (id(engine), id(sector_lookup), benchmark.name if benchmark is not None else None)
+    hit = _EXPOSURE_LABELS.get(cache_key)
+    if hit is not None and hit[0] is engine and hit[1][0][0].n_rows == universe.n_rows:
+        return hit[1]
+
+    attrs = universe.attrs(np.arange(universe.n_rows))
+    sector = pd.Series(norm_keys(pd.Series(attrs[:, 2]))).map(sector_lookup['sector'])
+    sector = sector.fillna(pd.Series(attrs[:, 3]))
+    sector[sector.isin(['', None])] = 'Unknown'
+    counted = ~sector.isin(EXCLUDED_SECTORS)
+    if benchmark is not None:
+        counted &= pd.Series(attrs[:, 0]).isin(benchmark.stock_ids)
+    location = pd.Series(attrs[:, 4], dtype=object)
+    labels = []
+    for column in (sector, location):
+        row_labels = RowLabels(universe, column.where(counted, None))
+        mixed_ids = frozenset(attrs[row_labels.mixed[universe.row_codes()], 0])
+        labels.append((row_labels, mixed_ids))
+    _EXPOSURE_LABELS[cache_key] = (engine, labels)
+    return labels
+
+
+def lookthrough_breakdown(etf_holdings, node, frame, sector_lookup, benchmark=None, scale=1.0):
+    """Sector and country weights of a look-through node from its exposure vectors.
+
+    frame is the node's stock-level frame as fund_to_json gets it: rows
+    outside benchmark dropped when given, weights times scale, sectors from
+    sector_lookup. The ETFs' vectors give the weights of every stock they
+    agree on; the few stocks whose ETFs disagree on sector or country are
+    grouped from frame, which holds the attributes the fund actually shows.
+    Returns (sectors, countries) ranked as sector_country_weights(frame).
+    """
+    engine = lookthrough_engine(etf_holdings)
+    valid = frame[~frame['sector'].isin(EXCLUDED_SECTORS)]
+    result = []
+    for (labels, mixed_ids), col in zip(_exposure_labels(engine, sector_lookup, benchmark),
+                                        ('sector', 'location')):
+        vec = engine.breakdown(node, labels)
+        present = vec[1, :len(labels)] > 0
+        weights = pd.Series(vec[0, :len(labels)][present] * scale,
+                            index=np.asarray(labels.names, dtype=object)[present])
+        if vec[1, -1] > 0:
+            mixed = valid[valid['stock_id'].isin(mixed_ids)]
+            weights = weights.add(mixed.groupby(col)['weight'].sum(), fill_value=0)
+        result.append(ranked(weights))
+    return tuple(result)
+
+
+# Holdings sources derived from another source by keeping only some countries.
+# SSAC_EM: EM-country equities of SSAC (ACWI), a better proxy for standard
+# MSCI EM (large+mid cap) funds than SAEM, which tracks MSCI EM IMI ESG
+# Screened (includes ~1500 small caps).
+DERIVED_HOLDINGS = {
+    'SSAC_EM': ('SSAC', EM_COUNTRIES),
+}
+
+
+def build_derived_holdings(etf_holdings, key):
+    """Build a DERIVED_HOLDINGS source from its parent's holdings.
+
+    Returns a DataFrame in the same format as other etf_holdings entries,
+    containing the parent's equities in the listed countries with weights
+    renormalized to sum to ~100%. Positions that are themselves holdings
+    sources (sub-ETFs such as NDIA) are kept as-is and looked through
+    downstream.
     """
-    ssac = etf_holdings['SSAC']
-    eq = ssac[ssac['asset_class'] == 'Equity'].copy()
+    parent, locations = DERIVED_HOLDINGS[key]
+    src = etf_holdings[parent]
+    eq = src[src['asset_class'] == 'Equity'].copy()
 
-    # Keep EM-country stocks + sub-ETF tickers (all are EM country ETFs)
-    em_mask = eq['location'].isin(EM_COUNTRIES) | eq['ticker'].isin(SUB_ETF_TICKERS)
-    em = eq[em_mask].copy()
+    engine = lookthrough_engine(etf_holdings)
+    is_node = eq['ticker'].map(lambda t: t in engine and t != parent)
+    em = eq[eq['location'].isin(locations) | is_node].copy()
 
     # Renormalize weights to sum to 100%
     total = em['weight_pct'].sum()
@@ -2202,102 +2299,81 @@ def build_ssac_em(etf_holdings):
 # SECTION 4: NORMALIZATION & JSON EXPORT
 # ═══════════════════════════════════════════════════════════════════
 
-def normalize_company_name(name):
-    if not name:
-        return ''
-    s = name.upper()
-    s = re.sub(r'\([^)]*\)', ' ', s)
-    s = s.replace("'", ' ').replace('\u2019', ' ').replace('&', ' AND ').replace('/', ' ')
-    s = re.sub(r'\bTHE\b', ' ', s)
-    s = re.sub(r'\bCLASS\s+[A-Z]\b', ' ', s)
-    s = re.sub(r'\b[A-Z]\s+SHS\b', ' ', s)
-    # Remove corporate suffixes
-    s = re.sub(r'\b(INCORPORATED|INC|CORPORATION|CORP|COMPANY|CO|HOLDINGS|HOLDING|'
-               r'GROUP|PLC|LTD|LIMITED|NV|SA|AG|SPA|OYJ|AB|A/S|SE|PL|ADR)\b', ' ', s)
-    # Remove trailing single letter (share class indicator: A, B, C, etc.)
-    s = re.sub(r'\s+[A-Z]\s*$', ' ', s.strip())
-    s = re.sub(r'[^A-Z0-9]+', '', s)
-    return _COMPANY_ALIASES.get(s, s)
-
-
-_COMPANY_ALIASES = {
-    # Big tech variants
-    'NVIDIACORP': 'NVIDIA', 'AMAZONCOM': 'AMAZON', 'AMAZONCOMSERVICES': 'AMAZON',
-    'METAFORMS': 'METAPLATFORMS', 'METAPLATFORMSA': 'METAPLATFORMS',
-    'ALPHABETA': 'ALPHABET', 'ALPHABETCAPITAL': 'ALPHABET',
-    'MICROSOFTCORP': 'MICROSOFT',
-    'APPLEINC': 'APPLE',
-    # TSMC
-    'TAIWANSEMICONDUCTORMANUFACTURING': 'TSMC',
-    'TAIWANSEMICONDUCTOR': 'TSMC', 'TAIWANSEMICONDUCTORMFG': 'TSMC',
-    'TAIWANSEMICONDUCTORMANUFACTURINGCO': 'TSMC',
-    # Financial
-    'JPMORGANCHASEAND': 'JPMORGANCHASE', 'JPMORGAN': 'JPMORGANCHASE',
-    'BERKSHIREHATHAWAY': 'BERKSHIRE', 'BERKSHIREHATHAWAYCAPITAL': 'BERKSHIRE',
-    'GOLDMANSACHS': 'GOLDMANSACHS', 'GOLDMANSACHSINTERNATIONAL': 'GOLDMANSACHS',
-    'MORGANSTANLEY': 'MORGANSTANLEY', 'MORGANSTANLEYANDCO': 'MORGANSTANLEY',
-    'BANKOFAMERICA': 'BOFA', 'BANKAMERICANA': 'BOFA',
-    'MIZUHOFINANCIAL': 'MIZUHO',
-    # Consumer
-    'WALMART': 'WALMARTSTORES', 'WALMARTSTORESWALMART': 'WALMARTSTORES',
-    'PEPSICO': 'PEPSI',
-    'MCDONALDS': 'MCDONALD',
-    'PROCTER': 'PROCTERANDGAMBLE', 'PROCTERCOMGAMBLE': 'PROCTERANDGAMBLE',
-    'COCACOLA': 'COKE', 'COCACOLAEUROPACIFIC': 'COKE',
-    # Healthcare
-    'UNITEDHEALTH': 'UNITEDHEALTH', 'UNITEDHEALTHUNITEDHEALTH': 'UNITEDHEALTH',
-    'JOHNSONANDJOHNSON': 'JNJ', 'JOHNSONJOHNSON': 'JNJ',
-    'ELILILLYAND': 'ELILILLY', 'ELILILLYANDCO': 'ELILILLY',
-    # Industrial/other
-    'HILTONWORLDWIDE': 'HILTON',
-    'GENERALELECTRIC': 'GE', 'GEAEROSPACE': 'GE', 'GEVERNOVA': 'GEVERNOVA',
-    'APPLIEDMATERIALS': 'AMAT',
-    'MICRONTECHNOLOGY': 'MICRONTECHNOLOGIES',
-    'BROADCOM': 'BROADCOM', 'BROADCOMINC': 'BROADCOM',
-    'TOSHIBACORP': 'TOSHIBA',
-    'SAMSUNGELECTRONICS': 'SAMSUNG', 'SAMSUNGELECTRONICSPFD': 'SAMSUNG',
-    'TOYOTAMOTOR': 'TOYOTA', 'TOYOTAMOTORCORP': 'TOYOTA',
-    'SONYGROUP': 'SONY', 'SONYGROUPCORP': 'SONY',
-    'SHELLTRANSPORT': 'SHELL', 'SHELLPLC': 'SHELL',
-    'TOTALENERGIES': 'TOTALENERGIES', 'TOTALENERGIESSE': 'TOTALENERGIES',
-    'NESTLESA': 'NESTLE', 'NESTLE': 'NESTLE',
-    'NOVONORDISK': 'NOVONORDISK', 'NOVONORDISKA': 'NOVONORDISK',
-    'ROCHEGENUSSSCHEIN': 'ROCHE', 'ROCHE': 'ROCHE',
-    'ASMLHOLDING': 'ASML', 'ASML': 'ASML',
-    'LVMHMOETHENNESSY': 'LVMH', 'LVMHMOETHENNESSYLOUISVUITTON': 'LVMH',
-    'SABORIN': 'SAP', 'SAPAG': 'SAP', 'SAPSE': 'SAP',
-    'SIEMENSAG': 'SIEMENS', 'SIEMENS': 'SIEMENS',
-}
+# ── Security master (one integer id per issuer, persisted between runs) ──
+SECURITY_MASTER_PATH = BASE / 'data' / 'cache' / 'security_master.json'
+ISIN_BRIDGE_PATH = Path(__file__).resolve().parent.parent / 'reports' / 'adhoc' / 'data' / 'isin_to_stockid.json'
+_SECURITY_MASTER = {}
+
+
+def _normalizer_version():
+    """Fingerprint of the name_normalizer module (invalidates saved keys)."""
+    src = inspect.getsource(name_normalizer)
+    return hashlib.sha1(src.encode()).hexdigest()[:12]
+
+
+def security_master():
+    """Process-wide SecurityMaster, loaded from SECURITY_MASTER_PATH on first use."""
+    master = _SECURITY_MASTER.get('master')
+    if master is None:
+        master = SecurityMaster.load(SECURITY_MASTER_PATH, normalize_company_name, _normalizer_version())
+        master.register_keys(_COMPANY_ALIASES)
+        _SECURITY_MASTER['master'] = master
+    return master
+
+
+def register_holdings_sources(etf_holdings):
+    """Index loaded ETF holdings and the ISIN bridge in the security master.
+
+    Sources whose content is unchanged since the last saved run are skipped.
+    """
+    master = security_master()
+    changed = [tk for tk, df in etf_holdings.items() if master.register_holdings(tk, df)]
+    if ISIN_BRIDGE_PATH.exists():
+        bridge = json.loads(ISIN_BRIDGE_PATH.read_text(encoding='utf-8')).get('mappings', {})
+        master.register_isin_bridge(ISIN_BRIDGE_PATH.name, bridge)
+    if changed:
+        print(f'  Security master: {len(master)} issuers (re-indexed {len(changed)} sources)')
+    return master
+
+
+def save_security_master():
+    """Persist the security master if it changed during this run."""
+    security_master().save(SECURITY_MASTER_PATH)
+
+
+def norm_keys(names):
+    """normalize_company_name over a Series, cached in the security master."""
+    return security_master().norm_keys(names)
+
+
+def issuer_ids(keys):
+    """Integer issuer ids for normalized keys (new keys get new ids)."""
+    return security_master().key_ids(keys)
 
 
 def _build_sector_lookup_with_fuzzy(acwi):
     """Build sector lookup from ACWI data with fuzzy name matching fallback.
-    Returns (sector_lookup DataFrame, fuzzy_map dict).
+    Returns (sector_lookup DataFrame, SectorMatcher for names without an exact key).
     """
-    acwi['norm_key'] = acwi['name'].apply(normalize_company_name)
+    if 'norm_key' not in acwi.columns:
+        acwi['norm_key'] = norm_keys(acwi['name'])
     sector_lookup = acwi.drop_duplicates('norm_key').set_index('norm_key')[['sector', 'location']]
+    sector_matcher = SectorMatcher(acwi['norm_key'], acwi['sector'], acwi['location'], acwi['weight'])
+    return sector_lookup, sector_matcher
 
-    # Build prefix map for fuzzy matching: first 6 chars -> (sector, location)
-    # Only use unambiguous prefixes
-    prefix_map = {}
-    prefix_counts = {}
-    for _, row in acwi.iterrows():
-        nk = row['norm_key']
-        if len(nk) < 6:
-            continue
-        pfx = nk[:6]
-        if pfx not in prefix_counts:
-            prefix_counts[pfx] = set()
-        prefix_counts[pfx].add((row['sector'], row['location']))
-        prefix_map[pfx] = (row['sector'], row['location'])
 
-    # Only keep unambiguous prefixes (same sector for all matches)
-    fuzzy_map = {}
-    for pfx, sectors in prefix_counts.items():
-        if len(sectors) == 1:
-            fuzzy_map[pfx] = prefix_map[pfx]
-
-    return sector_lookup, fuzzy_map
+def _fill_fuzzy_sectors(df, sector_matcher):
+    """Fill missing sectors (and unmapped locations) in df from the fuzzy matcher, in place."""
+    todo = df.index[df['sector'].isna()]
+    if sector_matcher is None or not len(todo):
+        return
+    match = sector_matcher.match(df.loc[todo, 'norm_key'], df.loc[todo, 'location'])
+    match = match[match['sector'].notna()]
+    df.loc[match.index, 'sector'] = match['sector']
+    location = df.loc[match.index, 'location']
+    country = df.loc[match.index, 'country'] if 'country' in df.columns else ''
+    unmapped = location.isna() | (location == '') | (location == country)
+    df.loc[match.index[unmapped], 'location'] = match.loc[unmapped, 'location']
 
 
 COUNTRY_MAP = {
@@ -2314,21 +2390,28 @@ COUNTRY_MAP = {
 }
 
 
-def fund_to_json(df, name, acwi_nk, acwi_keys, sector_lookup):
-    """Convert stock-level DataFrame to JSON export format."""
+def fund_to_json(df, name, benchmark, acwi_keys, sector_lookup, breakdown=None):
+    """Convert stock-level DataFrame to JSON export format.
+
+    breakdown: precomputed (sectors, countries) Series, e.g. from
+    lookthrough_breakdown(); the benchmark's own frame uses the index's.
+    """
     if df.empty:
         return {
             'name': name, 'n_stocks': 0, 'total_weight': 0,
             'top_holdings': [], 'sectors': {}, 'countries': {},
             'overlap_with_acwi_pct': 0, 'correlation_with_acwi': 0,
-            'weights': {}, '_weight_vec': {},
+            'weights': {}, '_weight_vec': WeightRow(security_master()),
         }
 
-    valid = df[~df['sector'].isin(['', '-', 'Cash and/or Derivatives'])]
-    sectors = valid.groupby('sector')['weight'].sum().sort_values(ascending=False)
-    countries = valid.groupby('location')['weight'].sum().sort_values(ascending=False)
+    if breakdown is None and df is benchmark.frame:
+        breakdown = benchmark.sectors, benchmark.countries
+    sectors, countries = breakdown if breakdown is not None else sector_country_weights(df)
 
-    all_holdings = df[['name', 'weight', 'sector', 'location']].to_dict('records')
+    shown = df
+    if full_universe():
+        shown = df[df['weight'] >= FULL_UNIVERSE_MIN_WEIGHT]
+    all_holdings = shown[['name', 'weight', 'sector', 'location']].to_dict('records')
     for h in all_holdings:
         h['weight'] = round(h['weight'], 3)
 
@@ -2336,20 +2419,11 @@ def fund_to_json(df, name, acwi_nk, acwi_keys, sector_lookup):
 
     # Overlap with ACWI: Σ min(w_fund[i], w_acwi[i]) for all stocks
     # This is 1 − Active Share (Cremers & Petajisto 2009).
-    fund_weights = df.groupby(key_col)['weight'].sum()
-    acwi_weights = acwi_nk.groupby(key_col)['weight'].sum()
-    all_keys = fund_weights.index.union(acwi_weights.index)
-    fw = fund_weights.reindex(all_keys, fill_value=0)
-    aw = acwi_weights.reindex(all_keys, fill_value=0)
-    overlap_w = round(fw.clip(upper=aw).sum(), 2)
-
-    m = df[[key_col, 'weight']].merge(acwi_nk[[key_col, 'weight']], on=key_col, suffixes=('_f', '_a'))
-    corr = round(m['weight_f'].corr(m['weight_a']), 4) if len(m) > 5 else 0
+    overlap_w, corr = benchmark.compare(df)
 
-    weight_vec = df.groupby(key_col)['weight'].sum().to_dict()
-    weight_vec_export = {k: round(v, 4) for k, v in weight_vec.items() if v > 0.01}
+    weight_vec = df.groupby(key_col)['weight'].sum()
 
-    return {
+    fund_data = {
         'name': name,
         'n_stocks': len(df),
         'total_weight': round(df['weight'].sum(), 2),
@@ -2358,9 +2432,16 @@ def fund_to_json(df, name, acwi_nk, acwi_keys, sector_lookup):
         'countries': {k: round(v, 2) for k, v in countries.head(15).items()},
         'overlap_with_acwi_pct': overlap_w,
         'correlation_with_acwi': corr,
-        'weights': weight_vec_export,
-        '_weight_vec': weight_vec,
+        'weights': {},  # filled from the weight store at export
+        '_weight_vec': WeightRow(security_master(), weight_vec.index, weight_vec.to_numpy()),
     }
+    if len(shown) < len(df):
+        # Full-universe mode: report what was folded out of top_holdings
+        fund_data['other_holdings'] = {
+            'n_stocks': len(df) - len(shown),
+            'weight': round(df['weight'].sum() - shown['weight'].sum(), 3),
+        }
+    return fund_data
 
 
 ETF_DISPLAY_NAMES = {
@@ -2382,8 +2463,9 @@ def build_etf_breakdown(allocations, etf_holdings):
     breakdown = []
     for alloc in sorted(allocations, key=lambda a: -a['weight_pct']):
         isin = alloc.get('isin', '')
-        etk = ETF_ISIN_TO_CSV.get(isin, alloc.get('etf_ticker', ''))
-        if not etk or etk not in etf_holdings:
+        engine = lookthrough_engine(etf_holdings)
+        etk = engine.resolve(isin) or engine.resolve(alloc.get('etf_ticker'))
+        if not etk:
             continue
 
         fund_weight = alloc['weight_pct']
@@ -2394,63 +2476,162 @@ def build_etf_breakdown(allocations, etf_holdings):
                 display_name = display_name[len(prefix):]
                 break
 
-        eq = etf_holdings[etk]
-        eq = eq[eq['asset_class'] == 'Equity'].copy()
-        if etk == 'SAEM':
-            eq = eq.nlargest(SAEM_TOP_N, 'weight_pct')
-
-        stocks_only = eq[~eq['ticker'].isin(SUB_ETF_TICKERS)]
-        n_direct = len(stocks_only)
-
-        n_sub = 0
-        for _, r in eq.iterrows():
-            if r['ticker'] in SUB_ETF_TICKERS and r['ticker'] in etf_holdings:
-                sub_eq = etf_holdings[r['ticker']]
-                n_sub += len(sub_eq[sub_eq['asset_class'] == 'Equity'])
-
-        top = stocks_only.nlargest(20, 'weight_pct')
-        top_stocks = []
-        for _, r in top.iterrows():
-            top_stocks.append({
-                'name': r['name'],
-                'weight': round(fund_weight / 100 * r['weight_pct'], 3),
-            })
+        summary = lookthrough_engine(etf_holdings).etf_summary(etk, top=20)
+        top_stocks = [{'name': name, 'weight': round(fund_weight / 100 * w, 3)}
+                      for name, w in summary['top']]
 
         breakdown.append({
             'etf': etk,
             'isin': isin,
             'name': display_name,
             'fund_weight': round(fund_weight, 2),
-            'n_stocks': n_direct + n_sub,
+            'n_stocks': summary['n_stocks'],
             'top_stocks': top_stocks,
         })
 
     return breakdown
 
 
-def compute_pairwise_correlations(all_funds_data, fund_names):
-    """Compute weight correlation between all fund pairs."""
+SCENARIO_DIR = BASE / 'data' / 'cache' / 'scenarios'
+
+
+def scenario_model_path(month):
+    """What-if model file of month: YYYY-MM.npz, or YYYY-MM-full.npz for a --full-universe run."""
+    return SCENARIO_DIR / f'{month}{"-full" if full_universe() else ""}.npz'
+
+
+def build_scenario_model(etf_holdings, store, sleeves, sector_lookup, benchmark):
+    """ScenarioModel over every look-through ETF and the funds' sleeves ({fund: '_sleeve' of process_fund}).
+
+    Each ETF is looked through on its own and labelled as process_fund labels
+    a fund's look-through rows; a sleeve's allocation is its fund node's.
+    """
+    engine = lookthrough_engine(etf_holdings)
+    frames = {}
+    for node in etf_holdings:
+        if node not in engine:
+            continue
+        df = engine.to_frame(engine.combine([node]))
+        df['norm_key'] = norm_keys(df['name'])
+        df['issuer_id'] = issuer_ids(df['norm_key'])
+        df['sector'] = df['norm_key'].map(sector_lookup['sector']).fillna(df['sector'])
+        df.loc[df['sector'].isin(['', None]), 'sector'] = 'Unknown'
+        df['in_benchmark'] = benchmark.holds(df['stock_id'])
+        frames[node] = df
+
+    fund_sleeves = {}
+    for fund, sleeve in sleeves.items():
+        children, weights = engine.funds[sleeve['node']]
+        missing = [c for c in children if c not in frames]
+        if missing:
+            print(f'  WARNING: No what-if sleeve for {fund}: {", ".join(missing)} not an ETF node')
+            continue
+        fund_sleeves[fund] = {**sleeve, 'allocation': list(zip(children, weights))}
+    return ScenarioModel.build(store, benchmark, frames, fund_sleeves)
+
+
+def build_weight_store(all_funds_data):
+    """Move every fund's '_weight_vec' row into one WeightStore over shared issuer ids."""
+    rows = {fn: fd.pop('_weight_vec') for fn, fd in all_funds_data.items() if '_weight_vec' in fd}
+    store = WeightStore(security_master(), rows)
+    n_funds, n_keys = store.shape
+    print(f'  Weight store: {n_funds} funds × {n_keys} keys, {store.fill:.1%} filled ({store.format})')
+    return store
+
+
+HISTORY_DIR = BASE / 'data' / 'history'
+
+
+def save_exposure_history(store, month):
+    """Save the month's weight store to the exposure history (data/history/YYYY-MM.npz).
+
+    Skipped with --full-universe: the history is kept in default look-through
+    mode, and the month's file is committed.
+    """
+    path = HISTORY_DIR / f'{month}.npz'
+    if full_universe():
+        print(f'  Exposure history: {month} not saved (--full-universe run)')
+        return None
+    save_month(path, store)
+    n_months = len(list(HISTORY_DIR.glob('*.npz')))
+    print(f'  Exposure history: {month} saved ({path.stat().st_size / 1024:.0f} KB, {n_months} months)')
+    return path
+
+
+def export_weights(all_funds_data, store):
+    """Fill each fund's JSON 'weights' dict from the weight store."""
+    for fn, fd in all_funds_data.items():
+        if fn in store.fund_index:
+            fd['weights'] = store.export(fn)
+
+
+def compute_pairwise_correlations(store, fund_names):
+    """Compute weight correlation between all fund pairs.
+
+    Each pair is correlated over the union of the two funds' keys (a key the
+    other fund lacks counts as 0), computed for all pairs at once from sparse
+    sums (weight_store.union_correlations).
+    """
+    idx = [store.fund_index[fn] for fn in fund_names]
+    pick = np.ix_(idx, idx)
+    shared = store.cross(store.support())[pick]
+    prod = store.cross()[pick]
+    sums = store.totals()[idx], store.totals(store.data ** 2)[idx], np.diag(shared)
+    r, n = union_correlations(prod, shared, sums, sums)
+
     corr_matrix = {}
-    for fi in fund_names:
-        vi = all_funds_data[fi].get('_weight_vec', {})
-        for fj in fund_names:
-            vj = all_funds_data[fj].get('_weight_vec', {})
-            all_keys = set(vi.keys()) | set(vj.keys())
-            if len(all_keys) < 5:
-                corr_matrix[f'{fi}|{fj}'] = 0
-                continue
-            a = np.array([vi.get(k, 0) for k in all_keys])
-            b = np.array([vj.get(k, 0) for k in all_keys])
-            r = np.corrcoef(a, b)[0, 1]
-            corr_matrix[f'{fi}|{fj}'] = round(float(r), 4)
+    for i, fi in enumerate(fund_names):
+        for j, fj in enumerate(fund_names):
+            corr_matrix[f'{fi}|{fj}'] = 0 if n[i, j] < 5 else round(float(r[i, j]), 4)
     return corr_matrix
 
 
+def compute_overlap_stats(store, fund_names):
+    """Holding overlap between every ordered pair of distinct funds.
+
+    All pairs come from three matrix products over the store's support mask B
+    and weights W: shared counts B·Bᵀ, and the weight each fund holds in
+    shared keys W·Bᵀ (its transpose is the other fund's side). Only-A/only-B
+    figures are the fund totals minus the shared part.
+    """
+    idx = [store.fund_index[fn] for fn in fund_names]
+    pick = np.ix_(idx, idx)
+    support = store.support()
+    shared = store.cross(support)[pick].round().astype(int)
+    shared_w = store.cross(store.data, support)[pick]
+    size = np.diag(shared)
+    total_w = store.totals()[idx]
+
+    def weight(n_keys, w):
+        # An empty key set sums to int 0, as in the JSON before
+        return round(float(w), 2) if n_keys else 0
+
+    overlap_stats = {}
+    for i, fi in enumerate(fund_names):
+        for j, fj in enumerate(fund_names):
+            if i == j:
+                continue
+            n_shared = int(shared[i, j])
+            only_a, only_b = int(size[i]) - n_shared, int(size[j]) - n_shared
+            overlap_stats[f'{fi}|{fj}'] = {
+                'shared': n_shared,
+                'only_a': only_a,
+                'only_b': only_b,
+                'total_a': int(size[i]),
+                'total_b': int(size[j]),
+                'shared_weight_a': weight(n_shared, shared_w[i, j]),
+                'shared_weight_b': weight(n_shared, shared_w[j, i]),
+                'only_weight_a': weight(only_a, total_w[i] - shared_w[i, j]),
+                'only_weight_b': weight(only_b, total_w[j] - shared_w[j, i]),
+            }
+    return overlap_stats
+
+
 # ═══════════════════════════════════════════════════════════════════
 # SECTION 5: FUND PROCESSING FUNCTIONS
 # ═══════════════════════════════════════════════════════════════════
 
-def process_etf_fund(name, allocations, etf_holdings, acwi, acwi_keys, sector_lookup):
+def process_etf_fund(name, allocations, etf_holdings, benchmark, acwi_keys, sector_lookup):
     """Process Type A fund (ETF-based): look through ETFs to stocks."""
     # Enrich allocations with etf_ticker mapping
     for alloc in allocations:
@@ -2464,18 +2645,16 @@ def process_etf_fund(name, allocations, etf_holdings, acwi, acwi_keys, sector_lo
         return None
 
     # Filter to ACWI universe and normalize weights
-    acwi_universe = set(acwi['stock_id'])
-    df = df[df['stock_id'].isin(acwi_universe)].copy()
+    df = df[benchmark.holds(df['stock_id'])].copy()
     if df.empty:
         # Keep all stocks if none match ACWI
         df, _ = build_lookthrough(allocations, etf_holdings)
     total_w = df['weight'].sum()
     if total_w > 0:
         df['weight'] = df['weight'] / total_w * 100
-    df['norm_key'] = df['name'].apply(normalize_company_name)
+    df['norm_key'] = norm_keys(df['name'])
 
-    acwi_nk = acwi.copy()
-    fund_data = fund_to_json(df, name, acwi_nk, acwi_keys, sector_lookup)
+    fund_data = fund_to_json(df, name, benchmark, acwi_keys, sector_lookup)
     fund_data['etf_breakdown'] = build_etf_breakdown(allocations, etf_holdings)
     fund_data['asset_classes'] = {'stocks': 100.0}
 
@@ -2488,8 +2667,8 @@ def process_etf_fund(name, allocations, etf_holdings, acwi, acwi_keys, sector_lo
     return fund_data
 
 
-def process_stock_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_lookup,
-                       fuzzy_sector_map=None):
+def process_stock_fund(name, parsed, etf_holdings, benchmark, acwi_keys, sector_lookup,
+                       sector_matcher=None):
     """Process Type B fund (direct stocks from Swedbank K-series PDF)."""
     stocks = parsed['stocks']
     if not stocks:
@@ -2499,19 +2678,11 @@ def process_stock_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_looku
     df = pd.DataFrame(stocks)
     df = df.rename(columns={'weight_pct': 'weight'})
     df['location'] = df['country'].map(COUNTRY_MAP).fillna(df['country'])
-    df['norm_key'] = df['name'].apply(normalize_company_name)
+    df['norm_key'] = norm_keys(df['name'])
 
-    # Try to enrich with ACWI sector data (exact match first, then fuzzy prefix)
+    # Try to enrich with ACWI sector data (exact match first, then fuzzy name match)
     df['sector'] = df['norm_key'].map(sector_lookup['sector'])
-    if fuzzy_sector_map:
-        for idx in df[df['sector'].isna()].index:
-            nk = df.at[idx, 'norm_key']
-            if len(nk) >= 6:
-                match = fuzzy_sector_map.get(nk[:6])
-                if match:
-                    df.at[idx, 'sector'] = match[0]
-                    if not df.at[idx, 'location'] or df.at[idx, 'location'] == df.at[idx, 'country']:
-                        df.at[idx, 'location'] = match[1]
+    _fill_fuzzy_sectors(df, sector_matcher)
     df.loc[df['sector'].isna(), 'sector'] = 'Unknown'
     df = df.sort_values('weight', ascending=False).reset_index(drop=True)
 
@@ -2536,7 +2707,7 @@ def process_stock_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_looku
     if lookthrough_allocs:
         lt_df, _ = build_lookthrough(lookthrough_allocs, etf_holdings)
         if not lt_df.empty:
-            lt_df['norm_key'] = lt_df['name'].apply(normalize_company_name)
+            lt_df['norm_key'] = norm_keys(lt_df['name'])
             lt_df['sector'] = lt_df['norm_key'].map(sector_lookup['sector']).fillna('')
             lt_df.loc[lt_df['sector'] == '', 'sector'] = 'Unknown'
             # Ensure direct stocks df has matching columns
@@ -2554,8 +2725,7 @@ def process_stock_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_looku
             lt_pct = sum(a['weight_pct'] for a in lookthrough_allocs)
             print(f'  Look-through: {len(lookthrough_allocs)} equity funds ({lt_pct:.1f}%) -> {len(lt_df)} stocks merged')
 
-    acwi_nk = acwi.copy()
-    fund_data = fund_to_json(df, name, acwi_nk, acwi_keys, sector_lookup)
+    fund_data = fund_to_json(df, name, benchmark, acwi_keys, sector_lookup)
 
     # Add all asset classes
     bonds_pct = sum(b['weight_pct'] for b in parsed.get('bonds', []))
@@ -2614,20 +2784,17 @@ def process_stock_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_looku
 
     # Add non-stock holdings to weight vectors for overlap/correlation
     wv = fund_data['_weight_vec']
-    wv_export = fund_data['weights']
     for prefix, holdings in [('BOND', bond_holdings), ('ETF', etf_holdings_list),
                               ('RE', re_holdings), ('PE', pe_holdings)]:
         for h in holdings:
             key = f"{prefix}|{h['name']}"
             w = h['weight']
             wv[key] = w
-            if w > 0.01:
-                wv_export[key] = round(w, 4)
 
     return fund_data
 
 
-def process_mixed_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_lookup):
+def process_mixed_fund(name, parsed, etf_holdings, benchmark, acwi_keys, sector_lookup):
     """Process Type C fund (mixed active: LHV, SEB 55+) with all asset classes."""
     # Build stock DataFrame
     stock_holdings = [h for h in parsed.get('holdings', []) if h.get('type') == 'stocks']
@@ -2636,15 +2803,14 @@ def process_mixed_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_looku
         df = df.rename(columns={'country': 'location'})
         if 'location' not in df.columns:
             df['location'] = ''
-        df['norm_key'] = df['name'].apply(normalize_company_name)
+        df['norm_key'] = norm_keys(df['name'])
         df['sector'] = df['norm_key'].map(sector_lookup['sector'])
         df.loc[df['sector'].isna(), 'sector'] = 'Direct Investment'
         df = df.sort_values('weight', ascending=False).reset_index(drop=True)
     else:
         df = pd.DataFrame(columns=['name', 'weight', 'sector', 'location', 'norm_key'])
 
-    acwi_nk = acwi.copy()
-    fund_data = fund_to_json(df, name, acwi_nk, acwi_keys, sector_lookup)
+    fund_data = fund_to_json(df, name, benchmark, acwi_keys, sector_lookup)
     fund_data['asset_classes'] = parsed.get('asset_classes', {})
 
     # Add PE/RE/bond/ETF holdings
@@ -2667,27 +2833,18 @@ def process_mixed_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_looku
 
     # Add PE/RE/bonds/ETFs to weight vector
     wv = fund_data['_weight_vec']
-    wv_export = fund_data['weights']
     for h in pe_holdings:
         key = f"PE|{h['name']}"
         wv[key] = h['weight']
-        if h['weight'] > 0.01:
-            wv_export[key] = round(h['weight'], 4)
     for h in re_holdings:
         key = f"RE|{h['name']}"
         wv[key] = h['weight']
-        if h['weight'] > 0.01:
-            wv_export[key] = round(h['weight'], 4)
     for h in bond_holdings:
         key = f"BOND|{h['name']}"
         wv[key] = h.get('weight', h.get('weight_pct', 0))
-        if wv[key] > 0.01:
-            wv_export[key] = round(wv[key], 4)
     for h in etf_holdings_list:
         key = f"ETF|{h['name']}"
         wv[key] = h['weight']
-        if h['weight'] > 0.01:
-            wv_export[key] = round(h['weight'], 4)
 
     # Add to sectors
     sectors = fund_data['sectors']
@@ -2713,7 +2870,7 @@ def process_mixed_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_looku
     return fund_data
 
 
-def process_seb_55(parsed, etf_holdings, acwi, acwi_keys, sector_lookup):
+def process_seb_55(parsed, etf_holdings, benchmark, acwi_keys, sector_lookup):
     """Process SEB 55+ fund with ETF look-through where possible."""
     # Build equity fund allocations for look-through
     equity_allocs = parsed.get('equity_funds', [])
@@ -2761,13 +2918,12 @@ def process_seb_55(parsed, etf_holdings, acwi, acwi_keys, sector_lookup):
             df = stock_df[['stock_id', 'ticker', 'name', 'weight', 'sector', 'location']].copy()
 
     if not df.empty:
-        df['norm_key'] = df['name'].apply(normalize_company_name)
+        df['norm_key'] = norm_keys(df['name'])
         df['sector'] = df['norm_key'].map(sector_lookup['sector']).fillna(df['sector'])
         df.loc[df['sector'].isin(['', None]), 'sector'] = 'Direct Investment'
         df = df.sort_values('weight', ascending=False).reset_index(drop=True)
 
-    acwi_nk = acwi.copy()
-    fund_data = fund_to_json(df, 'SEB 55+', acwi_nk, acwi_keys, sector_lookup)
+    fund_data = fund_to_json(df, 'SEB 55+', benchmark, acwi_keys, sector_lookup)
     fund_data['asset_classes'] = parsed.get('asset_classes', {})
 
     # Add non-stock holdings
@@ -2784,25 +2940,18 @@ def process_seb_55(parsed, etf_holdings, acwi, acwi_keys, sector_lookup):
 
     # Update weight vectors
     wv = fund_data['_weight_vec']
-    wv_export = fund_data['weights']
     for h in pe_holdings + re_holdings:
         prefix = 'PE' if h['type'] == 'pe' else 'RE'
         key = f"{prefix}|{h['name']}"
         wv[key] = h['weight']
-        if h['weight'] > 0.01:
-            wv_export[key] = round(h['weight'], 4)
     for h in bond_holdings + bond_fund_holdings:
         key = f"BOND|{h['name']}"
         w = h.get('weight', h.get('weight_pct', 0))
         wv[key] = w
-        if w > 0.01:
-            wv_export[key] = round(w, 4)
     for h in etf_only_entries + opaque_entries:
         key = f"ETF|{h['name']}"
         w = h.get('weight', h.get('weight_pct', 0))
         wv[key] = w
-        if w > 0.01:
-            wv_export[key] = round(w, 4)
 
     # Update sectors
     sectors = fund_data['sectors']
@@ -2827,7 +2976,7 @@ def process_seb_55(parsed, etf_holdings, acwi, acwi_keys, sector_lookup):
     return fund_data
 
 
-def process_bond_fund(name, parsed, acwi, acwi_keys, sector_lookup):
+def process_bond_fund(name, parsed, benchmark, acwi_keys, sector_lookup):
     """Process a bond-dominated fund (e.g. Tuleva Võlakirjad, Swedbank Konservatiivne).
     These funds have 0 or very few stocks — mostly bonds/bond funds/deposits.
     """
@@ -2841,14 +2990,13 @@ def process_bond_fund(name, parsed, acwi, acwi_keys, sector_lookup):
         df = pd.DataFrame(stocks)
         df = df.rename(columns={'weight_pct': 'weight'})
         df['location'] = df.get('country', pd.Series()).map(COUNTRY_MAP).fillna('')
-        df['norm_key'] = df['name'].apply(normalize_company_name)
+        df['norm_key'] = norm_keys(df['name'])
         df['sector'] = df['norm_key'].map(sector_lookup['sector']).fillna('Direct Investment')
         df = df.sort_values('weight', ascending=False).reset_index(drop=True)
     else:
         df = pd.DataFrame()
 
-    acwi_nk = acwi.copy()
-    fund_data = fund_to_json(df, name, acwi_nk, acwi_keys, sector_lookup)
+    fund_data = fund_to_json(df, name, benchmark, acwi_keys, sector_lookup)
 
     # Compute asset class totals
     bond_fund_pct = sum(bf['weight_pct'] for bf in bond_funds)
@@ -2872,13 +3020,10 @@ def process_bond_fund(name, parsed, acwi, acwi_keys, sector_lookup):
 
     # Add bond holdings to weight vectors
     wv = fund_data['_weight_vec']
-    wv_export = fund_data['weights']
     for h in bond_holdings:
         key = f"BOND|{h['name']}"
         w = h['weight']
         wv[key] = w
-        if w > 0.01:
-            wv_export[key] = round(w, 4)
 
     # Update sectors
     sectors = fund_data['sectors']
@@ -2917,7 +3062,7 @@ LUMINOR_ETF_PROXY_MAP = {
 }
 
 
-def process_luminor_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_lookup):
+def process_luminor_fund(name, parsed, etf_holdings, benchmark, acwi_keys, sector_lookup):
     """Process Luminor 16-50 fund with ETF look-through."""
     equity_funds = parsed.get('equity_funds', [])
 
@@ -2946,18 +3091,16 @@ def process_luminor_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_loo
     df, _ = build_lookthrough(allocations, etf_holdings)
 
     if not df.empty:
-        acwi_universe = set(acwi['stock_id'])
-        df_filtered = df[df['stock_id'].isin(acwi_universe)].copy()
+        df_filtered = df[benchmark.holds(df['stock_id'])].copy()
         if not df_filtered.empty:
             df = df_filtered
         equity_total = sum(ef['weight_pct'] for ef in equity_funds)
         total_w = df['weight'].sum()
         if total_w > 0:
             df['weight'] = df['weight'] / total_w * equity_total
-        df['norm_key'] = df['name'].apply(normalize_company_name)
+        df['norm_key'] = norm_keys(df['name'])
 
-    acwi_nk = acwi.copy()
-    fund_data = fund_to_json(df, name, acwi_nk, acwi_keys, sector_lookup)
+    fund_data = fund_to_json(df, name, benchmark, acwi_keys, sector_lookup)
 
     # ETF breakdown
     fund_data['etf_breakdown'] = build_etf_breakdown(
@@ -2994,7 +3137,6 @@ def process_luminor_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_loo
 
     # Add non-stock entries to weight vectors
     wv = fund_data['_weight_vec']
-    wv_export = fund_data['weights']
     for prefix, holdings in [('BOND', fund_data['bond_holdings']),
                               ('RE', fund_data['re_holdings']),
                               ('PE', fund_data['pe_holdings']),
@@ -3003,8 +3145,6 @@ def process_luminor_fund(name, parsed, etf_holdings, acwi, acwi_keys, sector_loo
             key = f"{prefix}|{h['name']}"
             w = h.get('weight', h.get('weight_pct', 0))
             wv[key] = w
-            if w > 0.01:
-                wv_export[key] = round(w, 4)
 
     # Update sectors
     sectors = fund_data['sectors']
@@ -3067,24 +3207,25 @@ def main():
         etf_holdings[tk] = load_manual_holdings(tk)
         print(f'  {tk}: {len(etf_holdings[tk])} rows')
 
-    # Build SSAC_EM: EM-country stocks from SSAC (proxy for standard MSCI EM large+mid cap)
-    print('\nBuilding SSAC_EM (EM from ACWI)...')
-    etf_holdings['SSAC_EM'] = build_ssac_em(etf_holdings)
-    print(f'  SSAC_EM: {len(etf_holdings["SSAC_EM"])} rows (EM-country equities from SSAC)')
+    # Build derived sources, e.g. SSAC_EM: EM-country stocks from SSAC
+    for tk, (parent, _) in DERIVED_HOLDINGS.items():
+        print(f'\nBuilding {tk} (from {parent})...')
+        etf_holdings[tk] = build_derived_holdings(etf_holdings, tk)
+        print(f'  {tk}: {len(etf_holdings[tk])} rows (filtered equities from {parent})')
+    register_holdings_sources(etf_holdings)
 
     # Step 2: Build ACWI benchmark
     print('\nBuilding ACWI benchmark...')
-    acwi = build_acwi(etf_holdings)
-    acwi['weight'] = acwi['weight'] / acwi['weight'].sum() * 100
-    acwi['norm_key'] = acwi['name'].apply(normalize_company_name)
-    sector_lookup, fuzzy_sector_map = _build_sector_lookup_with_fuzzy(acwi)
+    benchmark = benchmark_index(etf_holdings, 'ACWI')
+    acwi = benchmark.frame
+    sector_lookup, sector_matcher = _build_sector_lookup_with_fuzzy(acwi)
     acwi_keys = set(acwi['norm_key'])
-    print(f'  ACWI: {len(acwi)} stocks, {len(fuzzy_sector_map)} fuzzy prefixes')
+    print(f'  ACWI: {len(acwi)} stocks, {len(sector_matcher)} fuzzy-match keys')
 
     all_funds_data = {}
 
     # ACWI benchmark (internal, not in fund_order)
-    acwi_data = fund_to_json(acwi, 'MSCI ACWI', acwi, acwi_keys, sector_lookup)
+    acwi_data = fund_to_json(acwi, 'MSCI ACWI', benchmark, acwi_keys, sector_lookup)
     acwi_data['type'] = 'benchmark'
     acwi_data['provider'] = 'MSCI'
     acwi_data['asset_classes'] = {'stocks': 100.0}
@@ -3099,7 +3240,7 @@ def main():
         print(f'     {a["name"][:50]:50s} {a["isin"]} {a["weight_pct"]:.2f}%')
 
     tuleva_data = process_etf_fund('Tuleva Maailma Aktsiad', tuleva_parsed['allocations'],
-                                    etf_holdings, acwi, acwi_keys, sector_lookup)
+                                    etf_holdings, benchmark, acwi_keys, sector_lookup)
     if tuleva_data:
         tuleva_data['type'] = 'index'
         tuleva_data['provider'] = 'Tuleva'
@@ -3119,7 +3260,7 @@ def main():
         lum_parsed = parse_luminor_monthly(lum_pdf)
     print(f'   {len(lum_parsed["equity_funds"])} equity funds, {len(lum_parsed["bond_funds"])} bond funds')
 
-    lum_data = process_luminor_fund('Luminor 16-50', lum_parsed, etf_holdings, acwi, acwi_keys, sector_lookup)
+    lum_data = process_luminor_fund('Luminor 16-50', lum_parsed, etf_holdings, benchmark, acwi_keys, sector_lookup)
     if lum_data:
         lum_data['type'] = 'mixed'
         lum_data['provider'] = 'Luminor'
@@ -3144,7 +3285,7 @@ def main():
         print(f'     {a["name"][:45]:45s} {a["isin"]} {a["weight_pct"]:5.2f}% => {mapped}')
 
     seb_idx_data = process_etf_fund('SEB Indeks', seb_idx_parsed['allocations'],
-                                     etf_holdings, acwi, acwi_keys, sector_lookup)
+                                     etf_holdings, benchmark, acwi_keys, sector_lookup)
     if seb_idx_data:
         seb_idx_data['type'] = 'index'
         seb_idx_data['provider'] = 'SEB'
@@ -3171,8 +3312,8 @@ def main():
         parsed = parse_swedbank_monthly(pdf_path)
         print(f'   {len(parsed["stocks"])} stocks, {len(parsed["bonds"])} bonds')
 
-        fund_data = process_stock_fund(fund_name, parsed, etf_holdings, acwi, acwi_keys, sector_lookup,
-                                       fuzzy_sector_map)
+        fund_data = process_stock_fund(fund_name, parsed, etf_holdings, benchmark, acwi_keys, sector_lookup,
+                                       sector_matcher)
         if fund_data:
             fund_data['type'] = 'mixed'
             fund_data['provider'] = 'Swedbank'
@@ -3188,7 +3329,7 @@ def main():
     with open(parsed_path) as f:
         llk50_raw = json.load(f)
 
-    llk50_data = process_mixed_fund('LHV Ettevõtlik', llk50_raw, etf_holdings, acwi, acwi_keys, sector_lookup)
+    llk50_data = process_mixed_fund('LHV Ettevõtlik', llk50_raw, etf_holdings, benchmark, acwi_keys, sector_lookup)
     if llk50_data:
         llk50_data['type'] = 'active'
         llk50_data['provider'] = 'LHV'
@@ -3208,7 +3349,7 @@ def main():
     etf_count = len([h for h in lxk_parsed.get('holdings', []) if h.get('type') == 'etfs'])
     print(f'   {stock_count} stocks, {etf_count} ETFs, {len(lxk_parsed["pe_holdings"])} PE, {len(lxk_parsed["re_holdings"])} RE')
 
-    lxk_data = process_mixed_fund('LHV Julge', lxk_parsed, etf_holdings, acwi, acwi_keys, sector_lookup)
+    lxk_data = process_mixed_fund('LHV Julge', lxk_parsed, etf_holdings, benchmark, acwi_keys, sector_lookup)
     if lxk_data:
         lxk_data['type'] = 'active'
         lxk_data['provider'] = 'LHV'
@@ -3240,7 +3381,7 @@ def main():
         seb55_parsed = parse_seb_55_monthly(seb55_pdf)
     print(f'   {len(seb55_parsed["equity_funds"])} equity ETFs, {len(seb55_parsed["bonds"])} bonds')
 
-    seb55_data = process_seb_55(seb55_parsed, etf_holdings, acwi, acwi_keys, sector_lookup)
+    seb55_data = process_seb_55(seb55_parsed, etf_holdings, benchmark, acwi_keys, sector_lookup)
     if seb55_data:
         seb55_data['type'] = 'active'
         seb55_data['provider'] = 'SEB'
@@ -3254,7 +3395,7 @@ def main():
     print('\n11. LHV Rahulik...')
     lxk00_pdf = REPORT_DIR / (reports_cfg['LHV Rahulik']['pdf'] if reports_cfg and 'LHV Rahulik' in reports_cfg else 'est_LXK00_raport_20260131.pdf')
     lxk00_parsed = parse_lhv_monthly(lxk00_pdf)
-    lxk00_data = process_mixed_fund('LHV Rahulik', lxk00_parsed, etf_holdings, acwi, acwi_keys, sector_lookup)
+    lxk00_data = process_mixed_fund('LHV Rahulik', lxk00_parsed, etf_holdings, benchmark, acwi_keys, sector_lookup)
     if lxk00_data:
         lxk00_data['type'] = 'conservative'
         lxk00_data['provider'] = 'LHV'
@@ -3271,7 +3412,7 @@ def main():
     lik_etf_holdings = [h for h in lik_parsed.get('holdings', []) if h.get('type') == 'etfs']
     lik_allocations = [{'name': h['name'], 'isin': h.get('isin', ''), 'weight_pct': h['weight']}
                        for h in lik_etf_holdings]
-    lik_data = process_etf_fund('LHV Indeks', lik_allocations, etf_holdings, acwi, acwi_keys, sector_lookup)
+    lik_data = process_etf_fund('LHV Indeks', lik_allocations, etf_holdings, benchmark, acwi_keys, sector_lookup)
     if lik_data:
         lik_data['type'] = 'index'
         lik_data['provider'] = 'LHV'
@@ -3284,7 +3425,7 @@ def main():
     print('\n13. LHV Tasakaalukas...')
     lmk_pdf = REPORT_DIR / (reports_cfg['LHV Tasakaalukas']['pdf'] if reports_cfg and 'LHV Tasakaalukas' in reports_cfg else 'est_LMK25_raport_20260131.pdf')
     lmk_parsed = parse_lhv_monthly(lmk_pdf)
-    lmk_data = process_mixed_fund('LHV Tasakaalukas', lmk_parsed, etf_holdings, acwi, acwi_keys, sector_lookup)
+    lmk_data = process_mixed_fund('LHV Tasakaalukas', lmk_parsed, etf_holdings, benchmark, acwi_keys, sector_lookup)
     if lmk_data:
         lmk_data['type'] = 'active'
         lmk_data['provider'] = 'LHV'
@@ -3308,7 +3449,7 @@ def main():
             print('   (from monthly JSON)')
         else:
             lum_parsed = lum_fallback()
-        lum_data = process_luminor_fund(lum_name, lum_parsed, etf_holdings, acwi, acwi_keys, sector_lookup)
+        lum_data = process_luminor_fund(lum_name, lum_parsed, etf_holdings, benchmark, acwi_keys, sector_lookup)
         if lum_data:
             lum_data['type'] = lum_type
             lum_data['provider'] = 'Luminor'
@@ -3346,7 +3487,7 @@ def main():
                 're': round(sum(r['weight_pct'] for r in seb_re), 2),
             },
         }
-        seb_data = process_seb_55(seb_parsed, etf_holdings, acwi, acwi_keys, sector_lookup)
+        seb_data = process_seb_55(seb_parsed, etf_holdings, benchmark, acwi_keys, sector_lookup)
         if seb_data:
             seb_data['type'] = seb_type
             seb_data['provider'] = 'SEB'
@@ -3361,8 +3502,8 @@ def main():
     print('\n21. Swedbank Indeks...')
     swi_pdf = REPORT_DIR / (reports_cfg['Swedbank Indeks']['pdf'] if reports_cfg and 'Swedbank Indeks' in reports_cfg else 'Ki_investment_portfolio.pdf')
     swi_parsed = parse_swedbank_monthly(swi_pdf)
-    swi_data = process_stock_fund('Swedbank Indeks', swi_parsed, etf_holdings, acwi, acwi_keys,
-                                   sector_lookup, fuzzy_sector_map)
+    swi_data = process_stock_fund('Swedbank Indeks', swi_parsed, etf_holdings, benchmark, acwi_keys,
+                                   sector_lookup, sector_matcher)
     if swi_data:
         swi_data['type'] = 'index'
         swi_data['provider'] = 'Swedbank'
@@ -3375,8 +3516,8 @@ def main():
     print('\n22. Swedbank 2000-09...')
     sw2000_pdf = REPORT_DIR / (reports_cfg['Swedbank 2000-09']['pdf'] if reports_cfg and 'Swedbank 2000-09' in reports_cfg else 'K2000_investment_portfolio.pdf')
     sw2000_parsed = parse_swedbank_monthly(sw2000_pdf)
-    sw2000_data = process_stock_fund('Swedbank 2000-09', sw2000_parsed, etf_holdings, acwi, acwi_keys,
-                                      sector_lookup, fuzzy_sector_map)
+    sw2000_data = process_stock_fund('Swedbank 2000-09', sw2000_parsed, etf_holdings, benchmark, acwi_keys,
+                                      sector_lookup, sector_matcher)
     if sw2000_data:
         sw2000_data['type'] = 'mixed'
         sw2000_data['provider'] = 'Swedbank'
@@ -3394,7 +3535,7 @@ def main():
                                      for b in swk_parsed.get('bonds', [])],
         'deposits_pct': swk_parsed.get('deposits_pct', 0),
         'stocks': [],
-    }, acwi, acwi_keys, sector_lookup)
+    }, benchmark, acwi_keys, sector_lookup)
     if swk_data:
         swk_data['type'] = 'conservative'
         swk_data['provider'] = 'Swedbank'
@@ -3407,8 +3548,6 @@ def main():
             for h in swk_data['re_holdings']:
                 key = f"RE|{h['name']}"
                 swk_data['_weight_vec'][key] = h['weight']
-                if h['weight'] > 0.01:
-                    swk_data['weights'][key] = round(h['weight'], 4)
         all_funds_data['Swedbank Konservatiivne'] = swk_data
         print(f'   => {swk_data["n_stocks"]} stocks, {len(swk_parsed.get("bonds", []))} bonds')
         _date = reports_cfg['Swedbank Konservatiivne']['date'] if reports_cfg and 'Swedbank Konservatiivne' in reports_cfg else '31.01.2026'
@@ -3424,7 +3563,7 @@ def main():
         'bonds': [],
         'deposits_pct': tuk_parsed['deposits_pct'],
         'stocks': [],
-    }, acwi, acwi_keys, sector_lookup)
+    }, benchmark, acwi_keys, sector_lookup)
     if tuk_data:
         tuk_data['type'] = 'bond'
         tuk_data['provider'] = 'Tuleva'
@@ -3443,44 +3582,20 @@ def main():
         fd = all_funds_data[fn]
         print(f'  {fn:25s} {fd["n_stocks"]:5d} stocks  {fd["total_weight"]:6.1f}% weight')
 
+    store = build_weight_store(all_funds_data)
+
     print('\nComputing pairwise correlations...')
-    corr_matrix = compute_pairwise_correlations(all_funds_data, all_fund_names)
+    corr_matrix = compute_pairwise_correlations(store, all_fund_names)
 
     print('Computing overlap stats...')
-    overlap_stats = {}
-    for fi in fund_order:
-        vi = all_funds_data[fi]['_weight_vec']
-        ki = set(vi.keys())
-        for fj in fund_order:
-            if fi == fj:
-                continue
-            vj = all_funds_data[fj]['_weight_vec']
-            kj = set(vj.keys())
-            shared = ki & kj
-            only_i = ki - kj
-            only_j = kj - ki
-            sw_i = sum(vi.get(k, 0) for k in shared)
-            sw_j = sum(vj.get(k, 0) for k in shared)
-            ow_i = sum(vi.get(k, 0) for k in only_i)
-            ow_j = sum(vj.get(k, 0) for k in only_j)
-            overlap_stats[f'{fi}|{fj}'] = {
-                'shared': len(shared),
-                'only_a': len(only_i),
-                'only_b': len(only_j),
-                'total_a': len(ki),
-                'total_b': len(kj),
-                'shared_weight_a': round(sw_i, 2),
-                'shared_weight_b': round(sw_j, 2),
-                'only_weight_a': round(ow_i, 2),
-                'only_weight_b': round(ow_j, 2),
-            }
+    overlap_stats = compute_overlap_stats(store, fund_order)
 
     with open(OUT_DIR / 'overlap_stats.json', 'w') as f:
         json.dump(overlap_stats, f, indent=2)
+    save_security_master()
+    save_lookthrough_cache()
 
-    # Remove internal weight vectors
-    for fd in all_funds_data.values():
-        fd.pop('_weight_vec', None)
+    export_weights(all_funds_data, store)
 
     acwi_sectors = list(all_funds_data['ACWI']['sectors'].keys())
 
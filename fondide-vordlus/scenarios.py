@@ -0,0 +1,327 @@
+"""
+What-if reallocations of a fund over cached ETF exposure vectors.
+
+A scenario is a fund's ETF allocation with some weights changed (deltas in
+percentage points) or replaced outright. Every ETF node is kept as a
+vector over the weight store's issuer ids, in % of the ETF: once as looked
+through, once restricted to benchmark constituents. The same goes for its
+sector and country weights and for the keys it lists (held at weight 0
+included: they count as held in correlations, as in the store). A fund's
+look-through sleeve is the allocation × ETF product, treated as
+process_fund treats it:
+  - filtered: restricted to the benchmark (pure-ETF funds outside SEB)
+  - normalize: rescaled to 100 (pure-ETF funds), else multiplied by the
+    fund's fixed look-through scale
+Whatever else the fund holds (direct stocks, bonds, opaque funds) stays as
+exported; a scenario swaps the base sleeve for the new one, so its weights
+must total what the base sleeve did (deltas net to 0). With drop_rest the
+fund is its ETF sleeve alone: everything else is dropped and the candidate
+allocation is scaled up to take over its weight (so a candidate replaces the
+direct holdings with its ETFs; its own total only sets their proportions).
+Sector and country shifts only cover the look-through sleeves: the model
+has no sector or country weights for the dropped holdings. Stocks are keyed
+by their name in each ETF, so a stock the export keys by another ETF's
+spelling of its name is split across two keys when its weight moves.
+
+From the resulting weight vector: overlap with the benchmark (Σ min, as
+BenchmarkIndex.overlap), weight correlation with every fund in the store
+(as compute_pairwise_correlations), sector/country shifts against the base
+allocation and the top holdings. Many candidate allocations are evaluated
+at once as a single candidates × ETFs matrix product.
+
+The model is saved per month to data/cache/scenarios/ (compressed .npz;
+--full-universe runs as YYYY-MM-full.npz, next to the default model), so
+notebooks can load it without running the pipeline:
+  model = ScenarioModel.load(Path('data/cache/scenarios/2026-02.npz'))
+  model.evaluate('Tuleva', deltas={'SASU': -5, 'SAEM': +5})
+"""
+import numpy as np
+import pandas as pd
+
+from benchmark_index import EXCLUDED_SECTORS
+from weight_store import union_correlations
+
+ZERO_TOL = 1e-9     # |weight| below this is rounding noise of swapping sleeves
+MIN_CORR_KEYS = 5   # correlations over fewer keys are reported as 0, as in the export
+TOTAL_TOL = 0.1     # pp a candidate sleeve's total may differ from the base sleeve's (rounded weights)
+
+
+def parse_what_if(spec):
+    """(fund, {node: delta pp}) from a --what-if spec such as 'Tuleva:SASU=-5,SAEM=+5'."""
+    fund, sep, changes = spec.rpartition(':')
+    if not sep or not fund.strip():
+        raise ValueError(f'What-if spec must look like FUND:NODE=DELTA,... (got {spec!r})')
+    deltas = {}
+    for change in filter(None, (c.strip() for c in changes.split(','))):
+        node, sep, delta = change.partition('=')
+        try:
+            deltas[node.strip()] = deltas.get(node.strip(), 0.0) + float(delta)
+        except ValueError:
+            raise ValueError(f'Bad what-if change {change!r} in {spec!r}') from None
+        if not sep:
+            raise ValueError(f'Bad what-if change {change!r} in {spec!r}')
+    return fund.strip(), deltas
+
+
+class ScenarioModel:
+    """ETF exposure vectors, fund sleeves and store weights for what-if evaluation.
+
+    Built with ScenarioModel.build() during the pipeline run, or loaded from
+    a saved month. data holds only numpy arrays (see save()).
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.benchmark = str(data['benchmark'])
+        self.keys = data['keys']
+        self.nodes = data['nodes'].tolist()
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.funds = data['funds'].tolist()
+        self.sleeve_index = {fund: i for i, fund in enumerate(data['sleeve_funds'].tolist())}
+
+        weights = data['weights']
+        support = data['support']
+        self._store_sums = (weights.sum(1), (weights ** 2).sum(1), support.sum(1).astype(float))
+
+    # ── Construction / persistence ──
+
+    @classmethod
+    def build(cls, store, benchmark, node_frames, sleeves):
+        """Model from the month's weight store and look-through results.
+
+        node_frames: {node: stock-level frame of the node alone} with issuer_id,
+        weight (% of the node), sector, location and in_benchmark columns.
+        sleeves: {fund: {'allocation': [(node, fraction), ...], 'filtered',
+        'normalize', 'scale'}} for every fund with a look-through sleeve.
+        """
+        nodes = list(node_frames)
+        frames = list(node_frames.values())
+        ids = np.union1d(store.ids, np.concatenate(
+            [f['issuer_id'].to_numpy(dtype=np.int64) for f in frames] + [np.zeros(0, dtype=np.int64)]))
+        names = store.master.keys
+        key_pos = np.searchsorted(ids, store.ids)
+
+        n_funds, n_keys = len(store.funds), len(ids)
+        weights = np.zeros((n_funds, n_keys))
+        support = np.zeros((n_funds, n_keys), dtype=bool)
+        weights[store.rows, key_pos[store.indices]] = store.data
+        support[store.rows, key_pos[store.indices]] = True
+
+        valid = [~f['sector'].isin(EXCLUDED_SECTORS) for f in frames]
+        sectors = np.unique(np.concatenate([f['sector'][v].to_numpy(dtype=str) for f, v in zip(frames, valid)]
+                                           + [np.zeros(0, dtype=str)]))
+        countries = np.unique(np.concatenate([f['location'][v].fillna('').to_numpy(dtype=str)
+                                              for f, v in zip(frames, valid)] + [np.zeros(0, dtype=str)]))
+        exposure = np.zeros((2, len(nodes), n_keys))
+        listed = np.zeros((2, len(nodes), n_keys), dtype=bool)
+        sector_w = np.zeros((2, len(nodes), len(sectors)))
+        country_w = np.zeros((2, len(nodes), len(countries)))
+        for i, (f, v) in enumerate(zip(frames, valid)):
+            w = f['weight'].to_numpy(dtype=float)
+            inside = f['in_benchmark'].to_numpy(dtype=bool)
+            cols = np.searchsorted(ids, f['issuer_id'].to_numpy(dtype=np.int64))
+            s_codes = np.searchsorted(sectors, f['sector'][v].to_numpy(dtype=str))
+            c_codes = np.searchsorted(countries, f['location'][v].fillna('').to_numpy(dtype=str))
+            for j, mask in enumerate((np.ones(len(w), dtype=bool), inside)):
+                exposure[j, i] = np.bincount(cols, weights=w * mask, minlength=n_keys)
+                listed[j, i, cols[mask]] = True
+                sector_w[j, i] = np.bincount(s_codes, weights=(w * mask)[v.to_numpy()], minlength=len(sectors))
+                country_w[j, i] = np.bincount(c_codes, weights=(w * mask)[v.to_numpy()], minlength=len(countries))
+
+        node_index = {node: i for i, node in enumerate(nodes)}
+        allocation = np.zeros((len(sleeves), len(nodes)))
+        for s, sleeve in enumerate(sleeves.values()):
+            for node, fraction in sleeve['allocation']:
+                allocation[s, node_index[node]] += fraction
+
+        groups = benchmark.group('issuer_id')
+        bench = np.zeros(n_keys)
+        pos = groups.index.get_indexer(ids)
+        bench[pos >= 0] = groups.weights[pos[pos >= 0]]
+
+        return cls({
+            'benchmark': np.array(benchmark.name),
+            'keys': np.array([names[i] for i in ids.tolist()], dtype=str),
+            'funds': np.array(store.funds, dtype=str),
+            'weights': weights,
+            'support': support,
+            'bench': bench,
+            'nodes': np.array(nodes, dtype=str),
+            'exposure': exposure,
+            'listed': listed,
+            'sectors': sectors,
+            'sector_weights': sector_w,
+            'countries': countries,
+            'country_weights': country_w,
+            'sleeve_funds': np.array(list(sleeves), dtype=str),
+            'allocation': allocation,
+            'filtered': np.array([bool(s['filtered']) for s in sleeves.values()]),
+            'normalize': np.array([bool(s['normalize']) for s in sleeves.values()]),
+            'scale': np.array([float(s['scale']) for s in sleeves.values()]),
+        })
+
+    @classmethod
+    def load(cls, path):
+        """Model saved by save()."""
+        with np.load(path) as npz:
+            return cls({name: npz[name] for name in npz.files})
+
+    def save(self, path):
+        """Write the model's arrays to path (compressed .npz)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **self.data)
+
+    # ── Allocations ──
+
+    def _sleeve(self, fund):
+        if fund not in self.sleeve_index:
+            raise ValueError(f'No look-through sleeve for fund {fund!r} '
+                             f'(known: {", ".join(self.sleeve_index)})')
+        return self.sleeve_index[fund]
+
+    def _allocation(self, fund):
+        row = self.data['allocation'][self._sleeve(fund)]
+        return {node: float(w * 100) for node, w in zip(self.nodes, row) if w}
+
+    def allocation(self, fund):
+        """Base look-through allocation of fund as {node: % of fund}, rounded as in evaluate()."""
+        return {node: round(w, 2) for node, w in self._allocation(fund).items()}
+
+    def reallocate(self, fund, deltas):
+        """Base allocation of fund with deltas ({node: percentage points}) applied."""
+        allocation = self._allocation(fund)
+        for node, delta in deltas.items():
+            allocation[node] = allocation.get(node, 0.0) + delta
+        return allocation
+
+    def _vector(self, allocation):
+        """Allocation dict ({node: %}) as fractions over the model's nodes."""
+        row = np.zeros(len(self.nodes))
+        for node, pct in allocation.items():
+            if node not in self.node_index:
+                raise ValueError(f'Unknown ETF node {node!r} (known: {", ".join(self.nodes)})')
+            if pct < -ZERO_TOL:
+                raise ValueError(f'Negative weight for {node}: {pct:.2f}%')
+            row[self.node_index[node]] += max(pct, 0.0) / 100
+        return row
+
+    # ── Evaluation ──
+
+    def _sleeves(self, s, alloc):
+        """(key weights, keys listed, sector weights, country weights) of sleeve s at allocation rows alloc."""
+        d = self.data
+        j = int(d['filtered'][s])
+        exposure = alloc @ d['exposure'][j]
+        listed = (alloc > 0).astype(float) @ d['listed'][j].astype(float) > 0
+        if d['normalize'][s]:
+            total = exposure.sum(1)
+            if (total <= 0).any():
+                raise ValueError('Allocation has no look-through holdings'
+                                 + (f' in {self.benchmark}' if j else ''))
+            scale = (100 / total)[:, None]
+        else:
+            scale = d['scale'][s]
+        return (exposure * scale, listed,
+                alloc @ d['sector_weights'][j] * scale,
+                alloc @ d['country_weights'][j] * scale)
+
+    def evaluate_many(self, fund, allocations, drop_rest=False):
+        """Evaluate candidate allocations ({node: % of fund} each) of fund at once.
+
+        drop_rest (one flag, or one per candidate): drop the fund's holdings
+        outside its look-through sleeve and scale the candidate allocation up
+        to the base allocation plus the dropped weight.
+
+        Returns a dict of:
+          'weights':     candidates × keys DataFrame of fund weights
+          'overlap':     Series, overlap with the benchmark in %
+          'correlation': candidates × funds DataFrame of weight correlations
+          'sectors', 'countries': candidates × labels DataFrames of shifts in
+                         percentage points against the base allocation
+          'scale':       Series, factor each candidate allocation was scaled
+                         by (1 where the rest is kept)
+
+        Raises ValueError if a candidate that keeps the rest does not total
+        the base sleeve's weights (within TOTAL_TOL).
+        """
+        s = self._sleeve(fund)
+        d = self.data
+        alloc = np.array([self._vector(a) for a in allocations]).reshape(-1, len(self.nodes))
+        drop = np.broadcast_to(np.asarray(drop_rest, dtype=bool), (len(alloc),))
+        base = d['allocation'][s][None, :]
+        base_total = base.sum() * 100
+        totals = alloc.sum(1) * 100
+        for total in totals[~drop]:
+            if abs(total - base_total) > TOTAL_TOL:
+                raise ValueError(f'Allocation totals {total:.2f}%, the base sleeve {base_total:.2f}% '
+                                 f'(deltas must net to 0, or drop the rest)')
+        base_keys, base_listed, base_sectors, base_countries = self._sleeves(s, base)
+
+        # Without the rest, the candidate's ETFs take over the dropped weight
+        f = self.funds.index(fund)
+        if (drop & (totals <= 0)).any():
+            raise ValueError('Allocation has no ETF weight to take over the rest')
+        dropped = d['weights'][f].sum() - base_keys.sum()
+        scale = np.where(drop, (base_total + dropped) / np.where(totals > 0, totals, 1), 1.0)
+        alloc = alloc * scale[:, None]
+        keys, listed, sectors, countries = self._sleeves(s, alloc)
+
+        # The fund minus its base sleeve (nothing if the rest is dropped), plus the candidate sleeve
+        rest = np.where(drop[:, None], 0.0, d['weights'][f] - base_keys)
+        weights = rest + keys
+        weights[np.abs(weights) < ZERO_TOL] = 0
+        # Held: weight, or listed by the store outside the base sleeve (unless dropped), or
+        # listed by the candidate sleeve (base-sleeve keys only where the store has them too:
+        # a stock is keyed by its name in the first ETF contributing it, which can differ)
+        support = d['support'][f]
+        kept = ~drop[:, None]
+        held = (weights != 0) | (support & ~base_listed & kept) | (listed & (support | ~base_listed | ~kept))
+
+        overlap = np.minimum(weights, d['bench']).sum(1)
+        prod = weights @ d['weights'].T
+        shared = held.astype(float) @ d['support'].T.astype(float)
+        r, n = union_correlations(prod, shared, (weights.sum(1), (weights ** 2).sum(1), held.sum(1)),
+                                  self._store_sums)
+        r = np.where(n < MIN_CORR_KEYS, 0.0, r)
+
+        return {
+            'weights': pd.DataFrame(weights, columns=self.keys),
+            'overlap': pd.Series(overlap, name=f'overlap_with_{self.benchmark.lower()}_pct'),
+            'correlation': pd.DataFrame(r, columns=self.funds),
+            'sectors': pd.DataFrame(sectors - base_sectors, columns=d['sectors']),
+            'countries': pd.DataFrame(countries - base_countries, columns=d['countries']),
+            'scale': pd.Series(scale, name='scale'),
+        }
+
+    def evaluate(self, fund, deltas=None, allocation=None, top=20, drop_rest=False):
+        """One what-if for fund: deltas ({node: pp}) on its base allocation, or a replacement allocation.
+
+        drop_rest drops the fund's holdings outside its look-through sleeve
+        (see evaluate_many). Returns a dict rounded as in fund_data.json: the
+        allocation (as scaled), overlap with the benchmark (and its change),
+        correlations with every fund, sector/country shifts (non-zero ones,
+        largest first) and the top holdings.
+        """
+        if allocation is None:
+            allocation = self.reallocate(fund, deltas or {})
+        result = self.evaluate_many(fund, [self._allocation(fund), allocation], drop_rest=[False, drop_rest])
+        scale = float(result['scale'][1])
+        overlap = result['overlap'].round(2)
+
+        def shifts(frame):
+            shift = frame.iloc[1].round(2)
+            shift = shift[shift != 0]
+            return shift.iloc[np.argsort(-shift.abs().to_numpy(), kind='stable')].to_dict()
+
+        weights = result['weights'].iloc[1]
+        return {
+            'fund': fund,
+            'allocation': {node: round(w * scale, 2) for node, w in allocation.items()},
+            f'overlap_with_{self.benchmark.lower()}_pct': float(overlap[1]),
+            'overlap_change': round(float(overlap[1] - overlap[0]), 2),
+            'correlations': result['correlation'].iloc[1].round(4).to_dict(),
+            'sectors': shifts(result['sectors']),
+            'countries': shifts(result['countries']),
+            'top_holdings': [{'key': k, 'weight': round(w, 3)} for k, w in weights.nlargest(top).items()],
+        }
@@ -0,0 +1,177 @@
+"""
+Table-driven parser for line-based bank investment reports.
+
+Swedbank and LHV reports are read line by line: header lines switch the
+current section (often carrying its subtotal %), a few lines carry deposits
+or derivatives totals, column headers are skipped and every other line of a
+section is a holding row. A provider is declared as data:
+  - Rule: a line pattern (matched at the line start; contains() builds one
+    for lines containing any of a few words) and what the line
+    does: switch section (goto), record a subtotal or total %, add a
+    deposit's EUR value. A rule with no effect just skips its line. Rules
+    can be limited to sections (within), are tried in order, and the first
+    match wins.
+  - Section: how rows of a section are read. The row grammar gives the %
+    column pattern, which % is the weight (first or last), the weight bounds
+    and whether an ISIN is required. make(row, target) turns a row into the
+    entry appended to the section's target list (None drops it). A section with a count key counts
+    its lines that carry a %, for the _pdf_holding_counts check.
+For every section state the rules that apply are compiled into one master
+regex (an alternation of named groups, in rule order), so a line is
+classified by a single match. Row fields (the %s, ISIN, EUR value) are then
+read once and shared by the holding count and the row.
+"""
+import re
+from collections import defaultdict
+
+KEEP = object()   # Rule.goto: stay in the current section
+
+
+def contains(words):
+    """Rule pattern of a line containing any of words.
+
+    The lookahead on the words' first characters lets the scan skip most
+    positions without trying every word there.
+    """
+    first = ''.join(sorted({re.escape(w[0]) for w in words}))
+    return f'.*?(?=[{first}])(?:' + '|'.join(re.escape(w) for w in words) + ')'
+
+
+class Rule:
+    """A report line that is not a holding row: section header, subtotal, total or column header."""
+
+    def __init__(self, pattern, goto=KEEP, within=None, subtotal=None, total=None, pct=None, deposit_eur=False):
+        self.pattern = pattern
+        self.goto = goto            # section entered (None: leave the section), or KEEP
+        self.within = within        # section name prefixes the rule applies in (None: everywhere)
+        self.subtotal = subtotal    # _pdf_subtotals key to set from the first % on the line
+        self.total = total          # totals key ('deposits_pct', 'derivatives_pct') to set likewise
+        self.pct = pct              # compiled % pattern for subtotal/total (default: the parser's)
+        self.deposit_eur = deposit_eur
+
+    def applies(self, section):
+        if self.within is None:
+            return True
+        return section is not None and section.startswith(self.within)
+
+
+class Section:
+    """How holding rows of one section are read."""
+
+    def __init__(self, target=None, count=None, make=None, pct=None, weight='first',
+                 isin_required=False, min_weight=None, max_weight=None):
+        self.target = target            # rows list the entries go to (None: rows are read, not kept)
+        self.count = count              # _pdf_holding_counts key (None: not counted)
+        self.make = make                # make(row, target) → entry dict, or None to drop the row
+        self.pct = pct                  # compiled pattern of the % column (findall)
+        self.weight = weight            # 'first' or 'last' % on the line
+        self.isin_required = isin_required
+        self.min_weight = min_weight    # rows with weight <= min_weight are dropped
+        self.max_weight = max_weight    # ...or weight > max_weight
+
+
+class Row:
+    """Fields of one holding line, read once."""
+
+    __slots__ = ('isin_match', 'line', 'value_eur', 'weight')
+
+    def __init__(self, line, isin_match, weight, value_eur):
+        self.line = line
+        self.isin_match = isin_match
+        self.weight = weight
+        self.value_eur = value_eur
+
+    @property
+    def isin(self):
+        return self.isin_match.group(0) if self.isin_match else None
+
+
+class ParseResult:
+    """Rows per target, subtotals, holding counts, totals and summed EUR values of one report."""
+
+    def __init__(self, totals):
+        self.rows = defaultdict(list)
+        self.subtotals = {}
+        self.counts = {}
+        self.totals = dict(totals)
+        self.total_value_eur = 0
+
+
+class SectionParser:
+    """Rules and sections of one provider, compiled per section state."""
+
+    def __init__(self, rules, sections, pct, pct_value, isin_re, eur_value, deposit_eur, totals=None):
+        self.rules = rules
+        self.sections = sections        # {section state: Section}; states without one have no rows
+        self.pct = pct                  # compiled % pattern of subtotal/total lines
+        self.pct_value = pct_value      # '29,37' / '29,37%' → 29.37
+        self.isin_re = isin_re
+        self.eur_value = eur_value      # holding line → EUR market value or None
+        self.deposit_eur = deposit_eur  # deposits line → EUR value or None
+        self.default_totals = totals or {}
+        self._masters = {}
+
+    def _master(self, section):
+        """(master regex, rules by group name) of the rules that apply in section."""
+        if section not in self._masters:
+            active = [(i, r) for i, r in enumerate(self.rules) if r.applies(section)]
+            pattern = '|'.join(f'(?P<r{i}>{r.pattern})' for i, r in active)
+            self._masters[section] = (re.compile(pattern), {f'r{i}': r for i, r in active})
+        return self._masters[section]
+
+    def parse(self, texts):
+        """Parse page texts into a ParseResult."""
+        result = ParseResult(self.default_totals)
+        section = None
+        for text in texts:
+            for line in text.splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                master, by_group = self._master(section)
+                m = master.match(line)
+                if m:
+                    section = self._apply(by_group[m.lastgroup], line, section, result)
+                    continue
+                spec = self.sections.get(section)
+                if spec is not None:
+                    self._row(spec, line, result)
+        return result
+
+    def _apply(self, rule, line, section, result):
+        if rule.subtotal or rule.total:
+            m = (rule.pct or self.pct).search(line)
+            if m:
+                value = self.pct_value(m.group(m.lastindex or 0))
+                if rule.subtotal:
+                    result.subtotals[rule.subtotal] = value
+                else:
+                    result.totals[rule.total] = value
+        if rule.deposit_eur:
+            value = self.deposit_eur(line)
+            if value:
+                result.total_value_eur += value
+        return section if rule.goto is KEEP else rule.goto
+
+    def _row(self, spec, line, result):
+        pcts = spec.pct.findall(line)
+        if spec.count and pcts:
+            result.counts[spec.count] = result.counts.get(spec.count, 0) + 1
+        isin_match = self.isin_re.search(line) if spec.isin_required else None
+        if spec.isin_required and not isin_match:
+            return
+        if not pcts:
+            return
+        weight = self.pct_value(pcts[0] if spec.weight == 'first' else pcts[-1])
+        if spec.min_weight is not None and weight <= spec.min_weight:
+            return
+        if spec.max_weight is not None and weight > spec.max_weight:
+            return
+        value_eur = self.eur_value(line)
+        if value_eur:
+            result.total_value_eur += value_eur
+        if not spec.isin_required:
+            isin_match = self.isin_re.search(line)
+        entry = spec.make(Row(line, isin_match, weight, value_eur), spec.target) if spec.make else None
+        if entry is not None and spec.target is not None:
+            result.rows[spec.target].append(entry)
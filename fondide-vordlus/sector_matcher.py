@@ -0,0 +1,193 @@
+"""
+Fuzzy sector/location matching against the ACWI benchmark.
+
+Direct holdings whose normalized key has no exact ACWI match are matched by
+name. The index is built once per run:
+  - ACWI keys sorted as a fixed-width string array — a flattened trie: all keys
+    sharing a prefix with a name form one contiguous np.searchsorted range
+  - a trigram inverted index (key × trigram incidence, CSR) for similarity
+
+A name's candidates are the keys sharing its first PREFIX_LEN characters
+(narrowed to its own country when any candidate is there). Each candidate is scored
+max(prefix coverage, trigram Dice); candidates scoring >= MIN_SCORE and within
+SCORE_MARGIN of the name's best compete. The name is matched only if one
+(sector, location) holds >= MIN_SHARE of the competitors' benchmark weight;
+otherwise it is ambiguous and stays unmatched. A name whose candidates all
+score below MIN_SCORE falls back to the old prefix rule: the keys sharing its
+first FALLBACK_PREFIX_LEN characters are accepted if they carry one
+(sector, location).
+All names are matched in one vectorised call.
+"""
+import numpy as np
+import pandas as pd
+
+PREFIX_LEN = 5     # shortest shared prefix that makes a key a candidate
+MIN_SCORE = 0.75   # max(prefix coverage, trigram Dice) needed to keep a candidate
+SCORE_MARGIN = 0.1 # candidates this close to a name's best score compete with it
+MIN_SHARE = 0.9    # weight share the winning (sector, location) needs among competing candidates
+FALLBACK_PREFIX_LEN = 6  # prefix of the old rule, used when no candidate reaches MIN_SCORE
+_LAST_CHAR = chr(0x10FFFF)
+
+
+def _trigrams(key):
+    padded = f'^{key}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _codes(strings, width):
+    """Code points of strings as an (n, width) uint32 array (zero padded, truncated to width)."""
+    return np.asarray(strings, dtype=f'<U{width}').view(np.uint32).reshape(len(strings), width)
+
+
+def _ranges(starts, lengths):
+    """Concatenated np.arange(start, start + length) for each pair, as one flat index array."""
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+
+class SectorMatcher:
+    """Prefix + trigram index over ACWI norm_keys with ambiguity scoring."""
+
+    def __init__(self, keys, sectors, locations, weights):
+        frame = pd.DataFrame({'key': keys, 'sector': sectors, 'location': locations, 'weight': weights})
+        frame = frame[frame['key'].fillna('') != '']
+        frame = frame.groupby('key', sort=True).agg(
+            sector=('sector', 'first'), location=('location', 'first'), weight=('weight', 'sum'))
+
+        self.keys = frame.index.to_numpy(dtype=str)
+        self.lengths = np.char.str_len(self.keys)
+        self.width = max(int(self.lengths.max(initial=0)), 1)
+        self.codes = _codes(self.keys, self.width)
+        self.sectors = frame['sector'].to_numpy(dtype=object)
+        self.locations = frame['location'].to_numpy(dtype=object)
+        self.weights = frame['weight'].fillna(0).clip(lower=0).to_numpy(dtype=float)
+        self.label = frame.groupby(['sector', 'location'], sort=False, dropna=False).ngroup().to_numpy()
+        self.n_labels = int(self.label.max(initial=-1)) + 1
+
+        self.vocab = {}
+        self.gram_ptr, self.gram_ids, self.gram_counts = self._grams(self.keys, grow=True)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _grams(self, strings, grow=False):
+        """CSR trigram ids (sorted, unique) per string; unknown trigrams only count toward the size."""
+        ids, counts = [], np.zeros(len(strings), dtype=np.int64)
+        ptr = np.zeros(len(strings) + 1, dtype=np.int64)
+        for i, s in enumerate(strings):
+            grams = _trigrams(s)
+            counts[i] = len(grams)
+            if grow:
+                row = [self.vocab.setdefault(g, len(self.vocab)) for g in grams]
+            else:
+                row = [self.vocab[g] for g in grams if g in self.vocab]
+            row.sort()
+            ids.extend(row)
+            ptr[i + 1] = len(ids)
+        return ptr, np.array(ids, dtype=np.int64), counts
+
+    def _dice(self, qi, ki, q_ptr, q_ids, q_counts):
+        """Trigram Dice coefficient for each (name, key) pair."""
+        n_pairs, n_grams = len(qi), max(len(self.vocab), 1)
+        q_len = q_ptr[qi + 1] - q_ptr[qi]
+        k_len = self.gram_ptr[ki + 1] - self.gram_ptr[ki]
+        cells = np.sort(np.concatenate([
+            np.repeat(np.arange(n_pairs), q_len) * n_grams + q_ids[_ranges(q_ptr[qi], q_len)],
+            np.repeat(np.arange(n_pairs), k_len) * n_grams + self.gram_ids[_ranges(self.gram_ptr[ki], k_len)],
+        ]))
+        # A trigram shared by both sides appears twice in a row
+        shared = np.bincount(cells[1:][cells[1:] == cells[:-1]] // n_grams, minlength=n_pairs)
+        return 2.0 * shared / (q_counts[qi] + self.gram_counts[ki])
+
+    def _cover(self, names, lengths, qi, ki):
+        """Shared-prefix length of each (name, key) pair over the shorter of the two."""
+        eq = _codes(names, self.width)[qi] == self.codes[ki]
+        common = np.where(eq.all(axis=1), self.width, eq.argmin(axis=1))
+        shortest = np.minimum(lengths[qi], self.lengths[ki])
+        return np.minimum(common, shortest) / shortest
+
+    def _fallback(self, names, lengths, rejected):
+        """Old prefix rule for the rejected names: keys sharing FALLBACK_PREFIX_LEN characters, one label."""
+        prefixes = names.astype(f'<U{FALLBACK_PREFIX_LEN}')
+        lo = np.searchsorted(self.keys, prefixes, 'left')
+        hi = np.searchsorted(self.keys, np.char.add(prefixes, _LAST_CHAR), 'left')
+        n_cand = np.where(rejected & (lengths >= FALLBACK_PREFIX_LEN), hi - lo, 0)
+        qi = np.flatnonzero(n_cand)
+        if not len(qi):
+            return (np.zeros(0, dtype=np.int64),) * 2 + (np.zeros(0),)
+        # Keys are sorted, so each name's candidates are one contiguous run of labels
+        labels = self.label[_ranges(lo[qi], n_cand[qi])]
+        starts = np.cumsum(n_cand[qi]) - n_cand[qi]
+        single = np.minimum.reduceat(labels, starts) == np.maximum.reduceat(labels, starts)
+        qi, ki = qi[single], lo[qi][single]
+        return qi, ki, self._cover(names, lengths, qi, ki)
+
+    def match(self, keys, locations=None):
+        """Match normalized keys (and optional locations) in one pass.
+
+        Returns a DataFrame on the input index with sector, location, match
+        (best ACWI key) and score; rows without an unambiguous match are NaN.
+        """
+        keys = keys if isinstance(keys, pd.Series) else pd.Series(keys, dtype=object)
+        names = keys.fillna('').astype(str).to_numpy(dtype=str)
+        locs = None if locations is None else np.asarray(locations, dtype=object)
+        qi, ki, score = self._best(names, locs)
+        columns = {col: np.full(len(names), np.nan, dtype=object)
+                   for col in ('sector', 'location', 'match', 'score')}
+        columns['sector'][qi] = self.sectors[ki]
+        columns['location'][qi] = self.locations[ki]
+        columns['match'][qi] = self.keys[ki]
+        columns['score'][qi] = np.round(score, 3)
+        return pd.DataFrame(columns, index=keys.index)
+
+    def _best(self, names, locs):
+        """(name position, key position, score) of each unambiguously matched name."""
+        none = (np.zeros(0, dtype=np.int64),) * 2 + (np.zeros(0),)
+        if not len(names) or not len(self.keys):
+            return none
+        lengths = np.char.str_len(names)
+
+        # ── Candidates: keys sharing the first PREFIX_LEN characters ──
+        prefixes = names.astype(f'<U{PREFIX_LEN}')
+        lo = np.searchsorted(self.keys, prefixes, 'left')
+        hi = np.searchsorted(self.keys, np.char.add(prefixes, _LAST_CHAR), 'left')
+        n_cand = np.where(lengths >= PREFIX_LEN, hi - lo, 0)
+        qi = np.repeat(np.arange(len(names)), n_cand)
+        ki = _ranges(lo, n_cand)
+        if locs is not None:
+            # Prefer candidates in the holding's own country when there are any
+            same = self.locations[ki] == locs[qi]
+            keep = same | (np.bincount(qi, weights=same, minlength=len(names)) == 0)[qi]
+            qi, ki = qi[keep], ki[keep]
+        if not len(qi):
+            return none
+
+        # ── Score: max(prefix coverage, trigram Dice) ──
+        cover = self._cover(names, lengths, qi, ki)
+        score = np.maximum(cover, self._dice(qi, ki, *self._grams(names)))
+        kept = score >= MIN_SCORE
+        rejected = np.bincount(qi[kept], minlength=len(names)) == 0
+        fallback = self._fallback(names, lengths, rejected)
+        qi, ki, score = qi[kept], ki[kept], score[kept]
+        if not len(qi):
+            return fallback
+        best = np.zeros(len(names))
+        np.maximum.at(best, qi, score)
+        close = score >= best[qi] - SCORE_MARGIN
+        qi, ki, score = qi[close], ki[close], score[close]
+
+        # ── Ambiguity: weight share of each (sector, location) among competing candidates ──
+        cell = qi * self.n_labels + self.label[ki]
+        cells, inv = np.unique(cell, return_inverse=True)
+        label_weight = np.bincount(inv, weights=self.weights[ki])
+        total = np.bincount(qi, weights=self.weights[ki], minlength=len(names))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            share = label_weight / total[cells // self.n_labels]
+        winner = (share >= MIN_SHARE)[inv]
+
+        # Best-scoring candidate within the winning label
+        qi, ki, score = qi[winner], ki[winner], score[winner]
+        order = np.lexsort((-score, qi))
+        first = np.unique(qi[order], return_index=True)[1]
+        matched = (qi[order][first], ki[order][first], score[order][first])
+        return tuple(np.concatenate(pair) for pair in zip(matched, fallback))
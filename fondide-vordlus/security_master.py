@@ -0,0 +1,172 @@
+"""
+Security master: one integer id per issuer.
+
+Every way the pipeline refers to a security is an alias of one issuer id:
+  - key:  normalized company name (normalize_company_name output) — the
+          issuer's canonical key, also used for BOND|/ETF|/RE|/PE| pseudo keys;
+          alias keys (_COMPANY_ALIASES) point at their canonical key's id
+  - name: raw holding name → its normalized key (normalization is done once
+          per distinct name and remembered)
+  - sid:  iShares/EODHD stock_id (ticker|location)
+  - isin: ISIN (e.g. from reports/adhoc/data/isin_to_stockid.json)
+lookup() resolves any of them. Fund frames and benchmarks carry the id as an
+issuer_id column: process_fund merges look-through and direct stocks on it,
+BenchmarkIndex compares funds on it and the weight store's columns (overlap
+stats, correlations) are issuer ids. Holdings rows get their id through their
+normalized name; stock_id/ISIN aliases point at that id.
+
+The master is saved as JSON and updated incrementally: a holdings source is
+only re-registered when its content hash changes. If the normalizer version
+changes, the saved master is discarded and rebuilt.
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+ALIAS_KINDS = ('key', 'name', 'sid', 'isin')
+
+
+class SecurityMaster:
+    """Integer issuer ids with alias indexes, persisted as JSON."""
+
+    def __init__(self, normalize, version=''):
+        self.normalize = normalize
+        self.version = version
+        self.keys = []
+        self.aliases = {kind: {} for kind in ALIAS_KINDS}
+        self.sources = {}
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.keys)
+
+    # ── Persistence ──
+
+    @classmethod
+    def load(cls, path, normalize, version=''):
+        """Load from path; start empty if missing, unreadable or built by another normalizer."""
+        master = cls(normalize, version)
+        if not path.exists():
+            return master
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f'  WARNING: Could not read security master {path}: {e}')
+            return master
+        if data.get('version') != version:
+            print('  Security master built with another normalizer version — rebuilding')
+            return master
+        master.keys = data['keys']
+        for kind in ALIAS_KINDS:
+            master.aliases[kind] = data['aliases'].get(kind, {})
+        master.sources = data.get('sources', {})
+        return master
+
+    def save(self, path):
+        """Write to path if anything changed since load."""
+        if not self.dirty:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'version': self.version,
+            'keys': self.keys,
+            'aliases': self.aliases,
+            'sources': self.sources,
+        }
+        path.write_text(json.dumps(data, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+        self.dirty = False
+
+    # ── Ids and aliases ──
+
+    def key_id(self, key):
+        """Issuer id for a normalized key, creating the issuer if new."""
+        keys = self.aliases['key']
+        i = keys.get(key)
+        if i is None:
+            i = keys[key] = len(self.keys)
+            self.keys.append(key)
+            self.dirty = True
+        return i
+
+    def key_ids(self, keys):
+        """Vectorised key_id: int64 array of issuer ids for an iterable of keys."""
+        known = self.aliases['key']
+        return np.array([known[k] if k in known else self.key_id(k) for k in keys], dtype=np.int64)
+
+    def add_alias(self, kind, value, issuer_id):
+        """Point alias value of the given kind at issuer_id (first assignment wins)."""
+        table = self.aliases[kind]
+        if value and value not in table:
+            table[value] = issuer_id
+            self.dirty = True
+
+    def norm_keys(self, names):
+        """Normalized keys for a Series (or list) of raw names, normalizing each distinct name once."""
+        names = names if isinstance(names, pd.Series) else pd.Series(names, dtype=object)
+        cache = self.aliases['name']
+        keys = names.map(cache)
+        todo = names[keys.isna()]
+        if len(todo):
+            for n in pd.unique(todo):
+                cache[n] = self.normalize(n)
+            self.dirty = True
+            keys = names.map(cache)
+        return keys
+
+    def lookup(self, isin=None, stock_id=None, name=None):
+        """Issuer id by ISIN, then stock_id, then normalized name; None if unknown."""
+        if isin and isin in self.aliases['isin']:
+            return self.aliases['isin'][isin]
+        if stock_id and stock_id in self.aliases['sid']:
+            return self.aliases['sid'][stock_id]
+        if name:
+            key = self.norm_keys([name]).iloc[0]
+            return self.aliases['key'].get(key)
+        return None
+
+    # ── Incremental updates ──
+
+    def register_keys(self, aliases):
+        """Index an alias table {alias key: canonical key} (e.g. _COMPANY_ALIASES)."""
+        for alias, canonical in aliases.items():
+            self.add_alias('key', alias, self.key_id(canonical))
+
+    def register_holdings(self, source, df):
+        """Index one holdings DataFrame (name + stock_id columns) unless unchanged.
+
+        Returns True if the source was (re)registered.
+        """
+        if df.empty or 'name' not in df.columns:
+            return False
+        cols = [c for c in ('name', 'stock_id', 'isin') if c in df.columns]
+        digest = hashlib.sha1(
+            pd.util.hash_pandas_object(df[cols].astype(str), index=False).to_numpy().tobytes()
+        ).hexdigest()
+        if self.sources.get(source) == digest:
+            return False
+        ids = self.key_ids(self.norm_keys(df['name']))
+        if 'stock_id' in df.columns:
+            for sid, i in zip(df['stock_id'], ids):
+                self.add_alias('sid', sid, int(i))
+        if 'isin' in df.columns:
+            for isin, i in zip(df['isin'], ids):
+                self.add_alias('isin', isin, int(i))
+        self.sources[source] = digest
+        self.dirty = True
+        return True
+
+    def register_isin_bridge(self, source, mapping):
+        """Index an {ISIN: stock_id} bridge; ISINs whose stock_id is unknown are skipped."""
+        sids = self.aliases['sid']
+        # Re-run when either the bridge or the set of known stock_ids changed
+        digest = hashlib.sha1(json.dumps([mapping, len(sids)], sort_keys=True).encode()).hexdigest()
+        if self.sources.get(source) == digest:
+            return False
+        for isin, sid in mapping.items():
+            if sid in sids:
+                self.add_alias('isin', isin, sids[sid])
+        self.sources[source] = digest
+        self.dirty = True
+        return True
@@ -0,0 +1,73 @@
+"""ScenarioModel what-ifs on a hand-built three-stock model."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scenarios import ScenarioModel
+
+
+def model():
+    """One fund: 40% in ETF X (half A, half B), 5% direct A and 55% direct C.
+
+    Its weights are A 25, B 20, C 55; the benchmark holds A 40, B 30, C 0.
+    ETF Y holds C only.
+    """
+    exposure = np.array([[50.0, 50.0, 0.0], [0.0, 0.0, 100.0]])
+    return ScenarioModel({
+        'benchmark': np.array('ACWI'),
+        'keys': np.array(['a', 'b', 'c']),
+        'funds': np.array(['Fund']),
+        'weights': np.array([[25.0, 20.0, 55.0]]),
+        'support': np.array([[True, True, True]]),
+        'bench': np.array([40.0, 30.0, 0.0]),
+        'nodes': np.array(['X', 'Y']),
+        'exposure': np.stack([exposure, exposure]),
+        'listed': np.stack([exposure > 0, exposure > 0]),
+        'sectors': np.array(['Tech']),
+        'sector_weights': np.full((2, 2, 1), 100.0),
+        'countries': np.array(['US']),
+        'country_weights': np.full((2, 2, 1), 100.0),
+        'sleeve_funds': np.array(['Fund']),
+        'allocation': np.array([[0.4, 0.0]]),
+        'filtered': np.array([False]),
+        'normalize': np.array([False]),
+        'scale': np.array([1.0]),
+    })
+
+
+def test_base_overlap():
+    # min(25, 40) + min(20, 30) + min(55, 0)
+    assert model().evaluate('Fund')['overlap_with_acwi_pct'] == 45.0
+
+
+def test_drop_rest_scales_etf_sleeve_over_the_fund():
+    # Direct A 5 and C 55 dropped: X takes over their 60pp → 100% X = A 50, B 50
+    # → min(50, 40) + min(50, 30)
+    result = model().evaluate('Fund', drop_rest=True)
+    assert result['allocation'] == {'X': 100.0}
+    assert result['overlap_with_acwi_pct'] == 70.0
+    assert result['overlap_change'] == 25.0
+
+
+def test_drop_rest_with_replacement_allocation():
+    # The rest replaced by ETF Y: 40% X, 60% Y = A 20, B 20, C 60 → min(20, 40) + min(20, 30)
+    result = model().evaluate('Fund', allocation={'X': 40, 'Y': 60}, drop_rest=True)
+    assert result['allocation'] == {'X': 40.0, 'Y': 60.0}
+    assert result['overlap_with_acwi_pct'] == 40.0
+    # Proportions only: 2:3 of X and Y scaled to the same 100%
+    assert model().evaluate('Fund', allocation={'X': 2, 'Y': 3}, drop_rest=True)['overlap_with_acwi_pct'] == 40.0
+
+
+def test_one_sided_delta_keeping_the_rest_is_rejected():
+    with pytest.raises(ValueError, match='net to 0'):
+        model().evaluate('Fund', deltas={'X': +10})
+
+
+def test_moving_sleeve_weight_keeps_the_rest():
+    # X 20 + Y 20 = A 10, B 10, C 20, plus direct A 5, C 55 → min(15, 40) + min(10, 30)
+    result = model().evaluate('Fund', deltas={'X': -20, 'Y': +20})
+    assert result['overlap_with_acwi_pct'] == 25.0
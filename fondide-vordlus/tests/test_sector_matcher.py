@@ -0,0 +1,38 @@
+"""SectorMatcher on a small hand-built ACWI."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sector_matcher import SectorMatcher
+
+
+def matcher():
+    return SectorMatcher(
+        keys=['BANCAMONTEDEIPASCHIDISIENA', 'BANCOSANTANDER', 'BANCOSAFRA', 'MICROSOFT'],
+        sectors=['Financials', 'Financials', 'Financials', 'Information Technology'],
+        locations=['Italy', 'Spain', 'Brazil', 'United States'],
+        weights=[0.02, 0.1, 0.01, 4.0],
+    )
+
+
+def test_scored_match():
+    result = matcher().match(['MICROSOFTCORP'], ['United States'])
+    assert result.loc[0, 'match'] == 'MICROSOFT'
+    assert result.loc[0, 'sector'] == 'Information Technology'
+
+
+def test_no_candidate_scores_falls_back_to_unambiguous_prefix():
+    # BANCAMEDIOLANUM scores below MIN_SCORE against its only BANCA* candidate;
+    # its 6-character prefix BANCAM is shared by one key only, as under the old rule
+    result = matcher().match(['BANCAMEDIOLANUM'], ['Italy'])
+    assert result.loc[0, 'sector'] == 'Financials'
+    assert result.loc[0, 'location'] == 'Italy'
+    assert result.loc[0, 'match'] == 'BANCAMONTEDEIPASCHIDISIENA'
+
+
+def test_fallback_prefix_with_two_labels_stays_unmatched():
+    # BANCOSABADELL scores low against BANCOSANTANDER; its prefix BANCOS is shared
+    # by a Spanish and a Brazilian bank, so the old rule does not apply either
+    result = matcher().match(['BANCOSABADELL'], ['Spain'])
+    assert result['sector'].isna().all()
@@ -0,0 +1,48 @@
+"""SecurityMaster aliases on hand-built holdings."""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from security_master import SecurityMaster
+
+
+def master():
+    m = SecurityMaster(lambda name: name.upper().replace(' INC', '').replace(' ', ''))
+    m.register_keys({'GOOGLE': 'ALPHABET'})
+    m.register_holdings('SAWD', pd.DataFrame({
+        'name': ['Apple Inc', 'Alphabet Inc'],
+        'stock_id': ['AAPL|United States', 'GOOGL|United States'],
+    }))
+    m.register_isin_bridge('bridge', {'US0378331005': 'AAPL|United States', 'XX0000000000': 'NOPE|Nowhere'})
+    return m
+
+
+def test_every_alias_resolves_to_one_issuer():
+    m = master()
+    apple = m.lookup(name='Apple Inc')
+    assert m.lookup(stock_id='AAPL|United States') == apple
+    assert m.lookup(isin='US0378331005') == apple
+    assert m.lookup(name='apple') == apple
+    assert m.lookup(name='Google') == m.lookup(stock_id='GOOGL|United States')
+
+
+def test_unknown_aliases():
+    m = master()
+    # Bridge ISINs whose stock_id no holdings file carries are skipped
+    assert m.lookup(isin='XX0000000000') is None
+    assert m.lookup(name='Microsoft') is None
+
+
+def test_save_and_load_keep_ids(tmp_path):
+    m = master()
+    m.save(tmp_path / 'master.json')
+    loaded = SecurityMaster.load(tmp_path / 'master.json', m.normalize)
+    assert loaded.lookup(isin='US0378331005') == m.lookup(name='Apple Inc')
+    # Unchanged holdings are not re-registered
+    assert not loaded.register_holdings('SAWD', pd.DataFrame({
+        'name': ['Apple Inc', 'Alphabet Inc'],
+        'stock_id': ['AAPL|United States', 'GOOGL|United States'],
+    }))
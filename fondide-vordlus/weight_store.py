@@ -0,0 +1,176 @@
+"""
+Columnar fund weight store.
+
+All funds share one key universe: the security master's issuer ids. These
+cover stocks (normalized names) as well as the BOND|/ETF|/RE|/PE|
+pseudo-holdings, so a month of fund weight vectors is a single funds × keys
+matrix. The matrix is kept as CSR. It is also materialised dense when it is
+small (DENSE_MAX_CELLS) or at least DENSE_MIN_FILL of its cells are non-zero.
+Pairwise analytics work on the matrix directly. The per-fund {key: weight}
+dicts are built only on demand, e.g. for JSON export.
+"""
+import numpy as np
+
+DENSE_MIN_FILL = 0.25      # fill ratio from which the dense matrix is built eagerly
+DENSE_MAX_CELLS = 1 << 22  # ...or any matrix up to this many cells (32 MB of float64)
+EXPORT_MIN_WEIGHT = 0.01
+EXPORT_DIGITS = 4
+
+
+def union_correlations(prod, shared, a, b):
+    """Pearson correlations of weight vectors over the union of their keys.
+
+    prod and shared are the pairwise Σab and shared key counts; a and b are
+    (sums, sums of squares, key counts) of the rows and columns. A key one
+    side lacks counts as 0: n = |A ∪ B|, cov = Σab − ΣaΣb/n,
+    var = Σa² − (Σa)²/n. Returns (r, n).
+    """
+    (total_a, sq_a, size_a), (total_b, sq_b, size_b) = a, b
+    n = size_a[:, None] + size_b[None, :] - shared
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = prod - np.outer(total_a, total_b) / n
+        var_a = sq_a[:, None] - total_a[:, None] ** 2 / n
+        var_b = sq_b[None, :] - total_b[None, :] ** 2 / n
+        r = np.clip(cov / np.sqrt(var_a * var_b), -1, 1)
+    return r, n
+
+
+class WeightRow:
+    """One fund's weights while the fund is being built.
+
+    Keys are interned into the shared universe when they are assigned. As with
+    a dict, the last assignment wins and the first assignment fixes the order.
+    """
+
+    __slots__ = ('codes', 'master', 'weights')
+
+    def __init__(self, master, keys=(), weights=()):
+        self.master = master
+        self.codes = master.key_ids(keys).tolist()
+        self.weights = [float(w) for w in weights]
+
+    def __setitem__(self, key, weight):
+        self.codes.append(self.master.key_id(key))
+        self.weights.append(float(weight))
+
+    def __len__(self):
+        return len(set(self.codes))
+
+    def compact(self):
+        """(issuer ids in first-assignment order, their last-assigned weights)."""
+        codes = np.asarray(self.codes, dtype=np.int64)
+        weights = np.asarray(self.weights, dtype=float)
+        first = np.unique(codes, return_index=True)[1]
+        last = len(codes) - 1 - np.unique(codes[::-1], return_index=True)[1]
+        order = np.argsort(first, kind='stable')
+        return codes[first[order]], weights[last[order]]
+
+
+class WeightStore:
+    """Funds × keys weight matrix (CSR, plus dense when well filled) over shared issuer ids."""
+
+    def __init__(self, master, rows):
+        self.master = master
+        self.funds = list(rows)
+        self.fund_index = {fund: i for i, fund in enumerate(self.funds)}
+
+        compact = [row.compact() for row in rows.values()]
+        codes = [c for c, _ in compact]
+        self.ids = np.unique(np.concatenate(codes)) if codes else np.zeros(0, dtype=np.int64)
+        self.indptr = np.zeros(len(self.funds) + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum([len(c) for c in codes])
+        # Column indices keep each fund's assignment order (export order)
+        self.indices = np.searchsorted(self.ids, np.concatenate(codes)) if codes else np.zeros(0, dtype=np.int64)
+        self.data = np.concatenate([w for _, w in compact]) if compact else np.zeros(0)
+        self.rows = np.repeat(np.arange(len(self.funds)), np.diff(self.indptr))
+
+        cells = len(self.funds) * len(self.ids)
+        self.fill = len(self.data) / cells if cells else 0.0
+        self.format = 'dense' if self.fill >= DENSE_MIN_FILL or cells <= DENSE_MAX_CELLS else 'csr'
+        self._dense = self.dense() if self.format == 'dense' else None
+        self._keys = None
+
+    @property
+    def shape(self):
+        return len(self.funds), len(self.ids)
+
+    @property
+    def keys(self):
+        """Key strings for the matrix columns."""
+        if self._keys is None:
+            names = self.master.keys
+            self._keys = [names[i] for i in self.ids.tolist()]
+        return self._keys
+
+    def row(self, fund):
+        """(column indices, weights) for one fund, in assignment order."""
+        i = self.fund_index[fund]
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        return self.indices[lo:hi], self.data[lo:hi]
+
+    def dense(self):
+        """Dense funds × keys matrix of weights."""
+        if getattr(self, '_dense', None) is not None:
+            return self._dense
+        matrix = np.zeros(self.shape)
+        matrix[self.rows, self.indices] = self.data
+        return matrix
+
+    def totals(self, values=None):
+        """Per-fund sum of values over stored entries (values default to the weights)."""
+        values = self.data if values is None else values
+        return np.bincount(self.rows, weights=values, minlength=len(self.funds))
+
+    def support(self):
+        """Per-entry ones: pass as values to work on the boolean support mask instead of weights."""
+        return np.ones_like(self.data)
+
+    def cross(self, values=None, other=None):
+        """Funds × funds matrix of Σ_k v[f, k]·u[g, k] over stored entries.
+
+        v and u are per-entry values (both default to the weights; u defaults
+        to v). Use support() to count shared keys, or mix weights with the
+        support to sum one fund's weight over the keys it shares with another.
+        Dense stores use one BLAS product. CSR stores scatter one fund's row at
+        a time into a keys-length scratch vector, so the zeros of the matrix are
+        never materialised.
+        """
+        values = self.data if values is None else values
+        other = values if other is None else other
+        n_funds, n_keys = self.shape
+        if self.format == 'dense':
+            left = self._matrix(values)
+            right = left if other is values else self._matrix(other)
+            return left @ right.T
+        result = np.zeros((n_funds, n_funds))
+        scratch = np.zeros(n_keys)
+        for g in range(n_funds):
+            lo, hi = self.indptr[g], self.indptr[g + 1]
+            cols = self.indices[lo:hi]
+            scratch[cols] = other[lo:hi]
+            result[:, g] = np.bincount(self.rows, weights=values * scratch[self.indices], minlength=n_funds)
+            scratch[cols] = 0
+        return result
+
+    def _matrix(self, values):
+        """Dense funds × keys matrix holding per-entry values."""
+        if values is self.data:
+            return self.dense()
+        matrix = np.zeros(self.shape)
+        matrix[self.rows, self.indices] = values
+        return matrix
+
+    def vector(self, fund):
+        """{column index: weight} view of one fund."""
+        cols, weights = self.row(fund)
+        return dict(zip(cols.tolist(), weights.tolist()))
+
+    def named(self, fund):
+        """{key: weight} view of one fund, as the old per-fund _weight_vec dict."""
+        keys = self.keys
+        cols, weights = self.row(fund)
+        return {keys[c]: w for c, w in zip(cols.tolist(), weights.tolist())}
+
+    def export(self, fund):
+        """Rounded {key: weight} dict for the JSON 'weights' field (tiny weights dropped)."""
+        return {k: round(w, EXPORT_DIGITS) for k, w in self.named(fund).items() if w > EXPORT_MIN_WEIGHT}